@@ -0,0 +1,124 @@
+"""
+Failure-triggered debug artifacts.
+
+On the happy path a phase snapshot only records where the browser was (URL
+and time) in memory; no screenshot is taken. Screenshots are captured in debug
+mode and by the failure handlers (capture()). Screenshots and page HTML/text
+sit in a bounded in-memory ring buffer and are written to disk only when the
+run is marked failed or debug mode is on, on a background thread.
+"""
+from collections import deque
+import base64
+import gzip
+import os
+import queue
+import threading
+import time
+
+DEFAULT_ARTIFACT_DIR = 'artifacts'
+DEFAULT_CAPACITY = 12
+
+
+class ArtifactRecorder:
+    def __init__(self, driver, directory=DEFAULT_ARTIFACT_DIR, debug=False, capacity=DEFAULT_CAPACITY,
+                 jpeg_quality=60):
+        self.driver = driver
+        self.directory = directory
+        self.debug = debug
+        self.jpeg_quality = jpeg_quality
+        self.buffer = deque(maxlen=capacity)
+        self.breadcrumbs = []
+        self.failed = False
+        self.failure_reason = ''
+        self.written = []
+        self._queue = queue.Queue()
+        self._writer = None
+        self._lock = threading.Lock()
+    
+    def snapshot(self, name):
+        """Phase checkpoint: a screenshot in debug mode, otherwise just the current URL"""
+        if self.debug:
+            self.capture(name)
+            return
+        try:
+            url = self.driver.current_url
+        except Exception:
+            url = '?'
+        self.breadcrumbs.append(f"{time.strftime('%H:%M:%S')} {name} {url}")
+    
+    def capture(self, name):
+        """Grab a low-cost JPEG screenshot of the current page into the ring buffer"""
+        try:
+            try:
+                result = self.driver.execute_cdp_cmd('Page.captureScreenshot', {
+                    'format': 'jpeg',
+                    'quality': self.jpeg_quality
+                })
+                data, ext = base64.b64decode(result['data']), 'jpg'
+            except Exception:
+                data, ext = self.driver.get_screenshot_as_png(), 'png'
+            self._add(f"{name}.{ext}", data, compress=False)
+        except Exception as e:
+            print(f"   ⚠ Snapshot {name} failed: {e}")
+    
+    def attach_text(self, filename, text):
+        """Keep a text artifact (page HTML, body text); gzip-compressed when written"""
+        self._add(filename, text.encode('utf-8'), compress=True)
+    
+    def mark_failed(self, reason=''):
+        self.failed = True
+        self.failure_reason = self.failure_reason or reason
+    
+    def _add(self, filename, data, compress):
+        item = {'filename': filename, 'data': data, 'compress': compress, 'time': time.time()}
+        self.buffer.append(item)
+        if self.debug:
+            self._enqueue(item)
+    
+    def _enqueue(self, item):
+        with self._lock:
+            if item.get('queued'):
+                return
+            item['queued'] = True
+            if self._writer is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._writer = threading.Thread(target=self._write_loop, name='artifact-writer', daemon=True)
+                self._writer.start()
+        self._queue.put(item)
+    
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                path = os.path.join(self.directory, item['filename'])
+                if item['compress']:
+                    path += '.gz'
+                    with gzip.open(path, 'wb', compresslevel=6) as f:
+                        f.write(item['data'])
+                else:
+                    with open(path, 'wb') as f:
+                        f.write(item['data'])
+                self.written.append(path)
+            except Exception as e:
+                print(f"   ⚠ Could not write artifact {item['filename']}: {e}")
+    
+    def flush(self):
+        """Queue every buffered snapshot for writing"""
+        for item in list(self.buffer):
+            self._enqueue(item)
+    
+    def close(self, timeout=30):
+        """Write the buffer if the run failed (or in debug mode) and wait for the writer"""
+        if self.failed or self.debug:
+            if self.breadcrumbs:
+                self.attach_text('breadcrumbs.txt', '\n'.join(self.breadcrumbs) + '\n')
+            self.flush()
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout)
+            print(f"🗂 {len(self.written)} artifact(s) written to {self.directory}/"
+                  + (f" ({self.failure_reason})" if self.failure_reason else ""))
+        self.buffer.clear()
+        self.breadcrumbs = []
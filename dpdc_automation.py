@@ -1,36 +1,224 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import undetected_chromedriver as uc
-import gspread
-from google.oauth2.service_account import Credentials
+import time
+
+# Cold-start clock: measured from the moment this module starts loading
+_MODULE_START = time.perf_counter()
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import nullcontext
 from datetime import datetime
 import json
-import time
 import os
 import random
-import requests
 import traceback
-import re
+from urllib.parse import urlparse
+
+# selenium, undetected_chromedriver, gspread and google-auth are imported where
+# they are used so code paths that need none of them start instantly
+
+from dpdc_extraction import PAGE_PAYLOAD_JS, RECORD_FIELDS, parse_page_payload, record_from_json
+from dpdc_record import Reading, ReadingError
+from dpdc_readiness import PageReadiness, RESULT_TEXT_PATTERNS, CUSTOMER_INPUT_SELECTORS
+from dpdc_spool import RecordSpool, DEFAULT_SPOOL_PATH, UNCHANGED_POLICIES
+from dpdc_rollup import Rollup
+from dpdc_forecast import Forecaster
+from dpdc_schedule import PollScheduler
+from dpdc_artifacts import ArtifactRecorder, DEFAULT_ARTIFACT_DIR
+from dpdc_metrics import RunMetrics
+from dpdc_store import ReadingStore, DEFAULT_STORE_PATH
+from dpdc_network import NetworkProfile
+from dpdc_cache import BrowserCache
+from dpdc_capture import ResponseCapture, enable_performance_log, CAPTURE_HOSTS
+from dpdc_sinks import fan_out, sinks_from_env
+from dpdc_checkpoint import CheckpointStore
+from dpdc_commands import CommandAccounting
+from dpdc_memory import MemoryMonitor, memory_profile
+from dpdc_deadline import RunDeadline, RunTimeout
+
+DEFAULT_BASE_URL = 'https://amiapp.dpdc.org.bd'
+# How long to wait for sink writes that outlived their timeout before touching the databases
+DEFAULT_SINK_DRAIN_SECONDS = 120
+
+
+def authorize_gspread():
+    """
+    gspread client for the service account in GOOGLE_CREDENTIALS
+    DPDC_SHEETS_BACKEND=fake returns the in-process stand-in (dpdc_fakesheets) instead
+    """
+    if os.environ.get('DPDC_SHEETS_BACKEND') == 'fake':
+        from dpdc_fakesheets import FakeBackend, FakeSheetsClient
+        return FakeSheetsClient(FakeBackend.from_env())
+    
+    import gspread
+    from google.oauth2.service_account import Credentials
+    
+    credentials_json = os.environ.get('GOOGLE_CREDENTIALS')
+    if not credentials_json:
+        raise Exception("GOOGLE_CREDENTIALS not found")
+
+    creds_dict = json.loads(credentials_json)
+    scopes = [
+        'https://www.googleapis.com/auth/spreadsheets',
+        'https://www.googleapis.com/auth/drive'
+    ]
+
+    creds = Credentials.from_service_account_info(creds_dict, scopes=scopes)
+    return gspread.authorize(creds)
+
 
 class DPDCAutomation:
-    def __init__(self):
-        """Initialize with advanced anti-detection measures"""
+    def __init__(self, launch_browser=True, connect_sheets=True):
+        """
+        Initialize with advanced anti-detection measures
+        connect_sheets=False skips Google auth (offline benchmarks against the stand-in site)
+        """
+        init_start = time.perf_counter()
         print("🚀 Initializing DPDC Automation (Anti-Detection Mode)...")
         
+        self.gc = None
+        self.spreadsheet = None
+        self.startup_timings = {'module_import': init_start - _MODULE_START}
+        self.metrics = RunMetrics()
+        self.metrics.begin('startup')
+        
+        # Authorize Sheets and open the spreadsheet while Chrome launches
+        sheets_future = None
+        if connect_sheets:
+            sheets_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sheets-setup')
+            sheets_future = sheets_executor.submit(self.setup_google_sheets, os.environ.get('SPREADSHEET_ID'))
+            sheets_executor.shutdown(wait=False)
+        else:
+            self.startup_timings['sheets'] = 0.0
+        
+        self.runs = 0
+        self.browser_runs = 0
+        self.driver = None
+        self.capture = None
+        self.fetched_payload = None
+        # WebDriver commands are counted under the metrics phase in progress
+        self.commands = CommandAccounting(lambda: self.metrics.current and self.metrics.current['name'])
+        self.command_budgets = CommandAccounting.budgets_from_env()
+        self.memory_profile = memory_profile()
+        self.memory = MemoryMonitor.from_env(lambda: self.metrics.current and self.metrics.current['name'])
+        self.capture_mode = os.environ.get('DPDC_CAPTURE_MODE', 'network')
+        self.base_url = os.environ.get('DPDC_BASE_URL', DEFAULT_BASE_URL).rstrip('/')
+        self.human_delay_scale = float(os.environ.get('DPDC_HUMAN_DELAY_SCALE', '1'))
+        if os.environ.get('DPDC_RANDOM_SEED'):
+            random.seed(int(os.environ['DPDC_RANDOM_SEED']))
+        self.browser_cache = BrowserCache.from_env()
+        self.network = NetworkProfile.from_env()
+        self.artifacts = self.new_artifact_recorder()
+        self.checkpoints = CheckpointStore.from_env()
+        # Sink writes fan_out stopped waiting for (they may still be flushing the spool)
+        self.in_flight_sinks = []
+        
+        chrome_start = time.perf_counter()
+        if launch_browser:
+            self.start_browser()
+        self.startup_timings['chrome'] = time.perf_counter() - chrome_start
+        self.spool = RecordSpool(os.environ.get('DPDC_SPOOL_PATH', DEFAULT_SPOOL_PATH))
+        self.store = ReadingStore(os.environ.get('DPDC_STORE_PATH', DEFAULT_STORE_PATH))
+        self.rollup = Rollup.from_env()
+        self.forecaster = Forecaster.from_env(self.store)
+        self.poll_scheduler = PollScheduler.from_env()
+        self.deadline = RunDeadline.from_env()
+        
+        try:
+            if sheets_future:
+                sheets_future.result()
+        except Exception:
+            try:
+                self.driver.quit()
+            except:
+                pass
+            raise
+        
+        self.startup_timings['init'] = time.perf_counter() - init_start
+        self.startup_timings['cold_start'] = time.perf_counter() - _MODULE_START
+        self.metrics.end()
+        self.metrics.extra['startup'] = {k: round(v, 3) for k, v in self.startup_timings.items()}
+        self.report_startup_timings()
+    
+    def start_browser(self):
+        """Launch Chrome and attach the helpers that hold on to the driver"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        
+        if self.browser_cache:
+            self.browser_cache.prepare()
         # Use undetected-chromedriver instead of regular selenium
-        self.driver = self.create_undetected_driver()
+        self.driver = self.commands.attach(self.create_undetected_driver())
+        self.memory.start(self.driver)
+        self.network.apply(self.driver)
         self.wait = WebDriverWait(self.driver, 30)
-        self.setup_google_sheets()
+        self.readiness = PageReadiness(self.driver)
+        hosts = CAPTURE_HOSTS + (urlparse(self.base_url).netloc,)
+        self.capture = ResponseCapture(self.driver, hosts) if self.capture_mode == 'network' else None
+        self.artifacts = self.new_artifact_recorder()
+        self.browser_runs = 0
+
+    def stop_browser(self):
+        if self.driver is None:
+            return
+        self.memory.stop()
+        try:
+            self.driver.quit()
+            print("\n🔒 Browser closed")
+        except:
+            pass
+        self.driver = None
+
+    def new_artifact_recorder(self):
+        return ArtifactRecorder(
+            self.driver,
+            directory=os.environ.get('DPDC_ARTIFACT_DIR', DEFAULT_ARTIFACT_DIR),
+            debug=os.environ.get('DPDC_DEBUG') == '1'
+        )
+
+    def start_new_run(self):
+        """Fresh per-run state for a repeated run on a warm instance"""
+        self.metrics = RunMetrics()
+        self.artifacts = self.new_artifact_recorder()
+        self.network.pages = {}
+        self.fetched_payload = None
+        self.commands.reset()
+        self.memory.reset()
+        self.deadline.start()
+
+    def report_commands(self):
+        """Per-phase WebDriver command counts into the run metrics; warns on budget overruns"""
+        report = self.commands.report()
+        if not report:
+            return []
+        self.commands.print_report(self.command_budgets, report)
+        self.metrics.extra['webdriver'] = report
+        over = self.commands.over_budget(self.command_budgets, report)
+        if over:
+            self.metrics.extra['webdriver_over_budget'] = {phase: count for phase, count, _ in over}
+            for phase, count, limit in over:
+                print(f"⚠ Phase '{phase}' used {count} WebDriver commands (budget {limit})")
+        return over
+
+    def report_memory(self):
+        """Peak Chrome memory per phase into the run metrics"""
+        self.memory.sample()
+        report = self.memory.report()
+        if not report:
+            return
+        self.memory.print_report(report)
+        self.metrics.extra['memory'] = dict(report, profile=self.memory_profile['name'])
+        if self.memory.over_limit():
+            print(f"⚠ Chrome went over the {self.memory.limit_mb:.0f} MB limit; it is recycled before the next run")
+
+    def report_startup_timings(self):
+        """Print the cold-start breakdown"""
+        t = self.startup_timings
+        print(f"⏱ Cold start {t['cold_start']:.2f}s "
+              f"(import {t['module_import']:.2f}s, chrome {t['chrome']:.2f}s, "
+              f"sheets {t.get('sheets', 0):.2f}s in parallel)")
     
     def create_undetected_driver(self):
         """Create an undetected Chrome driver that bypasses most bot detection"""
         print("   → Creating undetected Chrome driver...")
+        import undetected_chromedriver as uc
         
         options = uc.ChromeOptions()
         
@@ -43,7 +231,8 @@ class DPDCAutomation:
         
         # Anti-detection measures
         options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('--disable-features=IsolateOrigins,site-per-process')
+        disabled_features = ['IsolateOrigins', 'site-per-process'] + self.memory_profile['disable_features']
+        options.add_argument(f"--disable-features={','.join(disabled_features)}")
         options.add_argument('--disable-web-security')
         options.add_argument('--allow-running-insecure-content')
         
@@ -54,11 +243,24 @@ class DPDCAutomation:
         options.add_argument('--lang=en-US')
         options.add_argument('--accept-lang=en-US,en;q=0.9')
         
+        # Memory-lean launch (DPDC_MEMORY_PROFILE=lean)
+        for arg in self.memory_profile['args']:
+            options.add_argument(arg)
+        
+        # Persistent HTTP cache between runs
+        if self.browser_cache:
+            for arg in self.browser_cache.chrome_arguments():
+                options.add_argument(arg)
+        
+        # CDP Network events for capturing the result JSON
+        if self.capture_mode == 'network':
+            enable_performance_log(options)
+        
         # Preferences to appear more human
         prefs = {
             'profile.default_content_setting_values': {
                 'cookies': 1,
-                'images': 1,  # Load images to see what's happening
+                'images': 1,  # Per-type blocking is done by the resource profile
                 'javascript': 1,
                 'plugins': 1,
                 'popups': 0,
@@ -67,6 +269,7 @@ class DPDCAutomation:
                 'media_stream': 1,
             }
         }
+        prefs['profile.default_content_setting_values'].update(self.memory_profile['content_settings'])
         options.add_experimental_option('prefs', prefs)
         
         try:
@@ -112,6 +315,10 @@ class DPDCAutomation:
     
     def create_stealth_driver(self):
         """Fallback: Regular Chrome with maximum stealth"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        
         chrome_options = Options()
         chrome_options.add_argument('--headless=new')
         chrome_options.add_argument('--no-sandbox')
@@ -122,6 +329,15 @@ class DPDCAutomation:
         chrome_options.add_argument('--disable-blink-features=AutomationControlled')
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
+        for arg in self.memory_profile['args']:
+            chrome_options.add_argument(arg)
+        if self.memory_profile['disable_features']:
+            chrome_options.add_argument(f"--disable-features={','.join(self.memory_profile['disable_features'])}")
+        if self.browser_cache:
+            for arg in self.browser_cache.chrome_arguments():
+                chrome_options.add_argument(arg)
+        if self.capture_mode == 'network':
+            enable_performance_log(chrome_options)
         
         prefs = {
             'profile.default_content_setting_values': {
@@ -131,6 +347,7 @@ class DPDCAutomation:
                 'notifications': 1
             }
         }
+        prefs['profile.default_content_setting_values'].update(self.memory_profile['content_settings'])
         chrome_options.add_experimental_option('prefs', prefs)
         
         service = Service('/usr/bin/chromedriver')
@@ -148,24 +365,31 @@ class DPDCAutomation:
         
         return driver
 
-    def setup_google_sheets(self):
+    def setup_google_sheets(self, spreadsheet_id=None):
+        """Authorize gspread and, if an ID is given, open the spreadsheet handle"""
+        start = time.perf_counter()
         try:
-            credentials_json = os.environ.get('GOOGLE_CREDENTIALS')
-            if not credentials_json:
-                raise Exception("GOOGLE_CREDENTIALS not found")
-
-            creds_dict = json.loads(credentials_json)
-            scopes = [
-                'https://www.googleapis.com/auth/spreadsheets',
-                'https://www.googleapis.com/auth/drive'
-            ]
-
-            creds = Credentials.from_service_account_info(creds_dict, scopes=scopes)
-            self.gc = gspread.authorize(creds)
+            self.gc = authorize_gspread()
             print("✓ Google Sheets connected")
+            
+            if spreadsheet_id:
+                try:
+                    self.spreadsheet = self.gc.open_by_key(spreadsheet_id)
+                    print("✓ Spreadsheet opened")
+                except Exception as e:
+                    # Not fatal: update_google_sheet retries and the record is spooled
+                    print(f"⚠ Could not open spreadsheet yet: {e}")
         except Exception as e:
             print(f"✗ Error setting up Google Sheets: {e}")
             raise
+        finally:
+            self.startup_timings['sheets'] = time.perf_counter() - start
+
+    def open_spreadsheet(self, spreadsheet_id):
+        """Spreadsheet handle, reusing the one opened during startup"""
+        if self.spreadsheet is None or self.spreadsheet.id != spreadsheet_id:
+            self.spreadsheet = self.gc.open_by_key(spreadsheet_id)
+        return self.spreadsheet
 
     def human_delay(self, min_sec=1.5, max_sec=4.0):
         """More realistic human-like delays"""
@@ -173,7 +397,7 @@ class DPDCAutomation:
         # Add micro-pauses to simulate reading/thinking
         if random.random() > 0.7:
             delay += random.uniform(0.5, 2.0)
-        time.sleep(delay)
+        time.sleep(self.deadline.clip(delay * self.human_delay_scale))
 
     def human_type(self, element, text):
         """Type like a human with variable speed and occasional mistakes"""
@@ -184,13 +408,15 @@ class DPDCAutomation:
             # Occasionally pause longer (thinking)
             if random.random() > 0.85:
                 delay += random.uniform(0.3, 0.8)
-            time.sleep(delay)
+            time.sleep(self.deadline.clip(delay * self.human_delay_scale))
 
     def wait_for_captcha_solution(self, max_wait=60):
         """
         Wait for reCAPTCHA to be solved (either auto-solve or manual)
         Returns True if appears solved, False if timeout
         """
+        from selenium.webdriver.common.by import By
+        
         print(f"   → Waiting up to {max_wait}s for CAPTCHA resolution...")
         start_time = time.time()
         last_check = ""
@@ -246,11 +472,16 @@ class DPDCAutomation:
 
     def click_captcha_checkbox(self):
         """Click the reCAPTCHA checkbox"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+        
         try:
             self.driver.switch_to.default_content()
             
             # Find checkbox iframe
-            checkbox_iframe = WebDriverWait(self.driver, 10).until(
+            checkbox_iframe = WebDriverWait(self.driver, self.deadline.timeout(10)).until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, "iframe[src*='recaptcha/api2/anchor']"))
             )
             
@@ -258,7 +489,7 @@ class DPDCAutomation:
             self.human_delay(1, 2)
             
             # Click checkbox
-            checkbox = WebDriverWait(self.driver, 5).until(
+            checkbox = WebDriverWait(self.driver, self.deadline.timeout(5)).until(
                 EC.element_to_be_clickable((By.ID, "recaptcha-anchor"))
             )
             checkbox.click()
@@ -278,119 +509,71 @@ class DPDCAutomation:
                 pass
             return False
 
-    def extract_data_from_page(self):
-        """Extract data using multiple methods"""
-        print("   → Extracting data from page...")
+    def collect_page_payload(self):
+        """
+        Collect label/value pairs, body text and page source in one execute_script call
+        Returns a payload dict, or None if the script could not run
+        """
+        try:
+            payload = self.driver.execute_script(PAGE_PAYLOAD_JS)
+        except Exception as e:
+            print(f"   ⚠ Script extraction error: {e}")
+            return None
         
-        data = {
-            'accountId': '',
-            'customerName': '',
-            'customerClass': '',
-            'mobileNumber': '',
-            'emailId': '',
-            'accountType': '',
-            'balanceRemaining': '',
-            'connectionStatus': '',
-            'customerType': '',
-            'minRecharge': ''
-        }
+        if not payload or 'bodyText' not in payload:
+            return None
         
-        # Save page for debugging
-        page_source = self.driver.page_source
-        with open('final_page.html', 'w', encoding='utf-8') as f:
-            f.write(page_source)
+        pairs = payload.get('pairs') or []
+        # Legacy path: page_source + find body + body.text + find_elements + one .text per match
+        payload['roundTripsSaved'] = (len(pairs) + 4) - 1
+        return payload
+
+    def collect_page_payload_legacy(self):
+        """Collect the same payload with individual WebDriver calls"""
+        from selenium.webdriver.common.by import By
         
+        page_source = self.driver.page_source
         page_text = self.driver.find_element(By.TAG_NAME, 'body').text
-        with open('final_page_text.txt', 'w', encoding='utf-8') as f:
-            f.write(page_text)
         
-        print(f"   → Page text length: {len(page_text)} characters")
-        
-        # Method 1: Look for specific elements by class/id
+        pairs = []
         try:
-            # Try to find data in common element structures
             elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), ':')]")
             for elem in elements:
-                text = elem.text
-                if ':' in text:
-                    parts = text.split(':', 1)
-                    if len(parts) == 2:
-                        key = parts[0].strip().lower()
-                        value = parts[1].strip()
-                        
-                        if value:
-                            if 'account' in key and ('id' in key or 'number' in key):
-                                data['accountId'] = value
-                            elif 'name' in key:
-                                data['customerName'] = value
-                            elif 'balance' in key:
-                                data['balanceRemaining'] = value
-                            elif 'mobile' in key or 'phone' in key:
-                                data['mobileNumber'] = value
-                            elif 'email' in key:
-                                data['emailId'] = value
-                            elif 'class' in key:
-                                data['customerClass'] = value
-                            elif 'status' in key:
-                                data['connectionStatus'] = value
+                pairs.append(elem.text)
         except Exception as e:
             print(f"   ⚠ Element extraction error: {e}")
         
-        # Method 2: Parse the text content line by line
-        for line in page_text.split('\n'):
-            line = line.strip()
-            if ':' not in line:
-                continue
-            
-            parts = line.split(':', 1)
-            if len(parts) != 2:
-                continue
-            
-            key = parts[0].strip().lower()
-            value = parts[1].strip()
-            
-            if not value:
-                continue
-            
-            # Map keys to data fields
-            if ('account' in key or 'customer' in key) and 'number' in key and not data['accountId']:
-                data['accountId'] = value
-            elif 'name' in key and not data['customerName']:
-                data['customerName'] = value
-            elif 'balance' in key and not data['balanceRemaining']:
-                data['balanceRemaining'] = value
-            elif ('mobile' in key or 'phone' in key) and not data['mobileNumber']:
-                data['mobileNumber'] = value
-            elif 'email' in key and not data['emailId']:
-                data['emailId'] = value
-            elif 'class' in key and not data['customerClass']:
-                data['customerClass'] = value
-            elif 'type' in key and not data['accountType']:
-                data['accountType'] = value
-            elif 'status' in key and not data['connectionStatus']:
-                data['connectionStatus'] = value
-            elif 'minimum' in key or 'min' in key:
-                data['minRecharge'] = value
-        
-        # Method 3: Regex patterns
-        if not data['balanceRemaining']:
-            balance_patterns = [
-                r'balance[:\s]+([0-9,.]+)',
-                r'remaining[:\s]+([0-9,.]+)',
-                r'due[:\s]+([0-9,.]+)',
-                r'tk[:\s]+([0-9,.]+)',
-                r'৳[:\s]*([0-9,.]+)'
-            ]
-            for pattern in balance_patterns:
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    data['balanceRemaining'] = match.group(1)
-                    break
-        
-        if not data['mobileNumber']:
-            mobile_match = re.search(r'(?:mobile|phone)[:\s]+([\d\-+]+)', page_text, re.IGNORECASE)
-            if mobile_match:
-                data['mobileNumber'] = mobile_match.group(1)
+        return {
+            'pairs': pairs,
+            'bodyText': page_text,
+            'pageSource': page_source,
+            'roundTripsSaved': 0
+        }
+
+    def extract_data_from_page(self):
+        """Extract data using multiple methods"""
+        print("   → Extracting data from page...")
+        
+        payload = None
+        if os.environ.get('DPDC_EXTRACTION_MODE', 'script') != 'legacy':
+            payload = self.collect_page_payload()
+            if payload:
+                print(f"   ✓ Collected page in one script call ({payload['roundTripsSaved']} round-trips saved)")
+        if payload is None:
+            payload = self.collect_page_payload_legacy()
+        
+        page_source = payload['pageSource']
+        page_text = payload['bodyText']
+        self.fetched_payload = {'source': 'dom', 'pairs': payload['pairs'], 'bodyText': page_text}
+        self.save_checkpoint('fetched', fetched=self.fetched_payload)
+        
+        # Keep page for debugging (written only on failure or in debug mode)
+        self.artifacts.attach_text('final_page.html', page_source)
+        self.artifacts.attach_text('final_page_text.txt', page_text)
+        
+        print(f"   → Page text length: {len(page_text)} characters")
+        
+        data = parse_page_payload(payload['pairs'], page_text)
         
         # Print what we found
         found_fields = [k for k, v in data.items() if v]
@@ -398,17 +581,54 @@ class DPDCAutomation:
         
         return data
 
+    def begin_phase(self, name):
+        """Start a metrics span and allot the phase its share of the run deadline (may raise RunTimeout)"""
+        self.metrics.begin(name)
+        self.deadline.begin(name)
+
+    def wait_for_result(self, timeout=25):
+        """
+        Wait for the lookup to answer: a matching JSON response (returned as a record)
+        or result text rendered in the page (returns None so the DOM is extracted)
+        """
+        start = time.time()
+        while time.time() - start < timeout:
+            if self.capture:
+                data = self.capture.find_record(record_from_json)
+                if data:
+                    print(f"   ✓ Result response captured after {time.time() - start:.1f}s")
+                    return data
+            try:
+                state = self.readiness.probe(RESULT_TEXT_PATTERNS)
+                if self.readiness.is_ready(state, text=RESULT_TEXT_PATTERNS):
+                    print(f"   ✓ Result rendered after {time.time() - start:.1f}s")
+                    # The response may have finished in the meantime
+                    return self.capture.find_record(record_from_json) if self.capture else None
+            except Exception:
+                pass
+            time.sleep(self.readiness.poll_interval)
+        print(f"   ⚠ No result after {timeout}s")
+        return None
+
     def fetch_usage_data(self, customer_number):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        
         try:
             print(f"\n📡 Fetching data for customer: {customer_number}")
             
             # Navigate to homepage
+            self.begin_phase('homepage')
             print("   → Loading DPDC website...")
-            self.driver.get('https://amiapp.dpdc.org.bd/')
-            self.human_delay(3, 5)
-            self.driver.save_screenshot('01_homepage.png')
+            self.driver.get(f'{self.base_url}/')
+            self.readiness.wait(timeout=self.deadline.timeout(15), quiet_ms=500, label='Homepage')
+            self.network.record_page(self.driver, 'homepage')
+            self.artifacts.snapshot('01_homepage')
             
             # Click QUICK PAY button
+            self.begin_phase('quick_pay')
             print("   → Clicking QUICK PAY button...")
             try:
                 # Try multiple selectors for the Quick Pay button
@@ -416,7 +636,7 @@ class DPDCAutomation:
                 
                 # Method 1: Look for button with text "QUICK PAY"
                 try:
-                    quick_pay_btn = WebDriverWait(self.driver, 10).until(
+                    quick_pay_btn = WebDriverWait(self.driver, self.deadline.timeout(10)).until(
                         EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'QUICK PAY')]"))
                     )
                     self.human_delay(1, 2)
@@ -439,35 +659,33 @@ class DPDCAutomation:
                 # Method 3: Direct navigation as fallback
                 if not quick_pay_clicked:
                     print("   → Direct navigation to Quick Pay page...")
-                    self.driver.get('https://amiapp.dpdc.org.bd/quick-pay')
+                    self.driver.get(f'{self.base_url}/quick-pay')
                 
-                self.human_delay(4, 6)
-                self.driver.save_screenshot('02_quick_pay.png')
+                self.readiness.wait(timeout=self.deadline.timeout(15), quiet_ms=300, selectors=CUSTOMER_INPUT_SELECTORS, label='Quick Pay')
+                self.artifacts.snapshot('02_quick_pay')
                 
             except Exception as e:
                 print(f"   ⚠ Error navigating to Quick Pay: {e}")
                 print("   → Trying direct URL...")
-                self.driver.get('https://amiapp.dpdc.org.bd/quick-pay')
-                self.human_delay(4, 6)
-                self.driver.save_screenshot('02_quick_pay_fallback.png')
+                self.driver.get(f'{self.base_url}/quick-pay')
+                self.readiness.wait(timeout=self.deadline.timeout(15), quiet_ms=300, selectors=CUSTOMER_INPUT_SELECTORS, label='Quick Pay')
+                self.artifacts.snapshot('02_quick_pay_fallback')
             
             # Enter customer number
+            self.begin_phase('input')
             print("   → Entering customer number...")
             try:
                 # Wait for page to be fully loaded
-                WebDriverWait(self.driver, 15).until(
+                WebDriverWait(self.driver, self.deadline.timeout(15)).until(
                     EC.presence_of_element_located((By.TAG_NAME, "body"))
                 )
                 
-                # Wait a bit more for any JS to finish
-                self.human_delay(2, 3)
-                
                 # Find the input field - be more specific to avoid search bar
                 customer_input = None
                 
                 # Method 1: Look for input in the Quick Pay form area
                 try:
-                    customer_input = WebDriverWait(self.driver, 10).until(
+                    customer_input = WebDriverWait(self.driver, self.deadline.timeout(10)).until(
                         EC.presence_of_element_located((By.XPATH, "//input[@type='text' and not(contains(@placeholder, 'Search'))]"))
                     )
                     print("   ✓ Found customer input field (method 1)")
@@ -505,30 +723,34 @@ class DPDCAutomation:
                 
                 print(f"   ✓ Entered: {customer_number}")
                 self.human_delay(2, 3)
-                self.driver.save_screenshot('03_after_input.png')
+                self.artifacts.snapshot('03_after_input')
                 
             except Exception as e:
                 print(f"   ✗ Could not enter customer number: {e}")
-                self.driver.save_screenshot('03_error_input.png')
+                self.artifacts.capture('03_error_input')
                 raise
             
             # Handle CAPTCHA
+            self.begin_phase('verification')
             print("\n🔐 Handling reCAPTCHA...")
             self.click_captcha_checkbox()
             self.human_delay(2, 3)
             
             # Wait for CAPTCHA to resolve
-            captcha_solved = self.wait_for_captcha_solution(max_wait=60)
+            captcha_solved = self.wait_for_captcha_solution(max_wait=self.deadline.timeout(60))
             
             if captcha_solved:
                 print("   ✓ CAPTCHA appears resolved")
             else:
                 print("   ⚠ CAPTCHA may not be solved, trying anyway...")
             
-            self.driver.save_screenshot('04_after_captcha.png')
+            self.artifacts.snapshot('04_after_captcha')
             
             # Submit the form
+            self.begin_phase('submit')
             print("\n📤 Submitting form...")
+            if self.capture:
+                self.capture.reset()
             try:
                 submit_btn = self.driver.find_element(By.XPATH, "//button[@type='submit' or contains(text(), 'Submit') or contains(text(), 'SUBMIT')]")
                 
@@ -547,79 +769,258 @@ class DPDCAutomation:
                 customer_input.send_keys(Keys.RETURN)
             
             # Wait for results
+            self.begin_phase('result_wait')
             print("\n⏳ Waiting for results...")
-            self.human_delay(8, 12)
-            self.driver.save_screenshot('05_after_submit.png')
+            captured = self.wait_for_result(timeout=self.deadline.timeout(25))
+            self.artifacts.snapshot('05_after_submit')
             
-            # Additional wait to ensure data loads
-            self.human_delay(5, 8)
-            self.driver.save_screenshot('06_final_wait.png')
+            if captured is None:
+                # Let the result finish rendering and any follow-up requests settle
+                self.readiness.wait(timeout=self.deadline.timeout(8), quiet_ms=750, idle_ms=500, label='Result render')
+                self.artifacts.snapshot('06_final_wait')
+            self.network.record_page(self.driver, 'quick_pay')
             
             # Extract data
+            self.begin_phase('extraction')
             print("\n📊 Extracting data...")
-            data = self.extract_data_from_page()
+            if captured is not None:
+                print(f"   ✓ Using result captured from {self.capture.matched_url}")
+                self.artifacts.attach_text('result_response.json', self.capture.matched_body)
+                self.fetched_payload = {'source': 'network', 'body': self.capture.matched_body}
+                self.save_checkpoint('fetched', fetched=self.fetched_payload)
+                data = captured
+            else:
+                data = self.extract_data_from_page()
             
             # Check if we got any data
             if not any(data.values()):
                 print("   ⚠ No data extracted, check screenshots and HTML files")
-                data['accountId'] = customer_number
-                data['customerName'] = 'Data extraction failed - check artifacts'
-                data['balanceRemaining'] = 'N/A'
-            else:
-                print("   ✓ Data successfully extracted!")
+                self.artifacts.capture('07_no_data')
+                self.artifacts.mark_failed('no data extracted')
+                return Reading.failure(customer_number, ReadingError.EXTRACTION_FAILED)
             
-            return data
+            print("   ✓ Data successfully extracted!")
+            return Reading.from_fields(data)
+            
+        except RunTimeout as e:
+            print(f"\n⏰ Stopping early: {e}")
+            self.artifacts.capture('timeout')
+            self.artifacts.mark_failed(str(e))
+            self.metrics.fail(e)
+            return Reading.failure(customer_number, ReadingError.TIMEOUT, str(e)[:100])
             
         except Exception as e:
             print(f"\n✗ Error during fetch: {e}")
             traceback.print_exc()
-            self.driver.save_screenshot('error_final.png')
+            self.artifacts.capture('error_final')
+            self.artifacts.mark_failed(f'fetch error: {e}')
+            self.metrics.fail(e)
             
             # Return error data
-            return {
-                'accountId': customer_number,
-                'customerName': f'Error: {str(e)[:100]}',
-                'customerClass': '',
-                'mobileNumber': '',
-                'emailId': '',
-                'accountType': '',
-                'balanceRemaining': 'Error - check artifacts',
-                'connectionStatus': '',
-                'customerType': '',
-                'minRecharge': ''
-            }
+            return Reading.failure(customer_number, ReadingError.FETCH_ERROR, str(e)[:100])
 
-    def update_google_sheet(self, spreadsheet_id, data):
+    def update_google_sheet(self, spreadsheet_id, reading, timestamp=None, gate=None):
+        """
+        Spool the row and flush the spool to sheet1; with a fan_out CommitGate the
+        spool append is the commit step (a timed-out write cannot land late)
+        """
+        commit = gate.commit if gate is not None else nullcontext
         try:
             print("\n📊 Updating Google Sheet...")
-            sheet = self.gc.open_by_key(spreadsheet_id)
-            worksheet = sheet.sheet1
+            timestamp = timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            row_data = reading.to_row(timestamp)
+            if reading.forecast is not None:
+                # Projection goes after the "last seen" column
+                row_data += [''] + reading.forecast.to_cells()
+
+            # Unchanged since the last accepted record: skip or just refresh "last seen"
+            account_id = reading.account_id
+            content_hash = None if reading.is_error else reading.content_hash()
+            # Hashes spooled before the typed record are re-derived from their row, so an
+            # unchanged reading still matches after the upgrade
+            rehash = lambda fields: Reading.from_fields(fields).content_hash()
+            last = self.spool.last_record(account_id, rehash) if content_hash else None
+            if last and last[0] == content_hash and self.unchanged_policy() != 'append':
+                # Nothing new to deliver: the row is already on the sheet
+                with commit():
+                    pass
+                self.apply_rollup(timestamp, reading)
+                return self.handle_unchanged_record(spreadsheet_id, last[1], timestamp)
 
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            row_data = [
-                timestamp,
-                data.get('accountId', ''),
-                data.get('customerName', ''),
-                data.get('customerClass', ''),
-                data.get('mobileNumber', ''),
-                data.get('emailId', ''),
-                data.get('accountType', ''),
-                data.get('balanceRemaining', ''),
-                data.get('connectionStatus', ''),
-                data.get('customerType', ''),
-                data.get('minRecharge', '')
-            ]
-
-            worksheet.append_row(row_data)
-            print(f"✓ Sheet updated at {timestamp}")
-            print(f"   Data: {data}")
+            # Spool first so the record survives an API failure
+            with commit():
+                self.spool.append(row_data, account_id, content_hash)
+            print(f"   ✓ Record spooled to {self.spool.path}")
+            # Only a committed record counts towards the rollup
+            self.apply_rollup(timestamp, reading)
+
+            sheet = self.open_spreadsheet(spreadsheet_id)
+            worksheet = sheet.sheet1
+            flushed = self.spool.flush(worksheet)
+            print(f"✓ Sheet updated at {timestamp} ({flushed} row(s) in one request)")
+            print(f"   Data: {reading}")
+            self.update_rollup(sheet)
             return True
         except Exception as e:
             print(f"✗ Sheet update error: {e}")
+            try:
+                print(f"   → {len(self.spool.pending())} row(s) kept in spool for the next run")
+            except Exception:
+                pass
             traceback.print_exc()
             return False
 
-    def run(self):
+    def write_outputs(self, spreadsheet_id, reading, timestamp=None, skip=()):
+        """
+        Write the record to every configured sink (except those in skip) in parallel
+        and report per-sink latency; returns the per-sink results
+        """
+        self.begin_phase('outputs')
+        timestamp = timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        sinks = [sink for sink in sinks_from_env(self, spreadsheet_id) if sink.name not in skip]
+        for sink in sinks:
+            # No sink may wait past what the deadline left for the outputs phase
+            sink.timeout = min(sink.timeout, self.deadline.timeout(sink.timeout))
+        results = fan_out(sinks, timestamp, reading, self.in_flight_sinks)
+        
+        print("\n📤 Outputs:")
+        for name, result in results.items():
+            mark = '✓' if result['ok'] else '✗'
+            detail = f" - {result['error']}" if result['error'] else ''
+            print(f"   {mark} {name:<8} {result['seconds']:.2f}s{detail}")
+        self.metrics.extra['sinks'] = results
+        
+        failed = [name for name, result in results.items() if not result['ok']]
+        if failed:
+            self.metrics.fail(f"sink(s) failed: {', '.join(failed)}")
+        else:
+            self.metrics.end()
+        return results
+
+    def forecast_reading(self, timestamp, reading):
+        """Depletion forecast for the reading, or None; never fails the run"""
+        try:
+            forecast = self.forecaster.update(timestamp, reading)
+        except Exception as e:
+            print(f"⚠ Forecast failed: {e}")
+            return None
+        if forecast is not None:
+            print(f"🔮 {forecast}")
+            self.metrics.extra['forecast'] = forecast.to_dict()
+        return forecast
+
+    def plan_next_poll(self, reading):
+        """Write the adaptive schedule's next poll time; never fails the run"""
+        if self.poll_scheduler is None:
+            return
+        now = datetime.now()
+        try:
+            decision = self.poll_scheduler.decide(now, reading, self.poll_scheduler.load())
+        except Exception as e:
+            # Never leave a past nextRun behind: that makes every wake-up due
+            print(f"⚠ Poll schedule failed: {e}")
+            decision = self.poll_scheduler.decide(now, None, self.poll_scheduler.load())
+        try:
+            self.poll_scheduler.save(decision)
+        except Exception as e:
+            print(f"⚠ Poll schedule failed: {e}")
+            return
+        print(f"📅 Next poll {decision['nextRun']} (every {decision['intervalHours']}h: {decision['reason']})")
+        self.metrics.extra['next_poll'] = decision
+
+    def save_checkpoint(self, stage, **state):
+        """Persist a pipeline stage for the current customer; never fails the run"""
+        if not getattr(self, 'customer_number', None):
+            return
+        try:
+            self.checkpoints.save(self.customer_number, stage, **state)
+        except Exception as e:
+            print(f"   ⚠ Could not save '{stage}' checkpoint: {e}")
+
+    def extract_from_fetched(self, fetched):
+        """Re-run extraction on a checkpointed fetch; None if it yields nothing"""
+        if fetched.get('source') == 'network':
+            data = record_from_json(json.loads(fetched.get('body') or 'null'))
+        else:
+            data = parse_page_payload(fetched.get('pairs', []), fetched.get('bodyText', ''))
+        return Reading.from_fields(data) if data and any(data.values()) else None
+
+    def resume_from_checkpoint(self, customer_number):
+        """(reading, timestamp, done_sinks) from a resumable checkpoint, or None"""
+        try:
+            checkpoint = self.checkpoints.load(customer_number)
+        except Exception as e:
+            print(f"   ⚠ Could not read checkpoint: {e}")
+            return None
+        if not checkpoint:
+            return None
+        
+        stage = checkpoint['stage']
+        print(f"\n♻ Resuming from '{stage}' checkpoint of {checkpoint.get('updated_at')}")
+        if stage == 'fetched':
+            reading = self.extract_from_fetched(checkpoint.get('fetched') or {})
+            if not reading:
+                print("   ⚠ Checkpointed page yields no data, fetching again")
+                self.checkpoints.clear(customer_number)
+                return None
+            self.save_checkpoint('extracted', data=reading.to_dict())
+        else:
+            reading = Reading.from_fields(checkpoint['data'])
+        return reading, checkpoint.get('timestamp'), checkpoint.get('done_sinks', [])
+
+    def unchanged_policy(self):
+        """DPDC_UNCHANGED_POLICY: append, skip or touch (default)"""
+        policy = os.environ.get('DPDC_UNCHANGED_POLICY', 'touch')
+        if policy not in UNCHANGED_POLICIES:
+            print(f"   ⚠ Unknown DPDC_UNCHANGED_POLICY '{policy}', using 'touch'")
+            policy = 'touch'
+        return policy
+
+    def handle_unchanged_record(self, spreadsheet_id, sheet_row, timestamp):
+        """Skip or refresh "last seen" for a record identical to the last one"""
+        worksheet = None
+        if self.unchanged_policy() == 'touch' and sheet_row:
+            worksheet = self.open_spreadsheet(spreadsheet_id).sheet1
+            # "Last seen" column sits right after the record columns
+            last_seen_col = chr(ord('A') + len(RECORD_FIELDS) + 1)
+            worksheet.update_acell(f'{last_seen_col}{sheet_row}', timestamp)
+            print(f"✓ Record unchanged, last seen updated in row {sheet_row}")
+        else:
+            print("✓ Record unchanged, sheet write skipped")
+        
+        # Rows still pending from earlier failures go out regardless
+        if self.spool.pending():
+            worksheet = worksheet or self.open_spreadsheet(spreadsheet_id).sheet1
+            flushed = self.spool.flush(worksheet)
+            print(f"   ✓ Flushed {flushed} pending row(s)")
+        self.update_rollup(self.open_spreadsheet(spreadsheet_id))
+        return True
+
+    def apply_rollup(self, timestamp, reading):
+        """Fold a committed reading into the local day/month totals"""
+        if self.rollup:
+            self.rollup.apply(timestamp, reading)
+
+    def update_rollup(self, sheet):
+        """Push changed day/month rollup rows; a failure leaves them pending without failing the sheet write"""
+        if not self.rollup or not self.rollup.pending():
+            return
+        try:
+            written = self.rollup.push(sheet)
+            print(f"   ✓ Rollup: {written} day/month row(s) updated in one request")
+        except Exception as e:
+            print(f"   ⚠ Rollup update failed, kept for the next run: {e}")
+
+    def run(self, keep_browser=False):
+        """One full fetch-and-store pass; keep_browser leaves Chrome running for the next one"""
+        if self.runs:
+            self.start_new_run()
+        else:
+            self.deadline.start()
+        self.runs += 1
+        self.browser_runs += 1
+        success = False
+        reading = None
         try:
             print("\n" + "="*60)
             print("DPDC Automation - Enhanced Version")
@@ -635,12 +1036,41 @@ class DPDCAutomation:
             print(f"Customer: {customer_number}")
             print(f"Sheet ID: {spreadsheet_id[:10]}...")
 
-            data = self.fetch_usage_data(customer_number)
-            self.update_google_sheet(spreadsheet_id, data)
+            self.customer_number = customer_number
+            resumed = self.resume_from_checkpoint(customer_number)
+            if resumed:
+                reading, timestamp, done_sinks = resumed
+            else:
+                if self.driver is None:
+                    self.start_browser()
+                reading = self.fetch_usage_data(customer_number)
+                timestamp, done_sinks = None, []
+                if not reading.is_error:
+                    self.save_checkpoint('extracted', data=reading.to_dict())
+
+            # Error records are written but never checkpointed: a retry should fetch again
+            checkpointed = not reading.is_error
+            timestamp = timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            reading.forecast = self.forecast_reading(timestamp, reading)
+            if checkpointed:
+                self.save_checkpoint('normalized', data=reading.to_dict(), timestamp=timestamp, done_sinks=done_sinks)
+
+            results = self.write_outputs(spreadsheet_id, reading, timestamp, skip=done_sinks)
+            if checkpointed:
+                # A row that reached the spool counts: the spool itself redelivers it
+                done_sinks = done_sinks + [name for name, result in results.items() if result['committed']]
+                missed = [name for name in results if name not in done_sinks]
+                # The Sheet is the record of truth: once it has the row, a secondary sink that keeps
+                # failing must not pin the checkpoint and replay this reading until the TTL
+                if missed and 'sheets' in done_sinks:
+                    print(f"⚠ Giving up on {', '.join(missed)} for this reading (the Sheet has it)")
+                stage = 'committed' if not missed or 'sheets' in done_sinks else 'normalized'
+                self.save_checkpoint(stage, done_sinks=done_sinks)
 
             print("\n" + "="*60)
             print("✓ Process Completed!")
             print("="*60)
+            success = True
             return True
 
         except Exception as e:
@@ -648,15 +1078,77 @@ class DPDCAutomation:
             print(f"✗ Process Failed: {e}")
             print("="*60)
             traceback.print_exc()
+            self.artifacts.mark_failed(f'run failed: {e}')
+            self.metrics.fail(e)
             return False
         finally:
+            self.artifacts.close()
             try:
-                self.driver.quit()
-                print("\n🔒 Browser closed")
-            except:
-                pass
+                self.metrics.extra['network'] = self.network.report()
+            except Exception as e:
+                print(f"⚠ Network report failed: {e}")
+            if not keep_browser:
+                self.stop_browser()
+            # After quit so Chrome has flushed the cache to disk
+            if self.browser_cache:
+                try:
+                    self.metrics.extra['browser_cache'] = self.browser_cache.summary(self.network.pages)
+                except Exception as e:
+                    print(f"⚠ Browser cache summary failed: {e}")
+            self.report_commands()
+            self.report_memory()
+            self.plan_next_poll(reading)
+            if self.deadline.total:
+                self.metrics.extra['deadline'] = self.deadline.report()
+            self.metrics.finish(success and not self.metrics.error)
+            self.metrics.export()
+            self.checkpoint_databases()
+
+    def drain_sinks(self, timeout=None):
+        """
+        Wait for sink writes that outlived their fan_out timeout; a Sheets write past its
+        commit step is still flushing the spool. Returns True when none is left running
+        """
+        if timeout is None:
+            timeout = float(os.environ.get('DPDC_SINK_DRAIN_SECONDS', DEFAULT_SINK_DRAIN_SECONDS))
+        pending = [future for future in self.in_flight_sinks if not future.done()]
+        if pending:
+            print(f"⏳ Waiting up to {timeout:.0f}s for {len(pending)} timed-out sink write(s)...")
+            pending = list(wait(pending, timeout=timeout).not_done)
+        self.in_flight_sinks = pending
+        if pending:
+            print(f"⚠ {len(pending)} sink write(s) still running, leaving the databases open")
+        return not pending
+
+    def checkpoint_databases(self):
+        """Fold every WAL into its database file so a run's commits survive on the main files alone"""
+        if not self.drain_sinks():
+            return
+        for db in (self.spool, self.store, self.rollup, self.forecaster):
+            if db is None:
+                continue
+            try:
+                db.checkpoint()
+            except Exception as e:
+                print(f"⚠ Database checkpoint failed for {db.__class__.__name__}: {e}")
+
+    def close(self):
+        """Checkpoint and close the local databases (end of process)"""
+        self.stop_browser()
+        if not self.drain_sinks():
+            return
+        for db in (self.rollup, self.forecaster, self.spool, self.store):
+            if db is None:
+                continue
+            try:
+                db.close()
+            except Exception as e:
+                print(f"⚠ Could not close {db.__class__.__name__}: {e}")
 
 if __name__ == "__main__":
-    automation = DPDCAutomation()
+    # A resumable checkpoint means the page work is already done: skip launching Chrome
+    customer = os.environ.get('CUSTOMER_NUMBER', '')
+    automation = DPDCAutomation(launch_browser=not (customer and CheckpointStore.from_env().load(customer)))
     success = automation.run()
+    automation.close()
     exit(0 if success else 1)
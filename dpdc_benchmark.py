@@ -0,0 +1,199 @@
+"""
+Offline extraction benchmark.
+
+Replays saved final_page.html / final_page_text.txt captures through the extraction
+logic without a browser and reports throughput, per-field hit rate and regressions
+against a stored baseline.
+
+Corpus layout: any directory tree; every folder holding final_page.html and/or
+final_page_text.txt (optionally gzip-compressed, as the artifact recorder writes
+them) is one capture. An optional expected.json in the same folder
+maps field names to the values the parser should produce.
+
+    python dpdc_benchmark.py debug-artifacts/
+    python dpdc_benchmark.py debug-artifacts/ --save-baseline
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+from dpdc_extraction import empty_record, pairs_from_html, parse_page_payload, text_from_html
+
+HTML_NAME = 'final_page.html'
+TEXT_NAME = 'final_page_text.txt'
+EXPECTED_NAME = 'expected.json'
+DEFAULT_BASELINE = 'extraction_baseline.json'
+
+
+def read_capture_file(root, files, name):
+    """Read name or name.gz from a capture folder; None if neither exists"""
+    if name in files:
+        with open(os.path.join(root, name), encoding='utf-8', errors='replace') as f:
+            return f.read()
+    if name + '.gz' in files:
+        with gzip.open(os.path.join(root, name + '.gz'), 'rt', encoding='utf-8', errors='replace') as f:
+            return f.read()
+    return None
+
+
+def load_corpus(corpus_dir):
+    """Find every capture under corpus_dir and read it into memory"""
+    captures = []
+    for root, dirs, files in os.walk(corpus_dir):
+        dirs.sort()
+        html = read_capture_file(root, files, HTML_NAME)
+        text = read_capture_file(root, files, TEXT_NAME)
+        if html is None and text is None:
+            continue
+        
+        capture = {'path': os.path.relpath(root, corpus_dir), 'html': html or '', 'text': text, 'expected': None}
+        if capture['text'] is None:
+            capture['text'] = text_from_html(capture['html'])
+        if EXPECTED_NAME in files:
+            with open(os.path.join(root, EXPECTED_NAME), encoding='utf-8') as f:
+                capture['expected'] = json.load(f)
+        captures.append(capture)
+    return captures
+
+
+def extract_capture(capture):
+    """Run one capture through the same path as DPDCAutomation.extract_data_from_page"""
+    pairs = pairs_from_html(capture['html']) if capture['html'] else []
+    return parse_page_payload(pairs, capture['text'])
+
+
+def run_benchmark(captures, repeat=1):
+    """Extract every capture `repeat` times; returns the summary dict"""
+    fields = list(empty_record().keys())
+    results = []
+    
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [extract_capture(capture) for capture in captures]
+    elapsed = time.perf_counter() - start
+    
+    records = len(captures) * repeat
+    hits = {field: 0 for field in fields}
+    checked = {field: 0 for field in fields}
+    filled = {field: 0 for field in fields}
+    mismatches = []
+    
+    for capture, data in zip(captures, results):
+        for field in fields:
+            if data.get(field):
+                filled[field] += 1
+        
+        expected = capture['expected']
+        if not expected:
+            continue
+        for field, want in expected.items():
+            if field not in checked:
+                continue
+            checked[field] += 1
+            got = data.get(field, '')
+            if got == want:
+                hits[field] += 1
+            else:
+                mismatches.append({'capture': capture['path'], 'field': field, 'expected': want, 'got': got})
+    
+    return {
+        'captures': len(captures),
+        'records': records,
+        'seconds': elapsed,
+        'records_per_sec': records / elapsed if elapsed > 0 else 0.0,
+        'field_hit_rate': {f: hits[f] / checked[f] for f in fields if checked[f]},
+        'field_fill_rate': {f: filled[f] / len(captures) for f in fields} if captures else {},
+        'mismatches': mismatches
+    }
+
+
+def compare_to_baseline(summary, baseline, hit_tolerance=0.0, speed_tolerance=0.25):
+    """List regressions of the current summary against a stored baseline"""
+    regressions = []
+    
+    for field, old_rate in baseline.get('field_hit_rate', {}).items():
+        new_rate = summary['field_hit_rate'].get(field)
+        if new_rate is None:
+            continue
+        if new_rate < old_rate - hit_tolerance:
+            regressions.append(f"{field} hit rate {old_rate:.1%} → {new_rate:.1%}")
+    
+    old_speed = baseline.get('records_per_sec')
+    if old_speed and summary['records_per_sec'] < old_speed * (1 - speed_tolerance):
+        regressions.append(f"throughput {old_speed:.1f} → {summary['records_per_sec']:.1f} records/sec")
+    
+    return regressions
+
+
+def print_report(summary, regressions):
+    print("="*60)
+    print("Extraction Benchmark")
+    print("="*60)
+    print(f"Captures: {summary['captures']}  Records: {summary['records']}")
+    print(f"Time: {summary['seconds']:.3f}s  ({summary['records_per_sec']:.1f} records/sec)")
+    
+    print("\nField               hit rate   fill rate")
+    for field, fill in summary['field_fill_rate'].items():
+        hit = summary['field_hit_rate'].get(field)
+        hit_text = f"{hit:8.1%}" if hit is not None else "       -"
+        print(f"  {field:<18}{hit_text}   {fill:8.1%}")
+    
+    if summary['mismatches']:
+        print(f"\n⚠ {len(summary['mismatches'])} mismatches:")
+        for m in summary['mismatches'][:20]:
+            print(f"   {m['capture']}: {m['field']} expected {m['expected']!r}, got {m['got']!r}")
+    
+    if regressions:
+        print("\n✗ Regressions against baseline:")
+        for r in regressions:
+            print(f"   {r}")
+    else:
+        print("\n✓ No regressions")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay saved DPDC page captures through the extraction logic")
+    parser.add_argument('corpus', help="Directory of saved captures")
+    parser.add_argument('--baseline', help=f"Baseline file (default: <corpus>/{DEFAULT_BASELINE})")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--repeat', type=int, default=1, help="Extract the corpus N times for steadier timings")
+    parser.add_argument('--hit-tolerance', type=float, default=0.0, help="Allowed drop in per-field hit rate")
+    parser.add_argument('--speed-tolerance', type=float, default=0.25, help="Allowed fractional drop in records/sec")
+    parser.add_argument('--json', action='store_true', help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+    
+    captures = load_corpus(args.corpus)
+    if not captures:
+        print(f"✗ No captures found in {args.corpus}")
+        return 1
+    
+    summary = run_benchmark(captures, repeat=max(1, args.repeat))
+    
+    baseline_path = args.baseline or os.path.join(args.corpus, DEFAULT_BASELINE)
+    regressions = []
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(summary, baseline, args.hit_tolerance, args.speed_tolerance)
+    
+    if args.json:
+        print(json.dumps(dict(summary, regressions=regressions), indent=2, ensure_ascii=False))
+    else:
+        print_report(summary, regressions)
+    
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'records_per_sec': summary['records_per_sec'],
+                'field_hit_rate': summary['field_hit_rate']
+            }, f, indent=2)
+        print(f"✓ Baseline saved to {baseline_path}")
+    
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Persistent Chrome disk cache.
+
+Points Chrome's HTTP cache at a directory that survives between runs (the
+workflow restores and saves it), caps its size and evicts least recently used
+entries before launch. Cache hits and misses are taken from the network page
+stats to print a summary at the end of each run.
+"""
+import os
+import shutil
+
+DEFAULT_CACHE_MB = 200
+# Evict down to this share of the cap so we do not evict on every run
+EVICT_TARGET = 0.8
+
+
+class BrowserCache:
+    def __init__(self, directory, max_mb=DEFAULT_CACHE_MB):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.start_bytes = 0
+        self.evicted_bytes = 0
+        self.evicted_files = 0
+    
+    @classmethod
+    def from_env(cls):
+        """Cache configured by DPDC_BROWSER_CACHE_DIR / DPDC_BROWSER_CACHE_MB, or None if disabled"""
+        directory = os.environ.get('DPDC_BROWSER_CACHE_DIR')
+        if not directory:
+            return None
+        return cls(directory, float(os.environ.get('DPDC_BROWSER_CACHE_MB', DEFAULT_CACHE_MB)))
+    
+    def _files(self):
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+        return files
+    
+    def size(self):
+        return sum(size for _, size, _ in self._files())
+    
+    def prepare(self):
+        """Create the directory and evict LRU entries if it is over the cap"""
+        os.makedirs(self.directory, exist_ok=True)
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICT_TARGET
+            for _, size, path in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                self.evicted_bytes += size
+                self.evicted_files += 1
+            # Chrome rebuilds its index when entries disappear; a stale index is worse
+            # than none, so drop it whenever we evicted anything
+            if self.evicted_files:
+                for index_name in ('index', 'index-dir'):
+                    index_path = os.path.join(self.directory, 'Cache_Data', index_name)
+                    if os.path.isdir(index_path):
+                        shutil.rmtree(index_path, ignore_errors=True)
+                    elif os.path.exists(index_path):
+                        os.remove(index_path)
+        
+        self.start_bytes = total
+        state = 'warm' if total else 'cold'
+        print(f"   ✓ Browser cache {state}: {total / 1024 / 1024:.1f} MB in {self.directory}"
+              + (f" (evicted {self.evicted_files} file(s))" if self.evicted_files else ""))
+    
+    def chrome_arguments(self):
+        return [
+            f'--disk-cache-dir={self.directory}',
+            f'--disk-cache-size={self.max_bytes}',
+        ]
+    
+    def summary(self, pages):
+        """Hit/miss totals from NetworkProfile page stats"""
+        hits = sum(p.get('cacheHits', 0) for p in pages.values())
+        misses = sum(p.get('cacheMisses', 0) for p in pages.values())
+        ratio = hits / (hits + misses) if hits + misses else 0.0
+        end_bytes = self.size()
+        print(f"💾 Browser cache: {hits} hit(s), {misses} miss(es) ({ratio:.0%} hit rate), "
+              f"{end_bytes / 1024 / 1024:.1f} MB on disk")
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(ratio, 3),
+            'start_bytes': self.start_bytes,
+            'end_bytes': end_bytes,
+            'evicted_bytes': self.evicted_bytes
+        }
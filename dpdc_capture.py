@@ -0,0 +1,84 @@
+"""
+Structured result capture from the portal's network responses.
+
+Chrome's performance log carries CDP Network events for the session. After the
+form is submitted we look for JSON responses, pull their bodies with
+Network.getResponseBody and map the account object straight into a record,
+with no rendering wait and no text heuristics. DOM extraction remains the
+fallback when no response matches.
+"""
+import json
+
+# Only bodies of JSON responses from these hosts are inspected
+CAPTURE_HOSTS = ('dpdc.org.bd',)
+
+
+def enable_performance_log(options):
+    """Turn on the Chrome performance log that carries CDP Network events"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+class ResponseCapture:
+    def __init__(self, driver, hosts=CAPTURE_HOSTS):
+        self.driver = driver
+        self.hosts = hosts
+        self.candidates = []
+        self.inspected = set()
+        self.matched_url = None
+        self.matched_body = None
+    
+    def reset(self):
+        """Drop everything logged so far (call right before the request of interest)"""
+        self.drain()
+        self.candidates = []
+        self.inspected = set()
+    
+    def drain(self):
+        """Move new JSON responses from the performance log into the candidate list"""
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            return
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError, TypeError):
+                continue
+            if message.get('method') == 'Network.loadingFinished':
+                request_id = message['params'].get('requestId')
+                for candidate in self.candidates:
+                    if candidate['requestId'] == request_id:
+                        candidate['finished'] = True
+                continue
+            if message.get('method') != 'Network.responseReceived':
+                continue
+            params = message.get('params', {})
+            response = params.get('response', {})
+            url = response.get('url', '')
+            if 'json' not in response.get('mimeType', '') or not any(h in url for h in self.hosts):
+                continue
+            self.candidates.append({
+                'requestId': params.get('requestId'),
+                'url': url,
+                'status': response.get('status'),
+                'finished': False
+            })
+    
+    def find_record(self, record_from_json):
+        """Newest finished JSON response that maps to a record, or None"""
+        self.drain()
+        for candidate in reversed(self.candidates):
+            if not candidate['finished'] or candidate['requestId'] in self.inspected:
+                continue
+            self.inspected.add(candidate['requestId'])
+            try:
+                body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': candidate['requestId']})
+                payload = json.loads(body.get('body', ''))
+            except Exception:
+                continue
+            data = record_from_json(payload)
+            if data:
+                self.matched_url = candidate['url']
+                self.matched_body = body.get('body', '')
+                return data
+        return None
@@ -0,0 +1,81 @@
+"""
+Stage checkpoints for the fetch → output pipeline.
+
+After each stage (fetched, extracted, normalized, committed) the run's state
+for a customer is written atomically to a small JSON file. The next invocation
+resumes from the last completed stage instead of repeating the browser flow.
+Checkpoints older than the TTL are discarded.
+"""
+from datetime import datetime
+import json
+import os
+import re
+import time
+
+STAGES = ('fetched', 'extracted', 'normalized', 'committed')
+DEFAULT_CHECKPOINT_DIR = 'checkpoints'
+DEFAULT_TTL_MINUTES = 360
+
+
+class CheckpointStore:
+    def __init__(self, directory=DEFAULT_CHECKPOINT_DIR, ttl_minutes=DEFAULT_TTL_MINUTES):
+        self.directory = directory
+        self.ttl_seconds = ttl_minutes * 60
+    
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.environ.get('DPDC_CHECKPOINT_DIR', DEFAULT_CHECKPOINT_DIR),
+            float(os.environ.get('DPDC_CHECKPOINT_TTL_MINUTES', DEFAULT_TTL_MINUTES))
+        )
+    
+    def _path(self, customer_number):
+        safe = re.sub(r'[^A-Za-z0-9_-]', '_', customer_number)
+        return os.path.join(self.directory, f'{safe}.json')
+    
+    def save(self, customer_number, stage, **state):
+        """Record that `stage` completed, merging state into the existing checkpoint"""
+        current = self._read(customer_number)
+        # A committed checkpoint belongs to a finished run; start a new one
+        if not current or current.get('stage') == 'committed':
+            current = {'customer': customer_number, 'created': time.time()}
+        current.update(state)
+        current['stage'] = stage
+        current['updated'] = time.time()
+        current['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(customer_number)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def _read(self, customer_number):
+        try:
+            with open(self._path(customer_number), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def load(self, customer_number):
+        """Resumable checkpoint (completed stage before 'committed'), or None"""
+        checkpoint = self._read(customer_number)
+        if not checkpoint or checkpoint.get('stage') not in STAGES:
+            return None
+        if checkpoint['stage'] == 'committed':
+            return None
+        age = time.time() - checkpoint.get('created', 0)
+        if age > self.ttl_seconds:
+            print(f"   → Discarding stale checkpoint ({age / 60:.0f} min old)")
+            self.clear(customer_number)
+            return None
+        return checkpoint
+    
+    def clear(self, customer_number):
+        try:
+            os.remove(self._path(customer_number))
+        except OSError:
+            pass
@@ -0,0 +1,97 @@
+"""
+WebDriver command accounting.
+
+Every WebDriver command (find_element, .text, send_keys, switch_to.frame,
+execute_script, CDP calls, ...) goes through driver.execute. CommandAccounting
+wraps that one method on a live driver and counts and times each command under
+the pipeline phase in progress, so a run can report where its round-trips go
+and a benchmark can fail when a phase exceeds its command budget.
+
+    DPDC_COMMAND_BUDGETS=input=40,verification=60,extraction=5
+"""
+import os
+import threading
+import time
+
+
+def parse_budgets(text):
+    """'input=40,extraction=5' → {'input': 40, 'extraction': 5}"""
+    budgets = {}
+    for item in (text or '').split(','):
+        if '=' not in item:
+            continue
+        phase, limit = item.split('=', 1)
+        budgets[phase.strip()] = int(limit)
+    return budgets
+
+
+class CommandAccounting:
+    def __init__(self, phase=None):
+        # Callable returning the current phase name (None outside any phase)
+        self.phase = phase or (lambda: None)
+        self.lock = threading.Lock()
+        self.reset()
+
+    @classmethod
+    def budgets_from_env(cls):
+        return parse_budgets(os.environ.get('DPDC_COMMAND_BUDGETS', ''))
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+
+    def attach(self, driver):
+        """Route the driver's commands through the counter; returns the driver"""
+        original = driver.execute
+
+        def execute(driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return original(driver_command, params)
+            finally:
+                self.record(driver_command, time.perf_counter() - start)
+
+        driver.execute = execute
+        return driver
+
+    def record(self, command, seconds):
+        phase = self.phase() or 'other'
+        with self.lock:
+            commands = self.stats.setdefault(phase, {})
+            entry = commands.setdefault(command, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def report(self):
+        """{phase: {'commands', 'seconds', 'by_command': {command: count}}} in first-seen order"""
+        with self.lock:
+            return {
+                phase: {
+                    'commands': sum(count for count, _ in commands.values()),
+                    'seconds': round(sum(seconds for _, seconds in commands.values()), 3),
+                    'by_command': dict(sorted(((c, n) for c, (n, _) in commands.items()), key=lambda x: -x[1])),
+                }
+                for phase, commands in self.stats.items()
+            }
+
+    def over_budget(self, budgets, report=None):
+        """[(phase, commands, budget)] for every phase above its budget"""
+        report = report or self.report()
+        return [
+            (phase, report[phase]['commands'], limit)
+            for phase, limit in budgets.items()
+            if phase in report and report[phase]['commands'] > limit
+        ]
+
+    def print_report(self, budgets=None, report=None):
+        report = report or self.report()
+        if not report:
+            return
+        budgets = budgets or {}
+        total = sum(p['commands'] for p in report.values())
+        print(f"🧮 WebDriver commands: {total}")
+        for phase, stats in report.items():
+            top = ', '.join(f'{command}×{count}' for command, count in list(stats['by_command'].items())[:3])
+            limit = budgets.get(phase)
+            flag = '' if limit is None else (f' (budget {limit} ✗)' if stats['commands'] > limit else f' (budget {limit})')
+            print(f"   {phase:<13}{stats['commands']:>5} cmds {stats['seconds']:>7.2f}s  {top}{flag}")
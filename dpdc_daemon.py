@@ -0,0 +1,224 @@
+"""
+Long-running daemon mode.
+
+Keeps one DPDCAutomation instance (Sheets client and Chrome) warm between runs,
+triggers runs from an internal schedule, recycles the browser after N runs, a
+failed health check or a run that went over the memory limit, and serves a small JSON status endpoint on localhost.
+
+    DPDC_SCHEDULE=09:00,21:00 python dpdc_daemon.py
+    DPDC_SCHEDULE=adaptive python dpdc_daemon.py    # follow next_run.json (dpdc_schedule.py)
+    curl http://127.0.0.1:8765/status
+"""
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import signal
+import sys
+import threading
+import traceback
+
+DEFAULT_SCHEDULE = '09:00,21:00'
+DEFAULT_RECYCLE_AFTER = 10
+DEFAULT_STATUS_PORT = 8765
+
+
+def parse_schedule(text):
+    """'09:00,21:00' → sorted [(9, 0), (21, 0)]"""
+    times = []
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        hour, minute = item.split(':')
+        times.append((int(hour), int(minute)))
+    if not times:
+        raise ValueError("Empty schedule")
+    return sorted(times)
+
+
+def next_run_time(now, schedule=None, interval_minutes=None, last_run=None):
+    """Next time a run is due, from fixed times of day or a fixed interval"""
+    if interval_minutes:
+        if last_run is None:
+            return now
+        return last_run + timedelta(minutes=interval_minutes)
+    for hour, minute in schedule:
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if candidate > now:
+            return candidate
+    hour, minute = schedule[0]
+    return (now + timedelta(days=1)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+class DPDCDaemon:
+    def __init__(self, automation_factory, schedule=None, interval_minutes=None,
+                 recycle_after=DEFAULT_RECYCLE_AFTER, status_port=DEFAULT_STATUS_PORT, adaptive=False):
+        self.automation_factory = automation_factory
+        self.schedule = schedule
+        self.adaptive = adaptive
+        self.interval_minutes = interval_minutes
+        self.recycle_after = recycle_after
+        self.status_port = status_port
+        self.automation = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.status = {
+            'state': 'starting',
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'runs': 0,
+            'failures': 0,
+            'recycles': 0,
+            'last_run': None,
+            'last_outcome': None,
+            'last_duration_seconds': None,
+            'next_run': None,
+            'browser_healthy': None,
+        }
+    
+    @classmethod
+    def from_env(cls, automation_factory):
+        interval = os.environ.get('DPDC_INTERVAL_MINUTES')
+        schedule = os.environ.get('DPDC_SCHEDULE', DEFAULT_SCHEDULE)
+        adaptive = schedule.strip() == 'adaptive'
+        return cls(
+            automation_factory,
+            schedule=parse_schedule(DEFAULT_SCHEDULE if adaptive else schedule),
+            adaptive=adaptive,
+            interval_minutes=float(interval) if interval else None,
+            recycle_after=int(os.environ.get('DPDC_RECYCLE_AFTER', DEFAULT_RECYCLE_AFTER)),
+            status_port=int(os.environ.get('DPDC_STATUS_PORT', DEFAULT_STATUS_PORT))
+        )
+    
+    def update_status(self, **changes):
+        with self.lock:
+            self.status.update(changes)
+    
+    def snapshot_status(self):
+        with self.lock:
+            return dict(self.status)
+    
+    # --- status endpoint ---
+    
+    def start_status_server(self):
+        daemon = self
+        
+        class StatusHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path in ('/', '/status'):
+                    code, body = 200, daemon.snapshot_status()
+                elif self.path == '/healthz':
+                    healthy = daemon.snapshot_status()['state'] != 'stopped'
+                    code, body = (200 if healthy else 503), {'ok': healthy}
+                else:
+                    code, body = 404, {'error': 'not found'}
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        server = ThreadingHTTPServer(('127.0.0.1', self.status_port), StatusHandler)
+        thread = threading.Thread(target=server.serve_forever, name='status-server', daemon=True)
+        thread.start()
+        print(f"📟 Status endpoint on http://127.0.0.1:{self.status_port}/status")
+        return server
+    
+    # --- browser lifecycle ---
+    
+    def browser_healthy(self):
+        try:
+            self.automation.driver.execute_script('return document.readyState')
+            return bool(self.automation.driver.window_handles)
+        except Exception:
+            return False
+    
+    def ensure_browser(self):
+        """Recycle Chrome when it fails the health check or has done recycle_after runs"""
+        healthy = self.browser_healthy()
+        self.update_status(browser_healthy=healthy)
+        worn_out = self.automation.browser_runs >= self.recycle_after
+        over_memory = self.automation.memory.over_limit()
+        if healthy and not worn_out and not over_memory:
+            return
+        if not healthy:
+            reason = 'health check failed'
+        elif over_memory:
+            reason = f'peak {self.automation.memory.peak_mb:.0f} MB over {self.automation.memory.limit_mb:.0f} MB limit'
+        else:
+            reason = f'{self.automation.browser_runs} runs'
+        print(f"♻ Recycling browser ({reason})")
+        self.automation.stop_browser()
+        self.automation.start_browser()
+        self.update_status(recycles=self.status['recycles'] + 1, browser_healthy=True)
+    
+    # --- scheduler loop ---
+    
+    def run_once(self):
+        self.ensure_browser()
+        self.update_status(state='running')
+        started = datetime.now()
+        try:
+            success = self.automation.run(keep_browser=True)
+        except Exception:
+            traceback.print_exc()
+            success = False
+        duration = (datetime.now() - started).total_seconds()
+        with self.lock:
+            self.status['runs'] += 1
+            self.status['failures'] += 0 if success else 1
+            self.status['last_run'] = started.isoformat(timespec='seconds')
+            self.status['last_outcome'] = 'success' if success else 'failure'
+            self.status['last_duration_seconds'] = round(duration, 1)
+        return success
+    
+    def next_due(self, now, last_run):
+        """From the adaptive schedule's decision when enabled (run now without one), else the fixed schedule"""
+        scheduler = self.adaptive and self.automation.poll_scheduler
+        if scheduler:
+            return scheduler.next_run() or now
+        return next_run_time(now, self.schedule, self.interval_minutes, last_run)
+    
+    def serve(self):
+        server = self.start_status_server()
+        try:
+            self.automation = self.automation_factory()
+            last_run = None
+            while not self.stop_event.is_set():
+                now = datetime.now()
+                due = self.next_due(now, last_run)
+                self.update_status(state='idle', next_run=due.isoformat(timespec='seconds'))
+                wait_seconds = (due - now).total_seconds()
+                if wait_seconds > 0:
+                    print(f"💤 Next run at {due:%Y-%m-%d %H:%M:%S}")
+                    if self.stop_event.wait(wait_seconds):
+                        break
+                last_run = datetime.now()
+                self.run_once()
+        finally:
+            self.update_status(state='stopped', next_run=None)
+            if self.automation:
+                self.automation.close()
+            server.shutdown()
+    
+    def stop(self, *_):
+        print("\n🛑 Stopping daemon...")
+        self.stop_event.set()
+
+
+def main():
+    from dpdc_automation import DPDCAutomation
+    
+    daemon = DPDCDaemon.from_env(DPDCAutomation)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.serve()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
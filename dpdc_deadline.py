@@ -0,0 +1,125 @@
+"""
+Whole-run deadline with per-phase time budgets.
+
+A run gets DPDC_RUN_DEADLINE_SECONDS in total (0 disables the deadline; unset,
+it is the sum of the phase budgets, so no phase is cut below its budget). Each
+phase has a budget (the longest it may take) and a minimum (below which it
+cannot succeed). When a phase begins it is allotted the smaller of its budget
+and the time left after reserving the minimums of every later phase, and the
+waits and delays inside it are clipped to what is left of that allotment. If
+the time left cannot cover the minimums of the rest of the pipeline, the phase
+raises RunTimeout instead of starting; the run then writes a timeout record
+(the outputs phase keeps its reserve for that).
+
+    DPDC_RUN_DEADLINE_SECONDS=180 DPDC_PHASE_BUDGETS=verification=45,result_wait=20 python dpdc_automation.py
+"""
+import os
+import time
+
+from dpdc_commands import parse_budgets
+
+# Phase → (budget, minimum) in seconds, in pipeline order
+PHASE_BUDGETS = {
+    'homepage': (30, 5),
+    'quick_pay': (30, 3),
+    'input': (35, 5),
+    'verification': (80, 5),
+    'submit': (10, 2),
+    'result_wait': (35, 5),
+    'extraction': (10, 1),
+    'outputs': (60, 10),
+}
+PIPELINE = tuple(PHASE_BUDGETS)
+# Enough for every phase to use its whole budget
+DEFAULT_RUN_DEADLINE_SECONDS = sum(budget for budget, _ in PHASE_BUDGETS.values())
+# Waits clipped by the deadline still get this long, so an element that is already there is found
+MIN_WAIT_SECONDS = 0.5
+
+
+class RunTimeout(Exception):
+    def __init__(self, phase, remaining, needed):
+        self.phase = phase
+        self.remaining = remaining
+        self.needed = needed
+        super().__init__(f"run deadline: {remaining:.1f}s left before '{phase}', "
+                         f"the rest of the pipeline needs {needed:.0f}s")
+
+
+class RunDeadline:
+    def __init__(self, total=DEFAULT_RUN_DEADLINE_SECONDS, budgets=None):
+        # None or 0: no deadline, every wait keeps its own timeout
+        self.total = total or None
+        self.budgets = {phase: budget for phase, (budget, _) in PHASE_BUDGETS.items()}
+        self.budgets.update(budgets or {})
+        self.minimums = {phase: minimum for phase, (_, minimum) in PHASE_BUDGETS.items()}
+        self.start()
+
+    @classmethod
+    def from_env(cls):
+        """Without DPDC_RUN_DEADLINE_SECONDS the total covers the (possibly overridden) budgets"""
+        deadline = cls(None, parse_budgets(os.environ.get('DPDC_PHASE_BUDGETS', '')))
+        total = os.environ.get('DPDC_RUN_DEADLINE_SECONDS')
+        deadline.total = (float(total) if total else sum(deadline.budgets.values())) or None
+        return deadline
+
+    def start(self):
+        """Start the clock for a new run"""
+        self.started = time.monotonic()
+        self.phase = None
+        self.phase_end = None
+        self.allotted = {}
+        self.timed_out = None
+
+    def remaining(self):
+        if self.total is None:
+            return float('inf')
+        return self.total - (time.monotonic() - self.started)
+
+    def needed_from(self, phase):
+        """Minimum seconds for phase and every phase after it"""
+        if phase not in PIPELINE:
+            return 0
+        return sum(self.minimums[p] for p in PIPELINE[PIPELINE.index(phase):])
+
+    def begin(self, phase):
+        """
+        Allot time to a phase from what is left of the run
+        Raises RunTimeout when the rest of the pipeline no longer fits (never for outputs,
+        which writes the result of the run, timeout or not)
+        """
+        self.phase = phase
+        if self.total is None:
+            self.phase_end = None
+            return
+        remaining = self.remaining()
+        needed = self.needed_from(phase)
+        if remaining < needed and phase != 'outputs':
+            self.timed_out = phase
+            raise RunTimeout(phase, max(remaining, 0), needed)
+        later = needed - self.minimums.get(phase, 0)
+        allotted = max(min(self.budgets.get(phase, remaining), remaining - later), 0)
+        self.allotted[phase] = round(allotted, 1)
+        self.phase_end = time.monotonic() + allotted
+
+    def phase_left(self):
+        if self.phase_end is None:
+            return float('inf')
+        return max(self.phase_end - time.monotonic(), 0)
+
+    def timeout(self, wanted):
+        """A wait's timeout, clipped to the phase's remaining allotment"""
+        return max(min(wanted, self.phase_left()), MIN_WAIT_SECONDS)
+
+    def clip(self, seconds):
+        """A fixed sleep, clipped to the phase's remaining allotment"""
+        return min(seconds, self.phase_left())
+
+    def report(self):
+        if self.total is None:
+            return None
+        return {
+            'total_seconds': self.total,
+            'elapsed_seconds': round(time.monotonic() - self.started, 1),
+            'allotted': self.allotted,
+            'timed_out': self.timed_out,
+        }
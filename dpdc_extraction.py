@@ -0,0 +1,315 @@
+"""
+Browser-independent extraction logic for the DPDC quick-pay result page.
+
+Everything here works on plain strings so the same rules can run against a live
+page (via PAGE_PAYLOAD_JS) or against saved final_page.html / final_page_text.txt
+captures without a browser.
+"""
+from functools import lru_cache
+from html.parser import HTMLParser
+import re
+
+
+# Collects everything extract_data_from_page needs in a single WebDriver round-trip.
+# The XPath matches the one used by the element-by-element path so the pairs are identical.
+PAGE_PAYLOAD_JS = """
+    var snapshot = document.evaluate("//*[contains(text(), ':')]", document, null,
+                                     XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var pairs = [];
+    for (var i = 0; i < snapshot.snapshotLength; i++) {
+        var node = snapshot.snapshotItem(i);
+        pairs.push(node.innerText !== undefined ? node.innerText : node.textContent);
+    }
+    return {
+        pairs: pairs,
+        bodyText: document.body ? document.body.innerText : '',
+        pageSource: document.documentElement.outerHTML
+    };
+"""
+
+
+# Record fields in sheet column order (the sheet has a timestamp column first)
+RECORD_FIELDS = [
+    'accountId',
+    'customerName',
+    'customerClass',
+    'mobileNumber',
+    'emailId',
+    'accountType',
+    'balanceRemaining',
+    'connectionStatus',
+    'customerType',
+    'minRecharge'
+]
+
+
+def empty_record():
+    """Blank record with every field the sheet expects"""
+    return {field: '' for field in RECORD_FIELDS}
+
+
+# Label → field rules, in precedence order. Each label is a lower-case regex searched
+# in the lower-cased text before the first ':' of a line; when several match, the
+# leftmost wins, ties go to the earlier rule. Bangla labels sit next to English ones.
+FIELD_LABELS = [
+    ('minRecharge', [r'min(?:imum)?\.?\s*(?:recharge|amount|top-?up)', r'ন্যূনতম\s*রিচার্জ', r'সর্বনিম্ন\s*রিচার্জ']),
+    ('accountId', [r'(?:account|customer|consumer)\s*(?:id|no\.?|number)', r'হিসাব\s*নম্বর', r'গ্রাহক\s*নম্বর',
+                   r'অ্যাকাউন্ট\s*নম্বর', r'কাস্টমার\s*নম্বর']),
+    ('customerType', [r'(?:customer|consumer)\s*type', r'গ্রাহকের\s*ধরন']),
+    ('accountType', [r'(?:account|meter|payment)\s*type', r'type', r'হিসাবের\s*ধরন', r'মিটারের\s*ধরন',
+                     r'অ্যাকাউন্টের\s*ধরন']),
+    ('customerClass', [r'class', r'tariff', r'শ্রেণ[ীি]', r'ট্যারিফ']),
+    ('customerName', [r'name', r'নাম']),
+    ('balanceRemaining', [r'balance', r'ব্যালেন্স', r'অবশিষ্ট']),
+    ('mobileNumber', [r'mobile', r'phone', r'মোবাইল', r'ফোন']),
+    ('emailId', [r'e-?mail', r'ই-?মেইল']),
+    ('connectionStatus', [r'status', r'সংযোগের\s*অবস্থা', r'অবস্থা', r'স্ট্যাটাস']),
+]
+
+# Whole-text fallbacks for fields no label produced: (prefix, value) patterns in
+# priority order per field, matched against the lower-cased page text. Prefixes
+# start with a literal so the combined pattern keeps re's first-character scan.
+AMOUNT_VALUE = r'[0-9০-৯][0-9০-৯,.]*'
+PHONE_VALUE = r'[\d০-৯+][\d০-৯\-+]*'
+FIELD_FALLBACKS = [
+    ('balanceRemaining', [(r'balance[:\s]+', AMOUNT_VALUE), (r'remaining[:\s]+', AMOUNT_VALUE),
+                          (r'due[:\s]+', AMOUNT_VALUE), (r'tk[:\s]+', AMOUNT_VALUE), (r'৳[:\s]*', AMOUNT_VALUE),
+                          (r'ব্যালেন্স[:\s]+', AMOUNT_VALUE)]),
+    ('mobileNumber', [(r'mobile[:\s]+', PHONE_VALUE), (r'phone[:\s]+', PHONE_VALUE), (r'মোবাইল[:\s]+', PHONE_VALUE)]),
+]
+
+
+def _compile_labels(rules):
+    """One alternation with a named group per rule; returns (regex, {group: field})"""
+    alternatives, fields = [], {}
+    for i, (field, patterns) in enumerate(rules):
+        group = f'f{i}'
+        fields[group] = field
+        alternatives.append(f"(?P<{group}>{'|'.join(patterns)})")
+    return re.compile('|'.join(alternatives)), fields
+
+
+def _compile_fallbacks(rules):
+    """One alternation over every fallback; returns (regex, {group: (field, priority)})"""
+    alternatives, groups = [], {}
+    for field, patterns in rules:
+        for priority, (prefix, value) in enumerate(patterns):
+            group = f'g{len(groups)}'
+            groups[group] = (field, priority)
+            alternatives.append(f'{prefix}(?P<{group}>{value})')
+    return re.compile('|'.join(alternatives)), groups
+
+
+LABEL_RE, LABEL_FIELDS = _compile_labels(FIELD_LABELS)
+FALLBACK_RE, FALLBACK_GROUPS = _compile_fallbacks(FIELD_FALLBACKS)
+
+
+@lru_cache(maxsize=4096)
+def classify_label(label):
+    """Field a label maps to, or None (pages repeat the same labels, so results are cached)"""
+    match = LABEL_RE.search(label.strip().lower())
+    return LABEL_FIELDS[match.lastgroup] if match else None
+
+
+def labelled_values(text):
+    """(field, value) for every "label: value" line of text whose label maps to a field"""
+    for line in text.split('\n'):
+        if ':' not in line:
+            continue
+        label, _, value = line.partition(':')
+        value = value.strip()
+        if value:
+            field = classify_label(label)
+            if field:
+                yield field, value
+
+
+def parse_page_payload(pairs, page_text):
+    """
+    Map element texts and page text to record fields
+    Element texts are the most specific source (the innermost element's text wins),
+    then page text lines fill what is still empty, then the whole-text fallbacks
+    """
+    data = empty_record()
+    
+    for text in pairs:
+        if text and ':' in text:
+            for field, value in labelled_values(text):
+                data[field] = value
+    
+    for field, value in labelled_values(page_text):
+        if not data[field]:
+            data[field] = value
+    
+    missing = {field for field, _ in FIELD_FALLBACKS if not data[field]}
+    if missing:
+        best = {}
+        # Lower-casing leaves the captured digits untouched
+        for match in FALLBACK_RE.finditer(page_text.lower()):
+            field, priority = FALLBACK_GROUPS[match.lastgroup]
+            if field in missing and (field not in best or priority < best[field][0]):
+                best[field] = (priority, match.group(match.lastgroup))
+        for field, (_, value) in best.items():
+            data[field] = value
+    
+    return data
+
+
+# Elements whose rendered text is separated from its neighbours by a line break
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4',
+    'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section',
+    'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'ul'
+}
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr'
+}
+HIDDEN_TAGS = {'head', 'script', 'style', 'noscript', 'template', 'title'}
+
+
+class _Node:
+    __slots__ = ('tag', 'children', 'hidden')
+
+    def __init__(self, tag, hidden=False):
+        self.tag = tag
+        self.children = []
+        self.hidden = hidden
+
+    def first_text(self):
+        for child in self.children:
+            if isinstance(child, str):
+                return child
+        return None
+
+    def inner_text(self):
+        parts = []
+        self._collect_text(parts)
+        text = ''.join(parts)
+        lines = [re.sub(r'[ \t\r\f\v]+', ' ', line).strip() for line in text.split('\n')]
+        return '\n'.join(line for line in lines if line)
+
+    def _collect_text(self, parts):
+        if self.hidden:
+            return
+        if self.tag in BLOCK_TAGS:
+            parts.append('\n')
+        for child in self.children:
+            if isinstance(child, str):
+                parts.append(child)
+            else:
+                child._collect_text(parts)
+        if self.tag in BLOCK_TAGS:
+            parts.append('\n')
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node('#document')
+        self.stack = [self.root]
+        self.elements = []
+
+    def handle_starttag(self, tag, attrs):
+        parent = self.stack[-1]
+        node = _Node(tag, hidden=parent.hidden or tag in HIDDEN_TAGS)
+        parent.children.append(node)
+        self.elements.append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        parent = self.stack[-1]
+        node = _Node(tag, hidden=parent.hidden or tag in HIDDEN_TAGS)
+        parent.children.append(node)
+        self.elements.append(node)
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                break
+
+    def handle_data(self, data):
+        self.stack[-1].children.append(data)
+
+
+def pairs_from_html(page_source):
+    """
+    Rebuild the element texts PAGE_PAYLOAD_JS would return from saved HTML
+    Mirrors //*[contains(text(), ':')] (first text node) and approximates innerText
+    """
+    builder = _TreeBuilder()
+    builder.feed(page_source)
+    builder.close()
+    
+    pairs = []
+    for node in builder.elements:
+        if node.hidden:
+            continue
+        first = node.first_text()
+        if first is not None and ':' in first:
+            pairs.append(node.inner_text())
+    return pairs
+
+
+def text_from_html(page_source):
+    """Approximate document.body.innerText for captures without a saved text file"""
+    builder = _TreeBuilder()
+    builder.feed(page_source)
+    builder.close()
+    return builder.root.inner_text()
+
+
+# JSON keys (compared lower-case with separators removed) that carry each field
+JSON_FIELD_KEYS = {
+    'accountId': ['accountid', 'accountno', 'accountnumber', 'customerno', 'customernumber', 'customerid', 'consumerno'],
+    'customerName': ['customername', 'consumername', 'name', 'fullname'],
+    'customerClass': ['customerclass', 'tariffclass', 'tariff', 'class'],
+    'mobileNumber': ['mobilenumber', 'mobileno', 'mobile', 'phone', 'phonenumber', 'contactno'],
+    'emailId': ['emailid', 'email', 'emailaddress'],
+    'accountType': ['accounttype', 'metertype', 'paymenttype'],
+    'balanceRemaining': ['balanceremaining', 'remainingbalance', 'currentbalance', 'balance', 'availablebalance'],
+    'connectionStatus': ['connectionstatus', 'status', 'meterstatus'],
+    'customerType': ['customertype', 'consumertype'],
+    'minRecharge': ['minrecharge', 'minimumrecharge', 'minrechargeamount', 'minimumrechargeamount'],
+}
+_JSON_KEY_LOOKUP = {key: field for field, keys in JSON_FIELD_KEYS.items() for key in keys}
+# A JSON object must carry at least this many fields to count as the account record
+MIN_JSON_FIELDS = 3
+
+
+def _normalize_json_key(key):
+    return re.sub(r'[^a-z0-9]', '', str(key).lower())
+
+
+def record_from_json(payload):
+    """
+    Find the object in a decoded JSON response that looks most like the account
+    record and map it to record fields; None if nothing qualifies
+    """
+    best, best_score = None, 0
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+        
+        data = empty_record()
+        score = 0
+        for key, value in node.items():
+            if isinstance(value, (dict, list)):
+                stack.append(value)
+                continue
+            field = _JSON_KEY_LOOKUP.get(_normalize_json_key(key))
+            if field and value not in (None, '') and not data[field]:
+                data[field] = str(value).strip()
+                score += 1
+        if score > best_score:
+            best, best_score = data, score
+    
+    return best if best_score >= MIN_JSON_FIELDS else None
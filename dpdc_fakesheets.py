@@ -0,0 +1,460 @@
+"""
+In-process stand-in for the Google Sheets API.
+
+FakeSheetsClient answers the gspread calls this project makes (open_by_key,
+sheet1, worksheets, add_worksheet, append_rows, update_acell, update, get,
+get_all_values, batch_update, add_rows, clear) from memory. It adds per-call
+latency, random failures and a per-window request quota that raises like the
+real 429, and counts every call. Set DPDC_SHEETS_BACKEND=fake to use it instead
+of the real API (DPDC_FAKE_SHEETS_PATH keeps the sheets in a JSON file across
+runs).
+
+    python dpdc_fakesheets.py bench --records 200 --quota 30 --window 5
+"""
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from datetime import datetime, timedelta
+import argparse
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+
+DEFAULT_QUOTA_WINDOW = 60
+A1_RE = re.compile(r'^([A-Z]+)?(\d+)?$')
+BENCH_MODES = ('naive', 'pipeline', 'batched')
+
+
+class FakeQuotaError(Exception):
+    """Raised like gspread's APIError for HTTP 429"""
+
+    def __init__(self, method):
+        super().__init__(f"APIError: [429]: Quota exceeded for quota metric 'Requests per minute' ({method})")
+        self.code = 429
+
+
+class FakeAPIError(Exception):
+    def __init__(self, method):
+        super().__init__(f"APIError: [503]: The service is currently unavailable ({method})")
+        self.code = 503
+
+
+def column_index(letters):
+    """'A' → 1, 'AA' → 27"""
+    index = 0
+    for char in letters:
+        index = index * 26 + ord(char) - ord('A') + 1
+    return index
+
+
+def column_letters(index):
+    """1 → 'A', 27 → 'AA'"""
+    letters = ''
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def parse_range(range_name):
+    """'Sheet1'!B2:D5 / A1 / A:B → (first row, first col, last row, last col); None for open ends"""
+    range_name = range_name.split('!')[-1].replace('$', '')
+    start, _, end = range_name.partition(':')
+    bounds = []
+    for ref in (start, end or start):
+        match = A1_RE.match(ref.upper())
+        if not match:
+            raise ValueError(f"Bad A1 reference: {range_name}")
+        col, row = match.groups()
+        bounds.append((int(row) if row else None, column_index(col) if col else None))
+    (r1, c1), (r2, c2) = bounds
+    return r1 or 1, c1 or 1, r2, c2
+
+
+class FakeBackend:
+    """Latency, failures, quota and call counters shared by every fake object of one client"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, quota=None, window=DEFAULT_QUOTA_WINDOW,
+                 seed=0, path=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota = quota
+        self.window = window
+        self.random = random.Random(seed)
+        self.path = path
+        self.lock = threading.RLock()
+        self.calls = {}
+        self.quota_errors = 0
+        self.errors = 0
+        self.request_times = []
+        self.spreadsheets = {}
+
+    @classmethod
+    def from_env(cls):
+        quota = os.environ.get('DPDC_FAKE_SHEETS_QUOTA')
+        backend = cls(
+            latency=float(os.environ.get('DPDC_FAKE_SHEETS_LATENCY', '0')),
+            error_rate=float(os.environ.get('DPDC_FAKE_SHEETS_ERROR_RATE', '0')),
+            quota=int(quota) if quota else None,
+            window=float(os.environ.get('DPDC_FAKE_SHEETS_WINDOW', DEFAULT_QUOTA_WINDOW)),
+            path=os.environ.get('DPDC_FAKE_SHEETS_PATH')
+        )
+        backend.load()
+        return backend
+
+    def call(self, method):
+        """Account for one API request: latency, quota, injected failure"""
+        with self.lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+            now = time.monotonic()
+            if self.quota is not None:
+                self.request_times = [t for t in self.request_times if now - t < self.window]
+                if len(self.request_times) >= self.quota:
+                    self.quota_errors += 1
+                    raise FakeQuotaError(method)
+                self.request_times.append(now)
+            fail = self.error_rate and self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise FakeAPIError(method)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'calls': dict(self.calls),
+                'total_calls': sum(self.calls.values()),
+                'quota_errors': self.quota_errors,
+                'errors': self.errors,
+            }
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for key, sheets in json.load(f).items():
+                spreadsheet = FakeSpreadsheet(self, key)
+                for title, rows in sheets.items():
+                    spreadsheet.add(title, rows)
+                self.spreadsheets[key] = spreadsheet
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            data = {key: {ws.title: ws.rows for ws in sheet.sheets} for key, sheet in self.spreadsheets.items()}
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title, rows=None, row_count=1000, col_count=26):
+        self.spreadsheet = spreadsheet
+        self.backend = spreadsheet.backend
+        self.title = title
+        self.rows = [list(row) for row in rows or []]
+        self.row_count = max(row_count, len(self.rows))
+        self.col_count = col_count
+
+    def _write(self, row, col, values):
+        for r, row_values in enumerate(values):
+            index = row - 1 + r
+            while len(self.rows) <= index:
+                self.rows.append([])
+            target = self.rows[index]
+            for c, value in enumerate(row_values):
+                while len(target) < col - 1 + c + 1:
+                    target.append('')
+                target[col - 1 + c] = value
+        self.row_count = max(self.row_count, len(self.rows))
+
+    def _read(self, range_name):
+        r1, c1, r2, c2 = parse_range(range_name)
+        rows = self.rows[r1 - 1:r2]
+        values = [row[c1 - 1:c2] for row in rows]
+        # Like the API: trailing empty cells and rows are not returned
+        values = [list(row) for row in values]
+        for row in values:
+            while row and row[-1] == '':
+                row.pop()
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def _last_row(self):
+        for index in range(len(self.rows), 0, -1):
+            if any(cell != '' for cell in self.rows[index - 1]):
+                return index
+        return 0
+
+    def _append(self, values):
+        with self.backend.lock:
+            first = self._last_row() + 1
+            self._write(first, 1, values)
+            width = max((len(row) for row in values), default=1)
+            updated = f"'{self.title}'!A{first}:{column_letters(width)}{first + len(values) - 1}"
+        self.backend.save()
+        return {'updates': {'updatedRange': updated, 'updatedRows': len(values)}}
+
+    def append_rows(self, values, value_input_option='RAW', **kwargs):
+        self.backend.call('append_rows')
+        return self._append(values)
+
+    def append_row(self, values, value_input_option='RAW', **kwargs):
+        self.backend.call('append_row')
+        return self._append([values])
+
+    def update_acell(self, label, value):
+        self.backend.call('update_acell')
+        r1, c1, _, _ = parse_range(label)
+        with self.backend.lock:
+            self._write(r1, c1, [[value]])
+        self.backend.save()
+
+    def update(self, range_name=None, values=None, **kwargs):
+        # gspread 5 takes (range_name, values), gspread 6 (values, range_name)
+        if isinstance(range_name, list):
+            range_name, values = values, range_name
+        self.backend.call('update')
+        r1, c1, _, _ = parse_range(range_name or 'A1')
+        with self.backend.lock:
+            self._write(r1, c1, values)
+        self.backend.save()
+
+    def batch_update(self, data, **kwargs):
+        self.backend.call('batch_update')
+        with self.backend.lock:
+            for item in data:
+                r1, c1, _, _ = parse_range(item['range'])
+                self._write(r1, c1, item['values'])
+        self.backend.save()
+
+    def get(self, range_name=None, **kwargs):
+        self.backend.call('get')
+        with self.backend.lock:
+            return self._read(range_name or 'A1:ZZZ')
+
+    def get_all_values(self, **kwargs):
+        self.backend.call('get_all_values')
+        with self.backend.lock:
+            return [list(row) for row in self._read('A1:ZZZ')]
+
+    def row_values(self, row, **kwargs):
+        self.backend.call('row_values')
+        with self.backend.lock:
+            values = self._read(f'A{row}:ZZZ{row}')
+        return values[0] if values else []
+
+    def add_rows(self, rows):
+        self.backend.call('add_rows')
+        self.row_count += rows
+
+    def clear(self):
+        self.backend.call('clear')
+        with self.backend.lock:
+            self.rows = []
+        self.backend.save()
+
+
+class FakeSpreadsheet:
+    def __init__(self, backend, key):
+        self.backend = backend
+        self.id = key
+        self.sheets = []
+
+    def add(self, title, rows=None, row_count=1000, col_count=26):
+        worksheet = FakeWorksheet(self, title, rows, row_count, col_count)
+        self.sheets.append(worksheet)
+        return worksheet
+
+    @property
+    def sheet1(self):
+        # gspread returns the cached first worksheet without a request
+        return self.sheets[0]
+
+    def worksheets(self):
+        self.backend.call('worksheets')
+        return list(self.sheets)
+
+    def worksheet(self, title):
+        self.backend.call('worksheet')
+        for worksheet in self.sheets:
+            if worksheet.title == title:
+                return worksheet
+        raise LookupError(f"WorksheetNotFound: {title}")
+
+    def add_worksheet(self, title, rows=1000, cols=26, **kwargs):
+        self.backend.call('add_worksheet')
+        with self.backend.lock:
+            worksheet = self.add(title, row_count=rows, col_count=cols)
+        self.backend.save()
+        return worksheet
+
+
+class FakeSheetsClient:
+    """Drop-in for the gspread client returned by authorize_gspread"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or FakeBackend()
+
+    def open_by_key(self, key):
+        self.backend.call('open_by_key')
+        with self.backend.lock:
+            if key not in self.backend.spreadsheets:
+                spreadsheet = FakeSpreadsheet(self.backend, key)
+                spreadsheet.add('Sheet1')
+                self.backend.spreadsheets[key] = spreadsheet
+            return self.backend.spreadsheets[key]
+
+
+def _bench_readings(count, account_id='12345678'):
+    """(timestamp, Reading) pairs 12 hours apart with a falling balance"""
+    from dpdc_record import Reading
+
+    start = datetime(2024, 1, 1, 9)
+    balance = 1500.0
+    for i in range(count):
+        balance -= 6.5 + (i % 5)
+        if balance < 150:
+            balance += 1000
+        timestamp = (start + timedelta(hours=12 * i)).strftime('%Y-%m-%d %H:%M:%S')
+        yield timestamp, Reading.from_fields({
+            'accountId': account_id, 'customerName': 'Bench Customer',
+            'balanceRemaining': f'{balance:.2f}', 'minRecharge': '100'
+        })
+
+
+@contextmanager
+def patched_environ(values):
+    """Set environment variables for the duration of a block, then restore the previous ones"""
+    saved = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def bench(mode, records, batch, backend, workdir):
+    """Push records through one write path; returns throughput and API call counts"""
+    from dpdc_rollup import Rollup
+    from dpdc_spool import RecordSpool
+
+    client = FakeSheetsClient(backend)
+    spreadsheet_id = 'bench'
+    start = time.perf_counter()
+    failures = 0
+
+    if mode == 'naive':
+        worksheet = client.open_by_key(spreadsheet_id).sheet1
+        for timestamp, reading in _bench_readings(records):
+            try:
+                worksheet.append_row(reading.to_row(timestamp))
+            except (FakeQuotaError, FakeAPIError):
+                failures += 1
+        landed = len(worksheet.rows)
+    elif mode == 'pipeline':
+        from dpdc_automation import DPDCAutomation
+
+        environ = patched_environ({
+            'DPDC_SHEETS_BACKEND': 'fake',
+            'DPDC_SPOOL_PATH': os.path.join(workdir, 'spool.sqlite3'),
+            'DPDC_STORE_PATH': os.path.join(workdir, 'store.sqlite3'),
+            'DPDC_METRICS_PATH': os.path.join(workdir, 'metrics.jsonl'),
+        })
+        # The pipeline narrates every write; keep the benchmark output to the table
+        with environ, redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            automation = DPDCAutomation(launch_browser=False, connect_sheets=False)
+            automation.gc = client
+            start = time.perf_counter()
+            for timestamp, reading in _bench_readings(records):
+                if not automation.update_google_sheet(spreadsheet_id, reading, timestamp):
+                    failures += 1
+        landed = len(backend.spreadsheets[spreadsheet_id].sheet1.rows)
+    else:
+        spool = RecordSpool(os.path.join(workdir, 'spool.sqlite3'))
+        rollup = Rollup(spool.path)
+        spreadsheet = client.open_by_key(spreadsheet_id)
+        for i, (timestamp, reading) in enumerate(_bench_readings(records), start=1):
+            spool.append(reading.to_row(timestamp))
+            rollup.apply(timestamp, reading)
+            if i % batch and i != records:
+                continue
+            try:
+                spool.flush(spreadsheet.sheet1)
+                rollup.push(spreadsheet)
+            except (FakeQuotaError, FakeAPIError):
+                failures += 1
+        landed = len(spreadsheet.sheet1.rows)
+
+    seconds = time.perf_counter() - start
+    stats = backend.stats()
+    calls = stats['total_calls']
+    return {
+        'mode': mode,
+        'batch': batch if mode == 'batched' else 1,
+        'records': records,
+        'rows_landed': landed,
+        # Left in the local spool for the next run
+        'rows_pending': records - landed,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(landed / seconds, 1) if seconds else None,
+        'api_calls': calls,
+        'calls_per_record': round(calls / records, 2),
+        'quota_errors': stats['quota_errors'],
+        'failed_writes': failures,
+        'calls': stats['calls'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Sheets backend and write-path benchmark")
+    sub = parser.add_subparsers(dest='command', required=True)
+    bench_ = sub.add_parser('bench', help="Rows/sec and API calls per record for each write path")
+    bench_.add_argument('--records', type=int, default=100)
+    bench_.add_argument('--modes', default=','.join(BENCH_MODES))
+    bench_.add_argument('--batch', type=int, default=10, help="Records per flush in batched mode")
+    bench_.add_argument('--latency', type=float, default=0.05, help="Seconds per API call")
+    bench_.add_argument('--jitter', type=float, default=0.0)
+    bench_.add_argument('--error-rate', type=float, default=0.0)
+    bench_.add_argument('--quota', type=int, help="Requests allowed per window")
+    bench_.add_argument('--window', type=float, default=DEFAULT_QUOTA_WINDOW, help="Quota window in seconds")
+    bench_.add_argument('--seed', type=int, default=0)
+    bench_.add_argument('--output', help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+        if mode not in BENCH_MODES:
+            print(f"✗ Unknown mode '{mode}'")
+            return 1
+        backend = FakeBackend(args.latency, args.jitter, args.error_rate, args.quota, args.window, args.seed)
+        with tempfile.TemporaryDirectory() as workdir:
+            results.append(bench(mode, args.records, args.batch, backend, workdir))
+
+    print(f"\n{'mode':<10}{'batch':>6}{'rows':>7}{'pending':>9}{'rows/s':>9}{'calls/rec':>11}{'429s':>6}{'failed':>8}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['batch']:>6}{r['rows_landed']:>7}{r['rows_pending']:>9}{r['rows_per_second']:>9}"
+              f"{r['calls_per_record']:>11}{r['quota_errors']:>6}{r['failed_writes']:>8}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
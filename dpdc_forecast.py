@@ -0,0 +1,281 @@
+"""
+Consumption and depletion forecast.
+
+From the balance history of an account we derive a daily consumption rate
+(balance decrease per day between consecutive readings), treat positive jumps
+as recharges, and project when the balance will fall below the minimum
+recharge, with confidence bounds.
+
+The rate is an exponentially time-decayed, duration-weighted mean, so it is
+kept as a handful of running sums per account: the first forecast for an
+account is computed over its whole history with NumPy, every later reading
+folds into the saved sums in O(1).
+
+    python dpdc_forecast.py show [--account ID]    # recompute from the full history
+"""
+from datetime import datetime, timedelta
+from statistics import NormalDist
+import argparse
+import json
+import math
+import os
+import sqlite3
+import sys
+
+from dpdc_store import DEFAULT_STORE_PATH
+
+DEFAULT_HALFLIFE_DAYS = 14
+DEFAULT_CONFIDENCE = 0.9
+# Balance increases smaller than this are rounding noise, not recharges
+RECHARGE_MIN = 1.0
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def to_days(timestamp):
+    return datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp() / 86400
+
+
+def from_days(days):
+    return datetime.fromtimestamp(days * 86400)
+
+
+class Forecast:
+    """Projection for one reading; the JSON form is written next to the record"""
+
+    def __init__(self, as_of, daily_usage=None, days_left=None, depletion=None, earliest=None, latest=None,
+                 segments=0, recharges=0, last_recharge=None):
+        self.as_of = as_of
+        self.daily_usage = daily_usage
+        self.days_left = days_left
+        self.depletion = depletion
+        self.earliest = earliest
+        self.latest = latest
+        self.segments = segments
+        self.recharges = recharges
+        self.last_recharge = last_recharge
+
+    def to_dict(self):
+        date = lambda value: value.strftime('%Y-%m-%d') if value else ''
+        rounded = lambda value, digits: '' if value is None else round(value, digits)
+        return {
+            'dailyUsage': rounded(self.daily_usage, 2),
+            'daysLeft': rounded(self.days_left, 1),
+            'depletionDate': date(self.depletion),
+            'depletionEarliest': date(self.earliest),
+            'depletionLatest': date(self.latest),
+            'usageSegments': self.segments,
+            'recharges': self.recharges,
+            'lastRecharge': self.last_recharge or '',
+        }
+
+    def to_cells(self):
+        """Sheet cells after the "last seen" column: days left, date, earliest, latest, daily usage"""
+        data = self.to_dict()
+        return [data['daysLeft'], data['depletionDate'], data['depletionEarliest'],
+                data['depletionLatest'], data['dailyUsage']]
+
+    def __repr__(self):
+        if self.depletion is None:
+            return f'Forecast(usage={self.daily_usage}, no depletion date)'
+        return (f'Forecast(usage={self.daily_usage:.2f}/day, depletes {self.depletion:%Y-%m-%d} '
+                f'[{self.earliest and f"{self.earliest:%Y-%m-%d}"} .. {self.latest and f"{self.latest:%Y-%m-%d}"}])')
+
+
+class ForecastState:
+    """Running sums of the decayed rate estimate for one account"""
+
+    FIELDS = ('last_day', 'last_balance', 'w', 'w2', 'wr', 'wr2', 'segments', 'recharges', 'last_recharge')
+
+    def __init__(self, last_day, last_balance, w=0.0, w2=0.0, wr=0.0, wr2=0.0, segments=0, recharges=0,
+                 last_recharge=None):
+        self.last_day = last_day
+        self.last_balance = last_balance
+        self.w = w
+        self.w2 = w2
+        self.wr = wr
+        self.wr2 = wr2
+        self.segments = segments
+        self.recharges = recharges
+        self.last_recharge = last_recharge
+
+    @classmethod
+    def from_history(cls, days, balances, halflife_days=DEFAULT_HALFLIFE_DAYS):
+        """Vectorized pass over a full history (days since epoch, balances; oldest first)"""
+        import numpy as np
+
+        days = np.asarray(days, dtype=float)
+        balances = np.asarray(balances, dtype=float)
+        state = cls(float(days[-1]), float(balances[-1]))
+        if len(days) < 2:
+            return state
+
+        dt = np.diff(days)
+        used = -np.diff(balances)
+        recharge = used < -RECHARGE_MIN
+        usage = ~recharge & (dt > 0)
+        rate = np.clip(np.divide(used, dt, out=np.zeros_like(used), where=dt > 0), 0, None)
+        weight = np.where(usage, dt * np.exp(-math.log(2) / halflife_days * (days[-1] - days[1:])), 0.0)
+
+        state.w = float(weight.sum())
+        state.w2 = float((weight ** 2).sum())
+        state.wr = float((weight * rate).sum())
+        state.wr2 = float((weight * rate ** 2).sum())
+        state.segments = int(usage.sum())
+        state.recharges = int(recharge.sum())
+        if state.recharges:
+            i = int(np.flatnonzero(recharge)[-1])
+            state.last_recharge = {'at': from_days(days[i + 1]).strftime(TIMESTAMP_FORMAT),
+                                   'amount': round(float(-used[i]), 2)}
+        return state
+
+    def advance(self, day, balance, halflife_days=DEFAULT_HALFLIFE_DAYS):
+        """Fold in one newer reading; the same arithmetic as from_history, one step at a time"""
+        dt = day - self.last_day
+        used = self.last_balance - balance
+        decay = math.exp(-math.log(2) / halflife_days * dt)
+        self.w *= decay
+        self.w2 *= decay ** 2
+        self.wr *= decay
+        self.wr2 *= decay
+        if used < -RECHARGE_MIN:
+            self.recharges += 1
+            self.last_recharge = {'at': from_days(day).strftime(TIMESTAMP_FORMAT), 'amount': round(-used, 2)}
+        elif dt > 0:
+            rate = max(used / dt, 0.0)
+            self.w += dt
+            self.w2 += dt ** 2
+            self.wr += dt * rate
+            self.wr2 += dt * rate ** 2
+            self.segments += 1
+        self.last_day, self.last_balance = day, balance
+
+    def project(self, balance, floor, confidence=DEFAULT_CONFIDENCE):
+        """Forecast for the current balance falling to floor (the minimum recharge)"""
+        now = from_days(self.last_day)
+        forecast = Forecast(now, segments=self.segments, recharges=self.recharges, last_recharge=self.last_recharge)
+        if self.w <= 0:
+            return forecast
+
+        mean = self.wr / self.w
+        forecast.daily_usage = mean
+        headroom = max(balance - floor, 0.0)
+        if mean > 0:
+            forecast.days_left = headroom / mean
+            forecast.depletion = now + timedelta(days=forecast.days_left)
+        if self.segments < 2:
+            return forecast
+
+        # Standard error of the weighted mean with Kish's effective sample size
+        variance = max(self.wr2 / self.w - mean ** 2, 0.0)
+        n_eff = self.w ** 2 / self.w2
+        margin = NormalDist().inv_cdf((1 + confidence) / 2) * math.sqrt(variance / n_eff)
+        high, low = mean + margin, mean - margin
+        if high > 0:
+            forecast.earliest = now + timedelta(days=headroom / high)
+        if low > 0:
+            forecast.latest = now + timedelta(days=headroom / low)
+        return forecast
+
+    def to_json(self):
+        return json.dumps({field: getattr(self, field) for field in self.FIELDS})
+
+    @classmethod
+    def from_json(cls, text):
+        return cls(**json.loads(text))
+
+
+class Forecaster:
+    """Per-account forecast state kept in the reading store database"""
+
+    def __init__(self, store, path=None, halflife_days=DEFAULT_HALFLIFE_DAYS, confidence=DEFAULT_CONFIDENCE):
+        self.store = store
+        self.halflife_days = halflife_days
+        self.confidence = confidence
+        self.conn = sqlite3.connect(path or store.path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS forecast_state (account_id TEXT PRIMARY KEY, state_json TEXT NOT NULL)')
+        self.conn.commit()
+
+    @classmethod
+    def from_env(cls, store):
+        return cls(
+            store,
+            halflife_days=float(os.environ.get('DPDC_FORECAST_HALFLIFE_DAYS', DEFAULT_HALFLIFE_DAYS)),
+            confidence=float(os.environ.get('DPDC_FORECAST_CONFIDENCE', DEFAULT_CONFIDENCE))
+        )
+
+    def history_state(self, account_id, end=None):
+        """State rebuilt from every stored reading before end; None without history"""
+        rows = [row for row in self.store.range(account_id, end=end) if row['balance'] is not None]
+        if not rows:
+            return None
+        return ForecastState.from_history([to_days(row['timestamp']) for row in rows],
+                                          [row['balance'] for row in rows], self.halflife_days)
+
+    def update(self, timestamp, reading):
+        """
+        Fold a reading into its account's state and return the Forecast (None for error
+        readings); readings not newer than the saved state only re-project
+        """
+        if reading.is_error or reading.balance is None:
+            return None
+        day, balance = to_days(timestamp), float(reading.balance)
+
+        row = self.conn.execute('SELECT state_json FROM forecast_state WHERE account_id = ?',
+                                (reading.account_id,)).fetchone()
+        state = ForecastState.from_json(row[0]) if row else self.history_state(reading.account_id, end=timestamp)
+        if state is None:
+            state = ForecastState(day, balance)
+        elif day > state.last_day:
+            state.advance(day, balance, self.halflife_days)
+
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO forecast_state VALUES (?, ?)', (reading.account_id, state.to_json()))
+        floor = float(reading.min_recharge) if reading.min_recharge is not None else 0.0
+        return state.project(balance, floor, self.confidence)
+
+    def reset(self, account_id=None):
+        with self.conn:
+            if account_id:
+                self.conn.execute('DELETE FROM forecast_state WHERE account_id = ?', (account_id,))
+            else:
+                self.conn.execute('DELETE FROM forecast_state')
+
+    def checkpoint(self):
+        """Merge the WAL into the reading store database"""
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
+
+
+def main(argv=None):
+    from dpdc_store import ReadingStore
+
+    parser = argparse.ArgumentParser(description="Balance depletion forecast")
+    parser.add_argument('--store', default=os.environ.get('DPDC_STORE_PATH', DEFAULT_STORE_PATH))
+    sub = parser.add_subparsers(dest='command', required=True)
+    show = sub.add_parser('show', help="Forecast per account from the full stored history")
+    show.add_argument('--account')
+    sub.add_parser('reset', help="Drop saved state; the next run recomputes from history")
+    args = parser.parse_args(argv)
+
+    store = ReadingStore(args.store)
+    forecaster = Forecaster.from_env(store)
+    if args.command == 'reset':
+        forecaster.reset()
+        print("✓ Forecast state cleared")
+        return 0
+
+    for latest in store.latest(args.account):
+        state = forecaster.history_state(latest['accountId'])
+        if state is None:
+            continue
+        forecast = state.project(state.last_balance, latest['min_recharge'] or 0.0, forecaster.confidence)
+        print(json.dumps(dict({'accountId': latest['accountId'], 'asOf': latest['timestamp']}, **forecast.to_dict())))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
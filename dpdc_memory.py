@@ -0,0 +1,202 @@
+"""
+Browser memory budget.
+
+DPDC_MEMORY_PROFILE=lean launches Chrome with one renderer process, no
+background services or component updates, a capped V8 heap and notifications,
+media, geolocation and plugins blocked. MemoryMonitor samples the resident set
+of the whole Chrome process tree (chromedriver and every descendant) from
+/proc on a background thread and keeps the peak per pipeline phase. When
+DPDC_BROWSER_MEMORY_LIMIT_MB is set, a browser whose run peak went over it is
+recycled before the next run.
+"""
+import os
+import threading
+
+DEFAULT_SAMPLE_MS = 250
+
+MEMORY_PROFILES = {
+    'full': {
+        'args': [],
+        'disable_features': [],
+        'content_settings': {},
+    },
+    'lean': {
+        'args': [
+            '--renderer-process-limit=1',
+            '--disable-extensions',
+            '--disable-background-networking',
+            '--disable-component-update',
+            '--disable-default-apps',
+            '--disable-sync',
+            '--disable-client-side-phishing-detection',
+            '--disable-breakpad',
+            '--no-first-run',
+            '--mute-audio',
+            '--js-flags=--max-old-space-size=256',
+        ],
+        'disable_features': [
+            'Translate', 'MediaRouter', 'OptimizationHints', 'InterestFeedContentSuggestions',
+            'BackForwardCache', 'AutofillServerCommunication', 'CertificateTransparencyComponentUpdater',
+        ],
+        # 2 = block
+        'content_settings': {
+            'notifications': 2,
+            'media_stream': 2,
+            'geolocation': 2,
+            'plugins': 2,
+        },
+    },
+}
+
+
+def memory_profile(name=None):
+    """Launch settings for DPDC_MEMORY_PROFILE (full by default)"""
+    name = name or os.environ.get('DPDC_MEMORY_PROFILE', 'full')
+    if name not in MEMORY_PROFILES:
+        print(f"⚠ Unknown DPDC_MEMORY_PROFILE '{name}', using 'full'")
+        name = 'full'
+    return dict(MEMORY_PROFILES[name], name=name)
+
+
+def _read_process_table():
+    """{pid: (ppid, rss_bytes)} for every process visible in /proc"""
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    table = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm may contain spaces or parentheses; the fields after the last ')' are fixed
+        fields = stat[stat.rfind(b')') + 2:].split()
+        table[int(entry)] = (int(fields[1]), int(fields[21]) * page_size)
+    return table
+
+
+def tree_rss(root_pids, table=None):
+    """(total RSS bytes, process count) of the given processes and all their descendants"""
+    table = table if table is not None else _read_process_table()
+    children = {}
+    for pid, (ppid, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+    seen, stack = set(), [pid for pid in root_pids if pid in table]
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        stack.extend(children.get(pid, []))
+    return sum(table[pid][1] for pid in seen), len(seen)
+
+
+def driver_pids(driver):
+    """chromedriver's PID and, for undetected_chromedriver, the separately launched browser's"""
+    pids = []
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    if getattr(process, 'pid', None):
+        pids.append(process.pid)
+    if getattr(driver, 'browser_pid', None):
+        pids.append(driver.browser_pid)
+    return pids
+
+
+class MemoryMonitor:
+    def __init__(self, phase=None, interval=DEFAULT_SAMPLE_MS / 1000, limit_mb=None):
+        # Callable returning the current phase name (None outside any phase)
+        self.phase = phase or (lambda: None)
+        self.interval = interval
+        self.limit_mb = limit_mb
+        self.enabled = os.path.isdir('/proc/self')
+        self.lock = threading.Lock()
+        self.pids = []
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.reset()
+
+    @classmethod
+    def from_env(cls, phase=None):
+        limit = os.environ.get('DPDC_BROWSER_MEMORY_LIMIT_MB')
+        return cls(
+            phase,
+            interval=float(os.environ.get('DPDC_MEMORY_SAMPLE_MS', DEFAULT_SAMPLE_MS)) / 1000,
+            limit_mb=float(limit) if limit else None
+        )
+
+    def reset(self):
+        """Start a fresh set of per-phase peaks (one per run)"""
+        with self.lock:
+            self.peaks = {}
+            self.peak_mb = 0.0
+            self.peak_phase = None
+            self.processes = 0
+            self.samples = 0
+            self.last_mb = None
+
+    def start(self, driver):
+        """Begin sampling the process tree behind a driver"""
+        self.stop()
+        self.pids = driver_pids(driver)
+        if not self.enabled or not self.pids:
+            return
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._loop, name='memory-monitor', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            self.sample()
+            self.stop_event.wait(self.interval)
+
+    def sample(self):
+        """Take one reading now; returns MB, or None when nothing is being watched"""
+        if not self.enabled or not self.pids:
+            return None
+        try:
+            rss, count = tree_rss(self.pids)
+        except Exception:
+            return None
+        mb = rss / (1024 * 1024)
+        phase = self.phase() or 'other'
+        with self.lock:
+            self.samples += 1
+            self.last_mb = mb
+            self.processes = max(self.processes, count)
+            if mb > self.peaks.get(phase, 0):
+                self.peaks[phase] = mb
+            if mb > self.peak_mb:
+                self.peak_mb, self.peak_phase = mb, phase
+        return mb
+
+    def over_limit(self):
+        return self.limit_mb is not None and self.peak_mb > self.limit_mb
+
+    def report(self):
+        with self.lock:
+            if not self.samples:
+                return None
+            return {
+                'peak_mb': round(self.peak_mb, 1),
+                'peak_phase': self.peak_phase,
+                'last_mb': round(self.last_mb, 1),
+                'processes': self.processes,
+                'limit_mb': self.limit_mb,
+                'phases': {phase: round(mb, 1) for phase, mb in self.peaks.items()},
+            }
+
+    def print_report(self, report=None):
+        report = report or self.report()
+        if not report:
+            return
+        limit = f", limit {report['limit_mb']:.0f} MB" if report['limit_mb'] else ''
+        print(f"🧠 Chrome peak {report['peak_mb']:.0f} MB in '{report['peak_phase']}' "
+              f"({report['processes']} processes{limit})")
+        print('   ' + ', '.join(f'{phase} {mb:.0f}' for phase, mb in report['phases'].items()))
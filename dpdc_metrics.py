@@ -0,0 +1,182 @@
+"""
+Per-phase timing spans and run metrics.
+
+RunMetrics records one span per pipeline phase. Phases run back to back, so
+begin() closes the previous span. At the end of a run the spans go out as one
+JSON line per run and, optionally, as a Prometheus textfile.
+
+    python dpdc_metrics.py summary [run_metrics.jsonl]
+"""
+from datetime import datetime
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+DEFAULT_METRICS_PATH = 'run_metrics.jsonl'
+
+
+class RunMetrics:
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.start = time.perf_counter()
+        self.phases = []
+        self.current = None
+        self.outcome = None
+        self.total = None
+        self.error = ''
+        self.extra = {}
+    
+    def begin(self, name):
+        """Start a phase span, closing the one in progress"""
+        self.end()
+        self.current = {'name': name, 'offset': time.perf_counter() - self.start, 'status': 'ok'}
+        self._phase_start = time.perf_counter()
+    
+    def end(self, status=None):
+        """Close the phase in progress, if any"""
+        if self.current is None:
+            return
+        self.current['seconds'] = time.perf_counter() - self._phase_start
+        if status:
+            self.current['status'] = status
+        self.phases.append(self.current)
+        self.current = None
+    
+    def fail(self, error):
+        """Mark the phase in progress (and the run) as failed"""
+        self.error = str(error)[:200]
+        self.end(status='error')
+    
+    def finish(self, success):
+        self.end()
+        self.outcome = 'success' if success else 'failure'
+        self.total = time.perf_counter() - self.start
+    
+    def to_record(self):
+        return {
+            'run_id': self.run_id,
+            'started_at': self.started_at,
+            'outcome': self.outcome,
+            'error': self.error,
+            'total_seconds': round(self.total if self.total is not None else time.perf_counter() - self.start, 3),
+            'phases': [
+                {'name': p['name'], 'seconds': round(p['seconds'], 3), 'status': p['status']}
+                for p in self.phases
+            ],
+            **self.extra
+        }
+    
+    def write_jsonl(self, path=DEFAULT_METRICS_PATH):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_record(), ensure_ascii=False) + '\n')
+    
+    def write_prometheus(self, path):
+        """Write a node_exporter textfile with the latest run's spans"""
+        record = self.to_record()
+        lines = [
+            '# HELP dpdc_run_seconds Wall-clock time of the last DPDC run',
+            '# TYPE dpdc_run_seconds gauge',
+            f'dpdc_run_seconds {record["total_seconds"]}',
+            '# HELP dpdc_run_success 1 if the last DPDC run succeeded',
+            '# TYPE dpdc_run_success gauge',
+            f'dpdc_run_success {1 if record["outcome"] == "success" else 0}',
+            '# HELP dpdc_phase_seconds Wall-clock time per phase of the last DPDC run',
+            '# TYPE dpdc_phase_seconds gauge',
+        ]
+        for phase in record['phases']:
+            lines.append(f'dpdc_phase_seconds{{phase="{phase["name"]}",status="{phase["status"]}"}} {phase["seconds"]}')
+        
+        # Write-then-rename so the exporter never reads a partial file
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+    
+    def export(self):
+        """Write the run record to the configured outputs"""
+        try:
+            path = os.environ.get('DPDC_METRICS_PATH', DEFAULT_METRICS_PATH)
+            self.write_jsonl(path)
+            prom_path = os.environ.get('DPDC_METRICS_PROM')
+            if prom_path:
+                self.write_prometheus(prom_path)
+            print(f"📈 Run metrics written to {path}")
+        except Exception as e:
+            print(f"⚠ Could not write run metrics: {e}")
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a non-empty list"""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def load_records(path):
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def summarize(records):
+    """p50/p95 per phase and for the whole run, keeping pipeline order"""
+    samples = {}
+    for record in records:
+        for phase in record.get('phases', []):
+            samples.setdefault(phase['name'], []).append(phase['seconds'])
+    totals = [r['total_seconds'] for r in records if 'total_seconds' in r]
+    if totals:
+        samples['total'] = totals
+    return {
+        name: {'count': len(values), 'p50': percentile(values, 50), 'p95': percentile(values, 95)}
+        for name, values in samples.items()
+    }
+
+
+def print_summary(records):
+    summary = summarize(records)
+    failures = sum(1 for r in records if r.get('outcome') == 'failure')
+    print(f"Runs: {len(records)}  Failures: {failures}")
+    print(f"{'phase':<20}{'runs':>6}{'p50 (s)':>10}{'p95 (s)':>10}")
+    for name, stats in summary.items():
+        print(f"{name:<20}{stats['count']:>6}{stats['p50']:>10.2f}{stats['p95']:>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DPDC run metrics")
+    sub = parser.add_subparsers(dest='command', required=True)
+    summary = sub.add_parser('summary', help="Print p50/p95 per phase across runs")
+    summary.add_argument('path', nargs='?', default=DEFAULT_METRICS_PATH)
+    summary.add_argument('--last', type=int, help="Only the most recent N runs")
+    args = parser.parse_args(argv)
+    
+    if not os.path.exists(args.path):
+        print(f"✗ No metrics file at {args.path}")
+        return 1
+    records = load_records(args.path)
+    if args.last:
+        records = records[-args.last:]
+    if not records:
+        print("✗ No runs recorded")
+        return 1
+    print_summary(records)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
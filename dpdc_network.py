@@ -0,0 +1,225 @@
+"""
+Network resource blocking profiles.
+
+A profile blocks whole resource types (by file extension) and URL patterns
+through CDP Network.setBlockedURLs, with an allow list that takes precedence
+so reCAPTCHA and the portal's own API keep working. Page-level transfer stats
+are sampled with one in-page probe and compared with the last unblocked run
+to report bytes and load time saved.
+
+Blocking is opt-in (the default profile is 'full'). A blocking profile still
+runs unblocked once the baseline is missing or older than
+DPDC_NETWORK_BASELINE_DAYS, so the savings keep being measured.
+"""
+from datetime import datetime, timedelta
+import json
+import os
+
+DEFAULT_BASELINE_PATH = 'network_baseline.json'
+DEFAULT_BASELINE_DAYS = 7
+
+# Resource types as absolute URL patterns: the ordered form of Network.setBlockedURLs
+# takes URLPattern strings, which must name a scheme and host (a bare '*.png' matches nothing)
+TYPE_PATTERNS = {
+    'image': ['*://*/*.png', '*://*/*.jpg', '*://*/*.jpeg', '*://*/*.gif', '*://*/*.webp',
+              '*://*/*.svg', '*://*/*.ico', '*://*/*.bmp', '*://*/*.avif'],
+    'font': ['*://*/*.woff', '*://*/*.woff2', '*://*/*.ttf', '*://*/*.otf', '*://*/*.eot'],
+    'media': ['*://*/*.mp4', '*://*/*.webm', '*://*/*.mp3', '*://*/*.ogg', '*://*/*.wav', '*://*/*.m4a'],
+    'stylesheet': ['*://*/*.css'],
+}
+
+ANALYTICS_PATTERNS = [
+    '*://*.google-analytics.com/*',
+    '*://*.googletagmanager.com/*',
+    '*://*.doubleclick.net/*',
+    '*://*.facebook.net/*',
+    '*://*.facebook.com/tr*',
+    '*://*.hotjar.com/*',
+    '*://*.clarity.ms/*',
+]
+
+# Never blocked: the verification widget must render for the form to submit
+RECAPTCHA_PATTERNS = [
+    '*://www.google.com/recaptcha/*',
+    '*://www.gstatic.com/recaptcha/*',
+    '*://www.recaptcha.net/*',
+]
+
+PROFILES = {
+    'full': {'block_types': [], 'deny_urls': [], 'allow_urls': []},
+    'lean': {'block_types': ['image', 'font', 'media'], 'deny_urls': ANALYTICS_PATTERNS, 'allow_urls': RECAPTCHA_PATTERNS},
+    'strict': {'block_types': ['image', 'font', 'media', 'stylesheet'], 'deny_urls': ANALYTICS_PATTERNS, 'allow_urls': RECAPTCHA_PATTERNS},
+}
+
+PAGE_STATS_JS = """
+    var entries = performance.getEntriesByType('resource');
+    var bytes = 0, failed = 0, cacheHits = 0, cacheMisses = 0;
+    for (var i = 0; i < entries.length; i++) {
+        var e = entries[i];
+        bytes += e.transferSize || 0;
+        if (!e.responseEnd) { failed++; }
+        // Cross-origin entries without Timing-Allow-Origin report zeros and are not counted
+        if (e.transferSize === 0 && e.decodedBodySize > 0) { cacheHits++; }
+        else if (e.transferSize > 0) { cacheMisses++; }
+    }
+    var nav = performance.getEntriesByType('navigation')[0];
+    // Count the document itself once, and start the next sample from a clean
+    // slate so SPA route changes are not double counted
+    if (nav && !window.__dpdcNetSampled) { bytes += nav.transferSize || 0; }
+    window.__dpdcNetSampled = true;
+    performance.clearResourceTimings();
+    return {
+        resources: entries.length,
+        bytes: bytes,
+        loadMs: nav ? (nav.loadEventEnd || performance.now()) : performance.now(),
+        failed: failed,
+        cacheHits: cacheHits,
+        cacheMisses: cacheMisses
+    };
+"""
+
+
+def _split_env(name):
+    return [item.strip() for item in os.environ.get(name, '').split(',') if item.strip()]
+
+
+def load_baseline(path):
+    """{'recorded_at', 'pages'}; {} when there is none (a bare pages dict is from before recorded_at)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if 'pages' in data else {'pages': data}
+
+
+def baseline_stale(path, max_age_days):
+    recorded_at = load_baseline(path).get('recorded_at')
+    if not recorded_at:
+        return True
+    return datetime.now() - datetime.fromisoformat(recorded_at) > timedelta(days=max_age_days)
+
+
+class NetworkProfile:
+    def __init__(self, name='full', block_types=None, deny_urls=None, allow_urls=None,
+                 baseline_path=DEFAULT_BASELINE_PATH):
+        base = PROFILES.get(name, PROFILES['full'])
+        self.name = name if name in PROFILES else 'full'
+        self.block_types = list(base['block_types'] if block_types is None else block_types)
+        self.deny_urls = list(base['deny_urls']) + list(deny_urls or [])
+        self.allow_urls = list(base['allow_urls']) + list(allow_urls or [])
+        self.baseline_path = baseline_path
+        self.pages = {}
+        self.enforced = False
+        # Which form of Network.setBlockedURLs took effect: 'ordered', 'wildcard', or why nothing did
+        self.blocking = None
+    
+    @classmethod
+    def from_env(cls):
+        """
+        Profile from DPDC_RESOURCE_PROFILE plus DPDC_BLOCK_TYPES / DPDC_BLOCK_URLS / DPDC_ALLOW_URLS
+        Falls back to 'full' for this run when the baseline is due for a refresh
+        """
+        name = os.environ.get('DPDC_RESOURCE_PROFILE', 'full')
+        baseline_path = os.environ.get('DPDC_NETWORK_BASELINE', DEFAULT_BASELINE_PATH)
+        max_age = float(os.environ.get('DPDC_NETWORK_BASELINE_DAYS', DEFAULT_BASELINE_DAYS))
+        if name != 'full' and max_age > 0 and baseline_stale(baseline_path, max_age):
+            print(f"   → Network baseline missing or older than {max_age:g} days: this run is unblocked")
+            name = 'full'
+        block_types = _split_env('DPDC_BLOCK_TYPES') if 'DPDC_BLOCK_TYPES' in os.environ and name != 'full' else None
+        return cls(
+            name,
+            block_types=block_types,
+            deny_urls=_split_env('DPDC_BLOCK_URLS') if name != 'full' else [],
+            allow_urls=_split_env('DPDC_ALLOW_URLS'),
+            baseline_path=baseline_path
+        )
+    
+    def blocked_patterns(self):
+        patterns = []
+        for resource_type in self.block_types:
+            patterns.extend(TYPE_PATTERNS.get(resource_type, []))
+        return patterns + self.deny_urls
+    
+    def apply(self, driver):
+        """Enforce the profile on a driver via CDP"""
+        deny = self.blocked_patterns()
+        if not deny:
+            print(f"   ✓ Resource profile '{self.name}': nothing blocked")
+            return
+        
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            try:
+                # Ordered patterns: allow entries first so they win over broader blocks
+                driver.execute_cdp_cmd('Network.setBlockedURLs', {
+                    'urlPatterns': [{'urlPattern': p, 'block': False} for p in self.allow_urls]
+                                   + [{'urlPattern': p, 'block': True} for p in deny]
+                })
+                self.blocking = 'ordered'
+            except Exception as e:
+                if self.allow_urls:
+                    # The plain wildcard list has no allow entries: blocking without them could
+                    # take reCAPTCHA down with it, so block nothing rather than drop the allow list
+                    self.blocking = f'refused: no ordered URL patterns ({e})'
+                    print(f"   ✗ Resource profile '{self.name}' NOT applied: this Chrome rejected ordered "
+                          f"URL patterns ({e}) and the allow list cannot be enforced without them")
+                    return
+                # Older Chrome without an allow list to honour: plain wildcard list
+                driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': deny})
+                self.blocking = 'wildcard'
+            self.enforced = True
+            print(f"   ✓ Resource profile '{self.name}': blocking {', '.join(self.block_types) or 'no types'}"
+                  f" + {len(self.deny_urls)} URL pattern(s) ({self.blocking} patterns)")
+        except Exception as e:
+            self.blocking = f'failed: {e}'
+            print(f"   ✗ Could not apply resource profile '{self.name}': {e}")
+    
+    def record_page(self, driver, label):
+        """Sample transfer size and load time of the current page"""
+        try:
+            self.pages[label] = driver.execute_script(PAGE_STATS_JS)
+        except Exception as e:
+            print(f"   ⚠ Could not sample network stats for {label}: {e}")
+    
+    def _load_baseline(self):
+        return load_baseline(self.baseline_path).get('pages', {})
+    
+    def report(self):
+        """
+        Per-page bytes/load time, with savings against the last unblocked ('full') run
+        Runs with the 'full' profile refresh that baseline
+        """
+        baseline = self._load_baseline()
+        report = {'profile': self.name, 'blocking': self.blocking, 'pages': {}, 'bytes_saved': 0, 'ms_saved': 0}
+        
+        for label, stats in self.pages.items():
+            page = {'bytes': stats.get('bytes', 0), 'load_ms': round(stats.get('loadMs', 0)),
+                    'resources': stats.get('resources', 0)}
+            ref = baseline.get(label)
+            if ref and self.name != 'full':
+                page['bytes_saved'] = ref['bytes'] - page['bytes']
+                page['ms_saved'] = ref['load_ms'] - page['load_ms']
+                report['bytes_saved'] += page['bytes_saved']
+                report['ms_saved'] += page['ms_saved']
+            report['pages'][label] = page
+        
+        if self.name == 'full' and report['pages']:
+            try:
+                with open(self.baseline_path, 'w', encoding='utf-8') as f:
+                    json.dump({'recorded_at': datetime.now().isoformat(timespec='seconds'),
+                               'pages': report['pages']}, f, indent=2)
+            except OSError as e:
+                print(f"   ⚠ Could not save network baseline: {e}")
+        
+        total_bytes = sum(p['bytes'] for p in report['pages'].values())
+        line = f"🌐 Network ({self.name}): {total_bytes / 1024:.0f} KB transferred"
+        if self.name == 'full':
+            line += ", recorded as the unblocked baseline" if report['pages'] else ''
+        elif baseline:
+            line += f", saved {report['bytes_saved'] / 1024:.0f} KB and {report['ms_saved'] / 1000:.1f}s vs unblocked"
+        else:
+            line += ", savings unknown: no unblocked baseline yet (run once with DPDC_RESOURCE_PROFILE=full)"
+        report['baseline'] = bool(baseline) and self.name != 'full'
+        print(line)
+        return report
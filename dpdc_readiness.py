@@ -0,0 +1,133 @@
+"""
+Event-driven page readiness.
+
+One lightweight in-page probe reports document state, DOM mutation activity,
+in-flight network requests and which text patterns / selectors are present.
+PageReadiness polls that probe until the requested conditions all hold, so
+callers return as soon as the page is ready instead of sleeping a fixed time.
+"""
+import time
+
+# Installs (once per document) a MutationObserver and fetch/XHR counters, then
+# reports the current state in a single round-trip.
+READINESS_PROBE_JS = """
+    var cfg = arguments[0] || {};
+    var w = window;
+    if (!w.__dpdcReady) {
+        var st = w.__dpdcReady = {lastMutation: performance.now(), inflight: 0, lastNetwork: performance.now()};
+        try {
+            new MutationObserver(function () { st.lastMutation = performance.now(); })
+                .observe(document, {childList: true, subtree: true, characterData: true, attributes: true});
+        } catch (e) {}
+        var done = function () { st.inflight = Math.max(0, st.inflight - 1); st.lastNetwork = performance.now(); };
+        if (w.fetch) {
+            var origFetch = w.fetch;
+            w.fetch = function () {
+                st.inflight++;
+                return origFetch.apply(this, arguments).then(
+                    function (r) { done(); return r; },
+                    function (e) { done(); throw e; });
+            };
+        }
+        var origSend = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function () {
+            st.inflight++;
+            this.addEventListener('loadend', done);
+            return origSend.apply(this, arguments);
+        };
+    }
+    var st = w.__dpdcReady;
+    var now = performance.now();
+    var lastResource = 0;
+    try {
+        var entries = performance.getEntriesByType('resource');
+        for (var i = 0; i < entries.length; i++) {
+            if (entries[i].responseEnd > lastResource) { lastResource = entries[i].responseEnd; }
+        }
+    } catch (e) {}
+    var text = document.body ? document.body.innerText : '';
+    var textHits = [];
+    (cfg.text || []).forEach(function (p) { if (new RegExp(p, 'i').test(text)) { textHits.push(p); } });
+    var selectorHits = [];
+    (cfg.selectors || []).forEach(function (s) {
+        try { if (document.querySelector(s)) { selectorHits.push(s); } } catch (e) {}
+    });
+    return {
+        readyState: document.readyState,
+        quietMs: now - st.lastMutation,
+        inflight: st.inflight,
+        idleMs: now - Math.max(st.lastNetwork, lastResource),
+        textHits: textHits,
+        selectorHits: selectorHits,
+        textLength: text.length
+    };
+"""
+
+# Lines that only show up once the quick-pay lookup has answered (data or an error).
+# The value must follow the label on the same line: a bare "Name:" form label
+# followed by other text further down is not an answer.
+RESULT_TEXT_PATTERNS = [
+    r'balance[^\n]*:[ \t]*\S',
+    r'name[ \t]*:[ \t]*\S',
+    r'account[ \t]*(id|number|no)[^\n]*:[ \t]*\S',
+    r'invalid|not found|no data|does not exist',
+]
+
+# The quick-pay customer number input
+CUSTOMER_INPUT_SELECTORS = [
+    "input[type='text']:not([placeholder*='Search'])",
+    "input[type='number']",
+]
+
+
+class PageReadiness:
+    """Poll READINESS_PROBE_JS until a set of conditions hold or a hard ceiling is hit"""
+    
+    def __init__(self, driver, poll_interval=0.25):
+        self.driver = driver
+        self.poll_interval = poll_interval
+    
+    def probe(self, text=None, selectors=None):
+        return self.driver.execute_script(READINESS_PROBE_JS, {
+            'text': text or [],
+            'selectors': selectors or []
+        })
+    
+    @staticmethod
+    def is_ready(state, loaded=True, quiet_ms=None, idle_ms=None, text=None, selectors=None):
+        if loaded and state.get('readyState') != 'complete':
+            return False
+        if quiet_ms is not None and state.get('quietMs', 0) < quiet_ms:
+            return False
+        if idle_ms is not None and (state.get('inflight', 0) > 0 or state.get('idleMs', 0) < idle_ms):
+            return False
+        if text and not state.get('textHits'):
+            return False
+        if selectors and not state.get('selectorHits'):
+            return False
+        return True
+    
+    def wait(self, timeout=20, loaded=True, quiet_ms=None, idle_ms=None, text=None, selectors=None, label='page'):
+        """
+        Wait until the page is loaded and, if requested, DOM-quiet for quiet_ms,
+        network-idle for idle_ms, showing any of `text` patterns and any of `selectors`
+        Returns (ready, elapsed_seconds, last_state)
+        """
+        start = time.time()
+        state = {}
+        while True:
+            try:
+                state = self.probe(text, selectors) or {}
+                if self.is_ready(state, loaded, quiet_ms, idle_ms, text, selectors):
+                    elapsed = time.time() - start
+                    print(f"   ✓ {label} ready after {elapsed:.1f}s")
+                    return True, elapsed, state
+            except Exception:
+                # Navigation in progress; the probe reinstalls itself on the new document
+                pass
+            
+            elapsed = time.time() - start
+            if elapsed >= timeout:
+                print(f"   ⚠ {label} not ready after {timeout}s (state: {state})")
+                return False, elapsed, state
+            time.sleep(min(self.poll_interval, max(0, timeout - elapsed)))
@@ -0,0 +1,224 @@
+"""
+Typed reading record.
+
+The page (or JSON response) yields raw text fields; Reading parses them once
+into Decimal amounts, a normalized phone number, an enum connection status and
+an explicit error flag, and serializes from those parsed values to each output
+(sheet row, JSON, SQLite).
+"""
+from decimal import Decimal, InvalidOperation
+from enum import Enum
+import hashlib
+import json
+import re
+
+from dpdc_extraction import RECORD_FIELDS
+
+BANGLA_DIGITS = str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789')
+AMOUNT_RE = re.compile(r'-?\d[\d,]*(?:\.\d+)?')
+
+# Sheet text the pipeline has always used for failed runs (kept for the sheet's sake)
+LEGACY_FETCH_ERROR_PREFIX = 'Error: '
+LEGACY_FETCH_ERROR_BALANCE = 'Error - check artifacts'
+LEGACY_EXTRACTION_FAILED_NAME = 'Data extraction failed - check artifacts'
+LEGACY_EXTRACTION_FAILED_BALANCE = 'N/A'
+# Same shape for runs stopped by the run deadline
+TIMEOUT_PREFIX = 'Timeout: '
+TIMEOUT_BALANCE = 'Timeout - check artifacts'
+
+
+class ConnectionStatus(Enum):
+    ACTIVE = 'Active'
+    INACTIVE = 'Inactive'
+    DISCONNECTED = 'Disconnected'
+    SUSPENDED = 'Suspended'
+    UNKNOWN = ''
+    
+    @classmethod
+    def parse(cls, text):
+        text = (text or '').strip().lower()
+        if not text:
+            return cls.UNKNOWN
+        if 'disconnect' in text:
+            return cls.DISCONNECTED
+        if 'suspend' in text or 'block' in text:
+            return cls.SUSPENDED
+        if 'inactive' in text or 'in-active' in text or 'closed' in text:
+            return cls.INACTIVE
+        if 'active' in text or 'connected' in text or text == 'on':
+            return cls.ACTIVE
+        return cls.UNKNOWN
+
+
+class ReadingError(Enum):
+    FETCH_ERROR = 'fetch_error'
+    EXTRACTION_FAILED = 'extraction_failed'
+    TIMEOUT = 'timeout'
+
+
+def parse_decimal(text):
+    """First amount in a money string ("৳ ১,২৩৪.৫০" → Decimal('1234.50')); None if there is none"""
+    if text is None:
+        return None
+    if isinstance(text, (int, float, Decimal)):
+        return Decimal(str(text))
+    match = AMOUNT_RE.search(str(text).translate(BANGLA_DIGITS))
+    if not match:
+        return None
+    try:
+        return Decimal(match.group(0).replace(',', ''))
+    except InvalidOperation:
+        return None
+
+
+def normalize_phone(text):
+    """Bangladeshi mobile numbers to +8801XXXXXXXXX; anything else is returned trimmed"""
+    text = (text or '').strip()
+    digits = re.sub(r'\D', '', text.translate(BANGLA_DIGITS))
+    if len(digits) == 11 and digits.startswith('01'):
+        return '+88' + digits
+    if len(digits) == 13 and digits.startswith('8801'):
+        return '+' + digits
+    return text
+
+
+class Reading:
+    __slots__ = (
+        'account_id', 'customer_name', 'customer_class', 'mobile_number', 'email',
+        'account_type', 'balance', 'status', 'status_text', 'customer_type',
+        'min_recharge', 'error', 'error_message', 'forecast'
+    )
+    # Derived from the history, not from the page: not part of equality or the content hash
+    DERIVED = ('forecast',)
+    
+    def __init__(self, account_id='', customer_name='', customer_class='', mobile_number='', email='',
+                 account_type='', balance=None, status=ConnectionStatus.UNKNOWN, status_text='',
+                 customer_type='', min_recharge=None, error=None, error_message='', forecast=None):
+        self.account_id = account_id
+        self.customer_name = customer_name
+        self.customer_class = customer_class
+        self.mobile_number = mobile_number
+        self.email = email
+        self.account_type = account_type
+        self.balance = balance
+        self.status = status
+        self.status_text = status_text
+        self.customer_type = customer_type
+        self.min_recharge = min_recharge
+        self.error = error
+        self.error_message = error_message
+        self.forecast = forecast
+    
+    @classmethod
+    def from_fields(cls, fields):
+        """Parse a raw field dict (extraction output, sheet row or to_dict() output) once"""
+        get = lambda key: str(fields.get(key) or '').strip()
+        name = get('customerName')
+        balance_text = get('balanceRemaining')
+        
+        error = ReadingError(fields['error']) if fields.get('error') else None
+        error_message = fields.get('errorMessage', '')
+        # Rows written before the typed record existed carry the error in the text
+        if error is None and name.startswith(LEGACY_FETCH_ERROR_PREFIX):
+            error, error_message = ReadingError.FETCH_ERROR, name[len(LEGACY_FETCH_ERROR_PREFIX):]
+        elif error is None and name == LEGACY_EXTRACTION_FAILED_NAME:
+            error = ReadingError.EXTRACTION_FAILED
+        elif error is None and name.startswith(TIMEOUT_PREFIX):
+            error, error_message = ReadingError.TIMEOUT, name[len(TIMEOUT_PREFIX):]
+        
+        status_text = get('connectionStatus')
+        status = ConnectionStatus.parse(status_text)
+        return cls(
+            account_id=get('accountId'),
+            customer_name='' if error else name,
+            customer_class=get('customerClass'),
+            mobile_number=normalize_phone(get('mobileNumber')),
+            email=get('emailId').lower(),
+            account_type=get('accountType'),
+            balance=None if error else parse_decimal(balance_text),
+            status=status,
+            # Raw text is only kept when it does not map to a known status
+            status_text=status_text if status is ConnectionStatus.UNKNOWN else '',
+            customer_type=get('customerType'),
+            min_recharge=parse_decimal(get('minRecharge')),
+            error=error,
+            error_message=error_message
+        )
+    
+    @classmethod
+    def failure(cls, account_id, error, message=''):
+        return cls(account_id=account_id, error=error, error_message=message)
+    
+    @property
+    def is_error(self):
+        return self.error is not None
+    
+    @property
+    def has_data(self):
+        return any(self.to_fields().values())
+    
+    def _status_display(self):
+        return self.status.value or self.status_text
+    
+    def to_fields(self):
+        """Normalized values under the record field names (JSON-safe, amounts as exact strings)"""
+        return {
+            'accountId': self.account_id,
+            'customerName': self.customer_name,
+            'customerClass': self.customer_class,
+            'mobileNumber': self.mobile_number,
+            'emailId': self.email,
+            'accountType': self.account_type,
+            'balanceRemaining': '' if self.balance is None else str(self.balance),
+            'connectionStatus': self._status_display(),
+            'customerType': self.customer_type,
+            'minRecharge': '' if self.min_recharge is None else str(self.min_recharge),
+        }
+    
+    def to_dict(self):
+        """to_fields() plus the error flag; round-trips through from_fields()"""
+        data = self.to_fields()
+        data['error'] = self.error.value if self.error else ''
+        data['errorMessage'] = self.error_message
+        if self.forecast is not None:
+            data['forecast'] = self.forecast.to_dict()
+        return data
+    
+    def to_row(self, timestamp):
+        """Sheet row: amounts as numbers, error rows in the sheet's established wording"""
+        if self.error is ReadingError.FETCH_ERROR:
+            name, balance = f'{LEGACY_FETCH_ERROR_PREFIX}{self.error_message[:100]}', LEGACY_FETCH_ERROR_BALANCE
+        elif self.error is ReadingError.EXTRACTION_FAILED:
+            name, balance = LEGACY_EXTRACTION_FAILED_NAME, LEGACY_EXTRACTION_FAILED_BALANCE
+        elif self.error is ReadingError.TIMEOUT:
+            name, balance = f'{TIMEOUT_PREFIX}{self.error_message[:100]}', TIMEOUT_BALANCE
+        else:
+            name, balance = self.customer_name, '' if self.balance is None else float(self.balance)
+        return [
+            timestamp,
+            self.account_id,
+            name,
+            self.customer_class,
+            self.mobile_number,
+            self.email,
+            self.account_type,
+            balance,
+            self._status_display(),
+            self.customer_type,
+            '' if self.min_recharge is None else float(self.min_recharge),
+        ]
+    
+    def content_hash(self):
+        """Hash of the parsed content, for change detection"""
+        content = json.dumps([self.to_dict()[f] for f in RECORD_FIELDS + ['error']], ensure_ascii=False)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+    
+    def __eq__(self, other):
+        return isinstance(other, Reading) and all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__ if slot not in self.DERIVED)
+    
+    def __repr__(self):
+        if self.error:
+            return f'Reading({self.account_id!r}, error={self.error.value}, {self.error_message!r})'
+        return (f'Reading({self.account_id!r}, balance={self.balance}, min_recharge={self.min_recharge}, '
+                f'status={self.status.name})')
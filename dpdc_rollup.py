@@ -0,0 +1,300 @@
+"""
+Incremental daily and monthly rollups.
+
+Each accepted reading updates only its day row and month row: the running
+totals live in SQLite next to the spool, and the changed rows are pushed to a
+"Rollup" worksheet with a single batch_update. The worksheet header, the column
+map and the sheet row of every period are cached, so a run costs O(1) API work
+no matter how long the history in sheet1 grows.
+
+Consumption is the sum of balance decreases between consecutive readings and
+"Recharged" the sum of increases (prepaid meters).
+
+    python dpdc_rollup.py rebuild    # recompute from the local reading store and rewrite the sheet
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from dpdc_spool import DEFAULT_SPOOL_PATH
+
+DEFAULT_ROLLUP_SHEET = 'Rollup'
+
+# Header text → rollup table column
+ROLLUP_COLUMNS = [
+    ('Period', 'period'),
+    ('Account', 'account_id'),
+    ('Opening balance', 'opening'),
+    ('Closing balance', 'closing'),
+    ('Consumption', 'consumption'),
+    ('Recharged', 'recharged'),
+    ('Readings', 'readings'),
+    ('Updated', 'updated'),
+]
+KEY_HEADERS = ('Period', 'Account')
+
+
+def column_letter(index):
+    """0-based column index to its A1 letters (0 → A, 26 → AA)"""
+    letters = ''
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def periods_for(timestamp):
+    """Day and month periods a 'YYYY-MM-DD HH:MM:SS' timestamp falls into"""
+    return timestamp[:10], timestamp[:7]
+
+
+class Rollup:
+    def __init__(self, path=DEFAULT_SPOOL_PATH, sheet_title=DEFAULT_ROLLUP_SHEET):
+        self.path = path
+        self.sheet_title = sheet_title
+        self.worksheet = None
+        self.columns = None
+        # Written from the output fan-out thread pool; only the sheets sink touches it
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS rollup (
+                period TEXT NOT NULL,
+                account_id TEXT NOT NULL,
+                opening REAL,
+                closing REAL,
+                consumption REAL NOT NULL DEFAULT 0,
+                recharged REAL NOT NULL DEFAULT 0,
+                readings INTEGER NOT NULL DEFAULT 0,
+                updated TEXT,
+                sheet_row INTEGER,
+                dirty INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (period, account_id)
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS rollup_dirty ON rollup (dirty)')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS rollup_last (
+                account_id TEXT PRIMARY KEY,
+                ts TEXT NOT NULL,
+                balance REAL NOT NULL
+            )
+        """)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS rollup_meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.commit()
+
+    @classmethod
+    def from_env(cls):
+        """DPDC_ROLLUP_SHEET names the worksheet (default 'Rollup'); empty disables rollups"""
+        title = os.environ.get('DPDC_ROLLUP_SHEET', DEFAULT_ROLLUP_SHEET)
+        if not title:
+            return None
+        return cls(os.environ.get('DPDC_SPOOL_PATH', DEFAULT_SPOOL_PATH), title)
+
+    def _get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM rollup_meta WHERE key = ?', (f'{self.sheet_title}:{key}',)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO rollup_meta VALUES (?, ?)',
+                          (f'{self.sheet_title}:{key}', json.dumps(value)))
+
+    def apply(self, timestamp, reading):
+        """
+        Fold one reading into its day and month rows
+        Error readings and readings not newer than the last one applied are ignored;
+        returns True if the rollup changed
+        """
+        if reading.is_error or reading.balance is None:
+            return False
+        balance = float(reading.balance)
+        account_id = reading.account_id
+
+        with self.conn:
+            last = self.conn.execute(
+                'SELECT ts, balance FROM rollup_last WHERE account_id = ?', (account_id,)
+            ).fetchone()
+            if last and timestamp <= last['ts']:
+                return False
+            previous = last['balance'] if last else balance
+            delta = round(previous - balance, 2)
+            consumption, recharged = max(delta, 0), max(-delta, 0)
+
+            for period in periods_for(timestamp):
+                self.conn.execute("""
+                    INSERT INTO rollup (period, account_id, opening, closing, consumption, recharged, readings, updated)
+                    VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+                    ON CONFLICT (period, account_id) DO UPDATE SET
+                        closing = excluded.closing,
+                        consumption = round(consumption + excluded.consumption, 2),
+                        recharged = round(recharged + excluded.recharged, 2),
+                        readings = readings + 1,
+                        updated = excluded.updated,
+                        dirty = 1
+                """, (period, account_id, previous, balance, consumption, recharged, timestamp))
+            self.conn.execute('INSERT OR REPLACE INTO rollup_last VALUES (?, ?, ?)', (account_id, timestamp, balance))
+        return True
+
+    def pending(self):
+        """Number of rollup rows not yet written to the sheet"""
+        return self.conn.execute('SELECT COUNT(*) FROM rollup WHERE dirty = 1').fetchone()[0]
+
+    def open_worksheet(self, spreadsheet):
+        """The rollup worksheet, created with its header if missing; cached for the process"""
+        if self.worksheet is not None and self.worksheet.spreadsheet.id == spreadsheet.id:
+            return self.worksheet
+        existing = [ws for ws in spreadsheet.worksheets() if ws.title == self.sheet_title]
+        if existing:
+            self.worksheet = existing[0]
+        else:
+            self.worksheet = spreadsheet.add_worksheet(self.sheet_title, rows=1000, cols=len(ROLLUP_COLUMNS))
+        return self.worksheet
+
+    def column_map(self, worksheet):
+        """
+        {table column: sheet column index}, from memory, the local cache, or (once)
+        the worksheet itself; reading the sheet also recovers the row of each period
+        """
+        if self.columns is None:
+            self.columns = self._get_meta('columns')
+        if self.columns is not None:
+            return self.columns
+
+        values = worksheet.get_all_values()
+        header = [cell.strip() for cell in values[0]] if values else []
+        if not any(header):
+            header = [name for name, _ in ROLLUP_COLUMNS]
+            worksheet.update(values=[header], range_name='A1')
+            values = [header]
+
+        missing = [name for name in KEY_HEADERS if name not in header]
+        if missing:
+            raise ValueError(f"Rollup sheet '{self.sheet_title}' has no {', '.join(missing)} column")
+        columns = {key: header.index(name) for name, key in ROLLUP_COLUMNS if name in header}
+
+        # Re-attach rows already on the sheet (local state lost or rebuilt elsewhere)
+        with self.conn:
+            for sheet_row, row in enumerate(values[1:], start=2):
+                row = row + [''] * (len(header) - len(row))
+                self.conn.execute(
+                    'UPDATE rollup SET sheet_row = ? WHERE period = ? AND account_id = ?',
+                    (sheet_row, row[columns['period']], row[columns['account_id']])
+                )
+            self._set_meta('columns', columns)
+            self._set_meta('next_row', len(values) + 1)
+        self.columns = columns
+        return columns
+
+    def _ranges(self, columns, sheet_row, row):
+        """batch_update entries for one rollup row, one per run of adjacent rollup columns"""
+        cells = sorted((index, row[key]) for key, index in columns.items())
+        data = []
+        for index, value in cells:
+            value = '' if value is None else value
+            if data and data[-1]['end'] == index - 1:
+                data[-1]['values'][0].append(value)
+                data[-1]['end'] = index
+            else:
+                data.append({'start': index, 'end': index, 'values': [[value]]})
+        return [{
+            'range': f"{column_letter(run['start'])}{sheet_row}:{column_letter(run['end'])}{sheet_row}",
+            'values': run['values']
+        } for run in data]
+
+    def push(self, spreadsheet):
+        """
+        Write every changed day/month row with one batch_update
+        Returns the number of rows written; raises on API failure (rows stay pending)
+        """
+        dirty = self.conn.execute('SELECT * FROM rollup WHERE dirty = 1 ORDER BY period, account_id').fetchall()
+        if not dirty:
+            return 0
+        worksheet = self.open_worksheet(spreadsheet)
+        columns = self.column_map(worksheet)
+
+        next_row = self._get_meta('next_row') or 2
+        assigned = {}
+        data = []
+        for row in dirty:
+            sheet_row = row['sheet_row']
+            if not sheet_row:
+                sheet_row, next_row = next_row, next_row + 1
+                assigned[(row['period'], row['account_id'])] = sheet_row
+            data.extend(self._ranges(columns, sheet_row, row))
+
+        if next_row > worksheet.row_count:
+            worksheet.add_rows(max(next_row - worksheet.row_count, 500))
+        worksheet.batch_update(data, value_input_option='RAW')
+
+        with self.conn:
+            self.conn.executemany(
+                'UPDATE rollup SET sheet_row = ? WHERE period = ? AND account_id = ?',
+                [(sheet_row, period, account_id) for (period, account_id), sheet_row in assigned.items()]
+            )
+            self.conn.executemany(
+                'UPDATE rollup SET dirty = 0 WHERE period = ? AND account_id = ? AND updated = ?',
+                [(row['period'], row['account_id'], row['updated']) for row in dirty]
+            )
+            self._set_meta('next_row', next_row)
+        return len(dirty)
+
+    def reset(self):
+        """Drop all rollup state and cached sheet layout"""
+        with self.conn:
+            self.conn.execute('DELETE FROM rollup')
+            self.conn.execute('DELETE FROM rollup_last')
+            self.conn.execute('DELETE FROM rollup_meta WHERE key LIKE ?', (f'{self.sheet_title}:%',))
+        self.columns = None
+
+    def checkpoint(self):
+        """Merge the WAL into the spool database (shared with RecordSpool)"""
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daily and monthly rollups of DPDC readings")
+    parser.add_argument('--spool', default=os.environ.get('DPDC_SPOOL_PATH', DEFAULT_SPOOL_PATH))
+    parser.add_argument('--sheet', default=os.environ.get('DPDC_ROLLUP_SHEET') or DEFAULT_ROLLUP_SHEET)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('rebuild', help="Recompute every rollup from the local store and rewrite the sheet")
+    sub.add_parser('pending', help="Number of rollup rows waiting to be written")
+    args = parser.parse_args(argv)
+
+    rollup = Rollup(args.spool, args.sheet)
+    if args.command == 'pending':
+        print(rollup.pending())
+        return 0
+
+    from dpdc_automation import authorize_gspread
+    from dpdc_record import Reading
+    from dpdc_store import ReadingStore, DEFAULT_STORE_PATH
+
+    spreadsheet_id = os.environ.get('SPREADSHEET_ID')
+    if not spreadsheet_id:
+        print("✗ SPREADSHEET_ID not set")
+        return 1
+    spreadsheet = authorize_gspread().open_by_key(spreadsheet_id)
+    store = ReadingStore(os.environ.get('DPDC_STORE_PATH', DEFAULT_STORE_PATH))
+
+    rollup.reset()
+    applied = 0
+    for account_id in store.accounts():
+        for row in store.range(account_id):
+            applied += rollup.apply(row['timestamp'], Reading.from_fields(row))
+    worksheet = rollup.open_worksheet(spreadsheet)
+    worksheet.clear()
+    written = rollup.push(spreadsheet)
+    print(f"✓ Rebuilt rollups from {applied} readings ({written} rows)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Adaptive polling schedule.
+
+After every run the next poll time is derived from the balance trajectory: the
+interval is the time left until the balance reaches the minimum recharge (the
+earliest depletion bound of the forecast, when there is one) divided by the
+number of readings we want before that happens, so polling tightens as
+depletion approaches. Until the forecast has a usage rate the interval is
+DPDC_POLL_LEARNING_HOURS; while the balance is not moving it backs off
+geometrically, and failed runs retry with their own backoff. Everything is
+clamped to [DPDC_POLL_MIN_HOURS, DPDC_POLL_MAX_HOURS].
+
+The decision is written atomically to DPDC_NEXT_RUN_PATH (next_run.json) for
+the daemon (DPDC_SCHEDULE=adaptive) or an external cron gate to follow:
+
+    python dpdc_schedule.py due && python dpdc_automation.py    # exit 1 when not due yet
+    python dpdc_schedule.py show
+"""
+from datetime import datetime, timedelta
+import argparse
+import json
+import os
+import sys
+
+DEFAULT_NEXT_RUN_PATH = 'next_run.json'
+DEFAULT_MIN_HOURS = 1
+DEFAULT_MAX_HOURS = 24
+# Readings wanted between now and the balance reaching the minimum recharge
+DEFAULT_SAMPLES = 6
+DEFAULT_BACKOFF = 1.5
+# Interval while the forecast has no usage rate yet (first readings of an account)
+DEFAULT_LEARNING_HOURS = 6
+# A cron gate fires on the hour; treat a run due within this many minutes as due now
+DEFAULT_GRACE_MINUTES = 10
+# Daily usage below this counts as a flat balance
+STABLE_USAGE = 0.01
+
+
+class PollScheduler:
+    def __init__(self, path=DEFAULT_NEXT_RUN_PATH, min_hours=DEFAULT_MIN_HOURS, max_hours=DEFAULT_MAX_HOURS,
+                 samples=DEFAULT_SAMPLES, backoff=DEFAULT_BACKOFF, learning_hours=DEFAULT_LEARNING_HOURS):
+        self.path = path
+        self.min_hours = min_hours
+        self.max_hours = max_hours
+        self.samples = samples
+        self.backoff = backoff
+        self.learning_hours = learning_hours
+
+    @classmethod
+    def from_env(cls):
+        """DPDC_NEXT_RUN_PATH names the decision file; empty disables the schedule"""
+        path = os.environ.get('DPDC_NEXT_RUN_PATH', DEFAULT_NEXT_RUN_PATH)
+        if not path:
+            return None
+        return cls(
+            path,
+            min_hours=float(os.environ.get('DPDC_POLL_MIN_HOURS', DEFAULT_MIN_HOURS)),
+            max_hours=float(os.environ.get('DPDC_POLL_MAX_HOURS', DEFAULT_MAX_HOURS)),
+            samples=int(os.environ.get('DPDC_POLL_SAMPLES', DEFAULT_SAMPLES)),
+            backoff=float(os.environ.get('DPDC_POLL_BACKOFF', DEFAULT_BACKOFF)),
+            learning_hours=float(os.environ.get('DPDC_POLL_LEARNING_HOURS', DEFAULT_LEARNING_HOURS))
+        )
+
+    def load(self):
+        """The last decision written, or None"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, decision):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(decision, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clamp(self, hours):
+        return min(max(hours, self.min_hours), self.max_hours)
+
+    def decide(self, now, reading=None, previous=None):
+        """
+        Next poll after a run that produced reading (None when the run failed before
+        fetching); previous is the last decision, for the backoff state
+        """
+        previous = previous or {}
+        previous_hours = previous.get('intervalHours') or self.min_hours
+        decision = {'decidedAt': now.strftime('%Y-%m-%d %H:%M:%S'), 'failures': 0}
+
+        if reading is None or reading.is_error or reading.balance is None:
+            # No balance, no trajectory: retry like a failed run
+            failures = previous.get('failures', 0) + 1
+            hours = self.clamp(self.min_hours * self.backoff ** (failures - 1))
+            what = 'run failed' if reading is None or reading.is_error else 'no balance in reading'
+            reason = f'{what} ({failures} in a row)'
+            decision.update(failures=failures)
+        else:
+            balance = float(reading.balance)
+            forecast = reading.forecast
+            depletion = forecast and (forecast.earliest or forecast.depletion)
+            unchanged = previous.get('balance') is not None and abs(previous['balance'] - balance) < STABLE_USAGE
+            learning = forecast is None or forecast.daily_usage is None
+            flat = not learning and forecast.daily_usage < STABLE_USAGE
+
+            if learning:
+                # Not enough history for a usage rate: poll at the learning interval to build one
+                hours = self.clamp(self.learning_hours)
+                reason = 'no trajectory yet'
+            elif depletion is not None and not flat:
+                hours_left = (depletion - forecast.as_of).total_seconds() / 3600
+                hours = self.clamp(hours_left / self.samples)
+                reason = ('at or below minimum recharge' if hours_left <= 0
+                          else f'~{hours_left / 24:.1f} days to minimum recharge')
+                if unchanged and hours_left > 0:
+                    # No movement since the last poll: stretch towards the trajectory's interval
+                    hours = min(hours, self.clamp(previous_hours * self.backoff))
+                    reason += ', balance unchanged'
+            else:
+                # Usage is flat (or there is no depletion date to aim for): back off
+                hours = self.clamp(previous_hours * self.backoff)
+                reason = 'balance stable, backing off'
+            decision['balance'] = balance
+            if forecast:
+                data = forecast.to_dict()
+                decision.update(daysLeft=data['daysLeft'], depletion=data['depletionEarliest'] or data['depletionDate'])
+
+        decision.update(
+            nextRun=(now + timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S'),
+            intervalHours=round(hours, 2),
+            reason=reason,
+        )
+        return decision
+
+    def next_run(self, decision=None):
+        """When the saved (or given) decision says to poll next; None without one"""
+        decision = decision if decision is not None else self.load()
+        if not decision:
+            return None
+        return datetime.strptime(decision['nextRun'], '%Y-%m-%d %H:%M:%S')
+
+    def is_due(self, now, grace_minutes=DEFAULT_GRACE_MINUTES):
+        due = self.next_run()
+        return due is None or now >= due - timedelta(minutes=grace_minutes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Adaptive polling schedule")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('show', help="Print the last decision")
+    due = sub.add_parser('due', help="Exit 0 when a run is due, 1 otherwise")
+    due.add_argument('--grace-minutes', type=float,
+                     default=float(os.environ.get('DPDC_POLL_GRACE_MINUTES', DEFAULT_GRACE_MINUTES)))
+    args = parser.parse_args(argv)
+
+    scheduler = PollScheduler.from_env()
+    if scheduler is None:
+        print("DPDC_NEXT_RUN_PATH is empty: adaptive schedule disabled")
+        return 0
+    decision = scheduler.load()
+    if args.command == 'show':
+        print(json.dumps(decision, ensure_ascii=False, indent=2) if decision else 'No decision yet')
+        return 0
+
+    if scheduler.is_due(datetime.now(), args.grace_minutes):
+        print(f"✓ Run due ({decision['reason'] if decision else 'no decision yet'})")
+        return 0
+    print(f"💤 Next run at {decision['nextRun']} ({decision['reason']})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""
+Pluggable output sinks with concurrent fan-out.
+
+Each sink writes one (timestamp, Reading) pair somewhere. fan_out runs every
+configured sink in parallel on a thread pool with its own timeout and error
+isolation, so a slow or failing Sheets API never holds up or drops the local
+copies, and reports per-sink latency.
+
+A sink whose write has a single commit point (the Sheets sink's spool append)
+takes it through a CommitGate. When fan_out gives up on a timed-out sink it
+closes the gate, so the write still running in the background can no longer
+commit, and the result says whether the record was committed before that.
+"""
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+import csv
+import json
+import os
+import threading
+import time
+import urllib.request
+
+DEFAULT_SINKS = 'sheets,sqlite'
+
+
+class SinkCancelled(Exception):
+    pass
+
+
+class CommitGate:
+    """Decides, once, between a sink committing its write and fan_out giving up on it"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = None
+    
+    @contextmanager
+    def commit(self):
+        """Hold the gate for the commit step; raises SinkCancelled if fan_out gave up first"""
+        with self.lock:
+            if self.state == 'cancelled':
+                raise SinkCancelled("sink timed out before committing")
+            yield
+            self.state = 'committed'
+    
+    def cancel(self):
+        """Stop a late commit; returns True if the write had already committed"""
+        with self.lock:
+            if self.state is None:
+                self.state = 'cancelled'
+            return self.state == 'committed'
+    
+    @property
+    def committed(self):
+        return self.state == 'committed'
+
+
+class Sink:
+    name = 'sink'
+    timeout = 30
+    
+    def write(self, timestamp, reading, gate):
+        """Write one record; sinks with a distinct commit step take it through gate.commit()"""
+        raise NotImplementedError
+
+
+class GoogleSheetsSink(Sink):
+    """Spool + batched flush to sheet1 (DPDCAutomation.update_google_sheet)"""
+    name = 'sheets'
+    timeout = 60
+    
+    def __init__(self, automation, spreadsheet_id):
+        self.automation = automation
+        self.spreadsheet_id = spreadsheet_id
+    
+    def write(self, timestamp, reading, gate):
+        if not self.automation.update_google_sheet(self.spreadsheet_id, reading, timestamp, gate):
+            raise Exception("sheet update failed (record kept in spool)")
+
+
+class SqliteSink(Sink):
+    """Local reading history (dpdc_store.ReadingStore)"""
+    name = 'sqlite'
+    timeout = 10
+    
+    def __init__(self, store):
+        self.store = store
+    
+    def write(self, timestamp, reading, gate):
+        self.store.add(timestamp, reading)
+
+
+class CsvSink(Sink):
+    name = 'csv'
+    timeout = 10
+    # Flattened from the reading's forecast, blank when there is none
+    FORECAST_COLUMNS = ('dailyUsage', 'daysLeft', 'depletionDate', 'depletionEarliest', 'depletionLatest')
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def rotate_if_mismatched(self, header):
+        """
+        Move an existing file written with different columns aside (path.<mtime>.csv)
+        so rows never land under the wrong header; returns True if the file is new
+        """
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return True
+        with open(self.path, newline='', encoding='utf-8') as f:
+            existing = next(csv.reader(f), [])
+        if existing == header:
+            return False
+        base, ext = os.path.splitext(self.path)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(os.path.getmtime(self.path)))
+        rotated = f'{base}.{stamp}{ext or ".csv"}'
+        os.replace(self.path, rotated)
+        print(f"   ⚠ {self.path} has different columns; moved it to {rotated} and started a new file")
+        return True
+    
+    def write(self, timestamp, reading, gate):
+        data = reading.to_dict()
+        forecast = data.pop('forecast', None) or {}
+        data.update((column, forecast.get(column, '')) for column in self.FORECAST_COLUMNS)
+        header = ['timestamp'] + list(data)
+        new_file = self.rotate_if_mismatched(header)
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(header)
+            writer.writerow([timestamp] + list(data.values()))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class JsonlSink(Sink):
+    name = 'jsonl'
+    timeout = 10
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def write(self, timestamp, reading, gate):
+        line = json.dumps(dict({'timestamp': timestamp}, **reading.to_dict()), ensure_ascii=False)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class WebhookSink(Sink):
+    """POST the record as JSON"""
+    name = 'webhook'
+    timeout = 15
+    
+    def __init__(self, url):
+        self.url = url
+    
+    def write(self, timestamp, reading, gate):
+        body = json.dumps(dict({'timestamp': timestamp}, **reading.to_dict()), ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status >= 300:
+                raise Exception(f"webhook returned HTTP {response.status}")
+
+
+def sinks_from_env(automation, spreadsheet_id):
+    """
+    Sinks named in DPDC_SINKS (default 'sheets,sqlite'); per-sink timeouts from
+    DPDC_SINK_TIMEOUTS, e.g. 'sheets=45,webhook=5'
+    """
+    names = [n.strip() for n in os.environ.get('DPDC_SINKS', DEFAULT_SINKS).split(',') if n.strip()]
+    sinks = []
+    for name in names:
+        if name == 'sheets':
+            sinks.append(GoogleSheetsSink(automation, spreadsheet_id))
+        elif name == 'sqlite':
+            sinks.append(SqliteSink(automation.store))
+        elif name == 'csv':
+            sinks.append(CsvSink(os.environ.get('DPDC_CSV_PATH', 'readings.csv')))
+        elif name == 'jsonl':
+            sinks.append(JsonlSink(os.environ.get('DPDC_JSONL_PATH', 'readings.jsonl')))
+        elif name == 'webhook':
+            url = os.environ.get('DPDC_WEBHOOK_URL')
+            if not url:
+                print("   ⚠ webhook sink configured without DPDC_WEBHOOK_URL, skipping")
+                continue
+            sinks.append(WebhookSink(url))
+        else:
+            print(f"   ⚠ Unknown sink '{name}', skipping")
+    
+    for item in os.environ.get('DPDC_SINK_TIMEOUTS', '').split(','):
+        if '=' not in item:
+            continue
+        name, seconds = item.split('=', 1)
+        for sink in sinks:
+            if sink.name == name.strip():
+                sink.timeout = float(seconds)
+    return sinks
+
+
+def _timed_write(sink, timestamp, reading, gate):
+    """(seconds, error message) for one sink write; never raises"""
+    start = time.perf_counter()
+    try:
+        sink.write(timestamp, reading, gate)
+        error = ''
+    except Exception as e:
+        error = str(e)[:200] or e.__class__.__name__
+    return time.perf_counter() - start, error
+
+
+def fan_out(sinks, timestamp, reading, in_flight=None):
+    """
+    Write one record to every sink in parallel
+    Returns {sink name: {'ok': bool, 'committed': bool, 'seconds': float, 'error': str}}; committed
+    means the record is durably taken (a sink that failed after its commit step still delivers it)
+    The futures of sinks that timed out are appended to in_flight (a list) when given
+    """
+    results = {}
+    if not sinks:
+        return results
+    
+    executor = ThreadPoolExecutor(max_workers=len(sinks), thread_name_prefix='sink')
+    start = time.perf_counter()
+    gates = {sink.name: CommitGate() for sink in sinks}
+    futures = [(sink, executor.submit(_timed_write, sink, timestamp, reading, gates[sink.name])) for sink in sinks]
+    
+    for sink, future in futures:
+        remaining = sink.timeout - (time.perf_counter() - start)
+        gate = gates[sink.name]
+        try:
+            seconds, error = future.result(timeout=max(0, remaining))
+            results[sink.name] = {'ok': not error, 'committed': not error or gate.committed,
+                                  'seconds': round(seconds, 3), 'error': error}
+        except FutureTimeoutError:
+            results[sink.name] = {'ok': False, 'committed': gate.cancel(),
+                                  'seconds': round(time.perf_counter() - start, 3),
+                                  'error': f'timed out after {sink.timeout}s'}
+            if in_flight is not None:
+                in_flight.append(future)
+    
+    # Do not wait for sinks that timed out. A write that had not committed yet can no longer
+    # commit, but one past its commit step keeps running (e.g. the spool flush): the caller
+    # must wait for in_flight before closing anything those writes use
+    executor.shutdown(wait=False)
+    return results
@@ -0,0 +1,142 @@
+"""
+Durable local spool for sheet rows.
+
+Every row is committed to SQLite before any network call is made, then flushed to
+the worksheet in a single append_rows request and marked committed. Rows survive
+quota errors and outages and go out together on the next successful flush.
+
+The spool also remembers a content hash of the last record accepted per account,
+and the sheet row it landed on, so unchanged readings can be skipped or only
+have their "last seen" cell refreshed.
+"""
+from datetime import datetime
+import hashlib
+import json
+import re
+import sqlite3
+
+from dpdc_extraction import RECORD_FIELDS
+
+DEFAULT_SPOOL_PATH = 'dpdc_spool.sqlite3'
+
+# What to do with a record identical to the last one for its account
+UNCHANGED_POLICIES = ('append', 'skip', 'touch')
+
+
+def legacy_row_hash(row):
+    """The content hash spooled before the typed Reading: sha256 of the row's raw field cells"""
+    content = json.dumps(row[1:1 + len(RECORD_FIELDS)], ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class RecordSpool:
+    def __init__(self, path=DEFAULT_SPOOL_PATH):
+        self.path = path
+        # Written from the output fan-out thread pool; each instance is used by one sink at a time
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # Force every commit to disk before we rely on it
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=FULL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS spool (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at TEXT NOT NULL,
+                row_json TEXT NOT NULL,
+                committed_at TEXT
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS spool_pending ON spool (committed_at, id)')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS last_record (
+                account_id TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                spool_id INTEGER,
+                sheet_row INTEGER
+            )
+        """)
+        self.conn.commit()
+    
+    def append(self, row, account_id=None, content_hash=None):
+        """Durably store one sheet row; returns its spool id"""
+        with self.conn:
+            cur = self.conn.execute(
+                'INSERT INTO spool (created_at, row_json) VALUES (?, ?)',
+                (datetime.now().isoformat(timespec='seconds'), json.dumps(row, ensure_ascii=False))
+            )
+            if account_id and content_hash:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO last_record (account_id, content_hash, spool_id, sheet_row) VALUES (?, ?, ?, NULL)',
+                    (account_id, content_hash, cur.lastrowid)
+                )
+        return cur.lastrowid
+    
+    def last_record(self, account_id, rehash=None):
+        """
+        (content_hash, sheet_row) of the last record accepted for an account, or None
+        A hash stored before the typed Reading is replaced, once, by rehash(raw fields of its row)
+        """
+        found = self.conn.execute(
+            'SELECT content_hash, sheet_row, spool_id FROM last_record WHERE account_id = ?', (account_id,)
+        ).fetchone()
+        if found is None:
+            return None
+        content_hash, sheet_row, spool_id = found
+        if rehash is not None and spool_id is not None:
+            stored = self.conn.execute('SELECT row_json FROM spool WHERE id = ?', (spool_id,)).fetchone()
+            row = json.loads(stored[0]) if stored else None
+            if row and legacy_row_hash(row) == content_hash:
+                content_hash = rehash(dict(zip(RECORD_FIELDS, row[1:])))
+                with self.conn:
+                    self.conn.execute('UPDATE last_record SET content_hash = ? WHERE account_id = ?',
+                                      (content_hash, account_id))
+        return content_hash, sheet_row
+    
+    def pending(self):
+        """All rows not yet written to the sheet, oldest first, as (id, row)"""
+        cur = self.conn.execute('SELECT id, row_json FROM spool WHERE committed_at IS NULL ORDER BY id')
+        return [(row_id, json.loads(row_json)) for row_id, row_json in cur]
+    
+    def mark_committed(self, ids):
+        if not ids:
+            return
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.conn:
+            self.conn.executemany('UPDATE spool SET committed_at = ? WHERE id = ?', [(now, i) for i in ids])
+    
+    def flush(self, worksheet):
+        """
+        Push every pending row with one append_rows call and mark them committed
+        Returns the number of rows flushed; raises if the API call fails (rows stay pending)
+        """
+        pending = self.pending()
+        if not pending:
+            return 0
+        response = worksheet.append_rows([row for _, row in pending])
+        ids = [row_id for row_id, _ in pending]
+        self.mark_committed(ids)
+        self._record_sheet_rows(ids, response)
+        return len(pending)
+    
+    def _record_sheet_rows(self, ids, response):
+        """Remember which sheet row each flushed record landed on, from append_rows' updatedRange"""
+        try:
+            updated_range = response['updates']['updatedRange']
+        except (TypeError, KeyError):
+            return
+        match = re.search(r'![A-Z]+(\d+)', updated_range)
+        if not match:
+            return
+        first_row = int(match.group(1))
+        with self.conn:
+            self.conn.executemany(
+                'UPDATE last_record SET sheet_row = ? WHERE spool_id = ?',
+                [(first_row + offset, spool_id) for offset, spool_id in enumerate(ids)]
+            )
+    
+    def checkpoint(self):
+        """Fold the WAL back into the database file (only the main file is cached between CI runs)"""
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
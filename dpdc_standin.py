@@ -0,0 +1,341 @@
+"""
+Local stand-in for the DPDC portal.
+
+Serves a homepage with a QUICK PAY button, the quick-pay form (with a local
+checkbox frame at the reCAPTCHA anchor path), and the JSON result endpoint the
+form calls, which also renders the record as "Label: value" lines. Latency and
+failures are injected from a seeded RNG, so the full browser pipeline can be
+run and timed offline:
+
+    python dpdc_standin.py serve --port 8800 --latency 0.2 --failure-rate 0.1
+    DPDC_BASE_URL=http://127.0.0.1:8800 python dpdc_automation.py
+
+    python dpdc_standin.py bench --runs 5    # fetch_usage_data against the stand-in
+
+Recorded pages can replace the built-in ones: put homepage.html, quick_pay.html
+and/or result.json in a directory and pass --pages DIR ("{{customer}}" in
+result.json is replaced by the requested customer number).
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import zlib
+
+DEFAULT_PORT = 8800
+FAILURE_MODES = ('error', 'empty', 'hang')
+# Longer than fetch_usage_data waits for a result
+HANG_SECONDS = 30
+
+HOMEPAGE_HTML = """<!DOCTYPE html>
+<html><head><title>DPDC AMI</title></head>
+<body>
+<h1>Dhaka Power Distribution Company</h1>
+<input type="text" placeholder="Search">
+<button onclick="location.href='/quick-pay'">QUICK PAY</button>
+</body></html>
+"""
+
+QUICK_PAY_HTML = """<!DOCTYPE html>
+<html><head><title>Quick Pay</title></head>
+<body>
+<h2>Quick Pay</h2>
+<form id="quick-pay">
+  <input type="text" name="customerNo" placeholder="Customer Number">
+  <iframe src="/recaptcha/api2/anchor?k=standin" width="300" height="80"></iframe>
+  <button type="submit">Submit</button>
+</form>
+<div id="result"></div>
+<script>
+document.getElementById('quick-pay').addEventListener('submit', function (event) {
+    event.preventDefault();
+    var result = document.getElementById('result');
+    var customer = document.querySelector('input[name=customerNo]').value;
+    fetch('/api/quick-pay?customerNo=' + encodeURIComponent(customer))
+        .then(function (response) {
+            if (!response.ok) { throw new Error('HTTP ' + response.status); }
+            return response.json();
+        })
+        .then(function (payload) {
+            var account = payload.data || {};
+            var labels = {
+                accountNo: 'Account Number', customerName: 'Customer Name', customerClass: 'Customer Class',
+                mobileNo: 'Mobile Number', email: 'Email', accountType: 'Account Type',
+                balanceRemaining: 'Balance Remaining', connectionStatus: 'Connection Status',
+                customerType: 'Customer Type', minRecharge: 'Minimum Recharge'
+            };
+            if (!account.accountNo) { result.innerText = 'No data found'; return; }
+            Object.keys(labels).forEach(function (key) {
+                var line = document.createElement('div');
+                line.innerText = labels[key] + ': ' + (account[key] === undefined ? '' : account[key]);
+                result.appendChild(line);
+            });
+        })
+        .catch(function (error) { result.innerText = 'Service unavailable: ' + error.message; });
+});
+</script>
+</body></html>
+"""
+
+ANCHOR_HTML = """<!DOCTYPE html>
+<html><body>
+<span id="recaptcha-anchor" role="checkbox" aria-checked="false" tabindex="0"
+      onclick="this.setAttribute('aria-checked', 'true')">I'm not a robot</span>
+</body></html>
+"""
+
+
+def default_result(customer, lookups):
+    """Deterministic account for a customer number; the balance drops with every lookup"""
+    base = 400 + zlib.crc32(customer.encode('utf-8')) % 1600
+    return {
+        'status': 'success',
+        'data': {
+            'accountNo': customer,
+            'customerName': f'Stand-in Customer {customer[-4:]}',
+            'customerClass': 'LT-A',
+            'mobileNo': '01700000000',
+            'email': 'standin@example.com',
+            'accountType': 'Prepaid',
+            'balanceRemaining': f'{base - 6.25 * lookups:.2f}',
+            'connectionStatus': 'Active',
+            'customerType': 'Residential',
+            'minRecharge': '100.00',
+        }
+    }
+
+
+class StandInSite:
+    """Pages, latency/failure settings and request counters shared by the handler threads"""
+
+    def __init__(self, latency=0.0, api_latency=0.0, jitter=0.0, failure_rate=0.0, failure_mode='error',
+                 seed=0, pages_dir=None):
+        if failure_mode not in FAILURE_MODES:
+            raise ValueError(f"failure_mode must be one of {', '.join(FAILURE_MODES)}")
+        self.latency = latency
+        self.api_latency = api_latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.lookups = {}
+        self.failures = 0
+        self.pages = {
+            '/': HOMEPAGE_HTML,
+            '/quick-pay': QUICK_PAY_HTML,
+            '/recaptcha/api2/anchor': ANCHOR_HTML,
+        }
+        self.result_template = None
+        if pages_dir:
+            for path, name in (('/', 'homepage.html'), ('/quick-pay', 'quick_pay.html')):
+                file_path = os.path.join(pages_dir, name)
+                if os.path.exists(file_path):
+                    with open(file_path, encoding='utf-8') as f:
+                        self.pages[path] = f.read()
+            result_path = os.path.join(pages_dir, 'result.json')
+            if os.path.exists(result_path):
+                with open(result_path, encoding='utf-8') as f:
+                    self.result_template = f.read()
+
+    def delay(self, api=False):
+        """Sleep the configured latency (plus jitter) for one request"""
+        seconds = self.api_latency if api else self.latency
+        with self.lock:
+            seconds += self.random.uniform(0, self.jitter) if self.jitter else 0
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def should_fail(self):
+        with self.lock:
+            fail = self.failure_rate > 0 and self.random.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        return fail
+
+    def count(self, path):
+        with self.lock:
+            self.counts[path] = self.counts.get(path, 0) + 1
+
+    def result(self, customer):
+        with self.lock:
+            lookups = self.lookups.get(customer, 0)
+            self.lookups[customer] = lookups + 1
+        if self.result_template is not None:
+            return self.result_template.replace('{{customer}}', customer)
+        return json.dumps(default_result(customer, lookups))
+
+    def stats(self):
+        with self.lock:
+            return {'requests': dict(self.counts), 'failures_injected': self.failures}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    site = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.site.count(url.path)
+        if url.path == '/api/quick-pay':
+            self.site.delay(api=True)
+            customer = (parse_qs(url.query).get('customerNo') or [''])[0].strip()
+            if self.site.should_fail():
+                if self.site.failure_mode == 'hang':
+                    time.sleep(HANG_SECONDS)
+                    self._send(504, json.dumps({'status': 'error', 'message': 'Gateway timeout'}), 'application/json')
+                elif self.site.failure_mode == 'empty':
+                    self._send(200, json.dumps({'status': 'success', 'data': {}}), 'application/json')
+                else:
+                    self._send(503, json.dumps({'status': 'error', 'message': 'Service unavailable'}), 'application/json')
+                return
+            if not customer:
+                self._send(200, json.dumps({'status': 'error', 'message': 'Customer number not found'}), 'application/json')
+                return
+            self._send(200, self.site.result(customer), 'application/json')
+            return
+
+        page = self.site.pages.get(url.path)
+        self.site.delay()
+        if page is None:
+            self._send(404, 'Not found', 'text/plain')
+        else:
+            self._send(200, page, 'text/html; charset=utf-8')
+
+
+def start_server(site, port=DEFAULT_PORT, host='127.0.0.1'):
+    """Serve the stand-in on a background thread; returns (server, base_url)"""
+    handler = type('Handler', (StandInHandler,), {'site': site})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='dpdc-standin', daemon=True)
+    thread.start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def bench(base_url, runs, customer):
+    """fetch_usage_data runs on one warm browser; returns per-run phase timings"""
+    from dpdc_automation import DPDCAutomation
+
+    os.environ['DPDC_BASE_URL'] = base_url
+    automation = DPDCAutomation(connect_sheets=False)
+    results = []
+    try:
+        for i in range(runs):
+            if i:
+                automation.start_new_run()
+            else:
+                # Each run gets the whole deadline; start_new_run restarts it for the later ones
+                automation.deadline.start()
+            start = time.perf_counter()
+            reading = automation.fetch_usage_data(customer)
+            automation.metrics.finish(not reading.is_error)
+            record = automation.metrics.to_record()
+            commands = automation.commands.report()
+            results.append({
+                'ok': not reading.is_error,
+                'seconds': round(time.perf_counter() - start, 3),
+                'phases': {p['name']: p['seconds'] for p in record['phases'] if p['name'] != 'startup'},
+                'commands': {phase: stats['commands'] for phase, stats in commands.items() if phase != 'startup'},
+                'over_budget': automation.commands.over_budget(automation.command_budgets, commands)
+            })
+    finally:
+        automation.stop_browser()
+    return results
+
+
+def _add_site_arguments(parser):
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every page")
+    parser.add_argument('--api-latency', type=float, default=0.0, help="Seconds added to the result endpoint")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Up to this many extra seconds per request")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Fraction of result requests that fail")
+    parser.add_argument('--failure-mode', choices=FAILURE_MODES, default='error')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pages', help="Directory with recorded homepage.html / quick_pay.html / result.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the DPDC portal")
+    sub = parser.add_subparsers(dest='command', required=True)
+    serve = sub.add_parser('serve', help="Serve the stand-in until interrupted")
+    _add_site_arguments(serve)
+    bench_ = sub.add_parser('bench', help="Time fetch_usage_data against the stand-in")
+    _add_site_arguments(bench_)
+    bench_.add_argument('--runs', type=int, default=5)
+    bench_.add_argument('--customer', default='12345678')
+    bench_.add_argument('--human-delay-scale', type=float, default=0.0,
+                        help="Scale of the simulated human pauses (0 times the pipeline alone)")
+    bench_.add_argument('--budgets', help="Per-phase WebDriver command budgets, e.g. input=40,extraction=5 "
+                                          "(default DPDC_COMMAND_BUDGETS); exceeding one fails the benchmark")
+    bench_.add_argument('--output', help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    site = StandInSite(args.latency, args.api_latency, args.jitter, args.failure_rate, args.failure_mode,
+                       args.seed, args.pages)
+    server, base_url = start_server(site, 0 if args.command == 'bench' else args.port)
+
+    if args.command == 'serve':
+        print(f"✓ DPDC stand-in at {base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        server.shutdown()
+        print(json.dumps(site.stats()))
+        return 0
+
+    os.environ['DPDC_HUMAN_DELAY_SCALE'] = str(args.human_delay_scale)
+    if args.budgets is not None:
+        os.environ['DPDC_COMMAND_BUDGETS'] = args.budgets
+    os.environ.setdefault('DPDC_RANDOM_SEED', str(args.seed))
+    results = bench(base_url, args.runs, args.customer)
+    server.shutdown()
+
+    print(f"\n{'phase':<14}{'median':>9}{'min':>9}{'max':>9}{'cmds':>7}")
+    phases, commands = {}, {}
+    for result in results:
+        for name, seconds in result['phases'].items():
+            phases.setdefault(name, []).append(seconds)
+        for name, count in result['commands'].items():
+            commands.setdefault(name, []).append(count)
+    phases['total'] = [result['seconds'] for result in results]
+    commands['total'] = [sum(result['commands'].values()) for result in results]
+    for name, values in phases.items():
+        cmds = f"{statistics.median(commands[name]):>7.0f}" if name in commands else f"{'':>7}"
+        print(f"{name:<14}{statistics.median(values):>9.2f}{min(values):>9.2f}{max(values):>9.2f}{cmds}")
+    ok = sum(result['ok'] for result in results)
+    print(f"\n{ok}/{len(results)} runs returned a record; server: {json.dumps(site.stats())}")
+
+    over = sorted({(phase, limit) for result in results for phase, _, limit in result['over_budget']})
+    for phase, limit in over:
+        worst = max(result['commands'].get(phase, 0) for result in results)
+        print(f"✗ Phase '{phase}' went over its budget of {limit} WebDriver commands (max {worst})")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'runs': results, 'server': site.stats()}, f, indent=2)
+    return 0 if ok == len(results) and not over else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Local time-series store of extracted readings.
+
+Every record is kept in SQLite keyed by (account, timestamp), with indexes on
+both, so balance and usage analysis can run without reading the sheet back
+through the API. Existing sheet history can be streamed in once with backfill.
+
+    python dpdc_store.py backfill
+    python dpdc_store.py latest [--account ID]
+    python dpdc_store.py range --account ID --start 2024-01-01 [--end 2024-02-01]
+"""
+from datetime import datetime
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from dpdc_extraction import RECORD_FIELDS
+from dpdc_record import Reading
+
+DEFAULT_STORE_PATH = 'dpdc_readings.sqlite3'
+BACKFILL_CHUNK_ROWS = 500
+
+
+class ReadingStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        # Written from the output fan-out thread pool; each instance is used by one sink at a time
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS readings (
+                account_id TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                balance REAL,
+                min_recharge REAL,
+                is_error INTEGER NOT NULL DEFAULT 0,
+                record_json TEXT NOT NULL,
+                PRIMARY KEY (account_id, ts)
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS readings_ts ON readings (ts)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.commit()
+    
+    @staticmethod
+    def _row_values(timestamp, reading):
+        return (
+            reading.account_id,
+            timestamp,
+            None if reading.balance is None else float(reading.balance),
+            None if reading.min_recharge is None else float(reading.min_recharge),
+            1 if reading.is_error else 0,
+            json.dumps(reading.to_dict(), ensure_ascii=False)
+        )
+    
+    def add(self, timestamp, reading):
+        """Store one Reading; timestamp is the sheet's 'YYYY-MM-DD HH:MM:SS' string"""
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO readings VALUES (?, ?, ?, ?, ?, ?)',
+                self._row_values(timestamp, reading)
+            )
+    
+    def add_many(self, readings):
+        """Store (timestamp, Reading) pairs; existing (account, timestamp) keys are kept"""
+        with self.conn:
+            cur = self.conn.executemany(
+                'INSERT OR IGNORE INTO readings VALUES (?, ?, ?, ?, ?, ?)',
+                [self._row_values(ts, reading) for ts, reading in readings]
+            )
+        return cur.rowcount
+    
+    @staticmethod
+    def _to_reading(row):
+        reading = json.loads(row['record_json'])
+        reading.update({
+            'timestamp': row['ts'],
+            'balance': row['balance'],
+            'min_recharge': row['min_recharge'],
+            'is_error': bool(row['is_error'])
+        })
+        return reading
+    
+    def range(self, account_id, start=None, end=None, include_errors=False):
+        """Readings for one account with start <= ts < end, oldest first"""
+        sql = 'SELECT * FROM readings WHERE account_id = ?'
+        params = [account_id]
+        if start:
+            sql += ' AND ts >= ?'
+            params.append(start)
+        if end:
+            sql += ' AND ts < ?'
+            params.append(end)
+        if not include_errors:
+            sql += ' AND is_error = 0'
+        sql += ' ORDER BY ts'
+        return [self._to_reading(row) for row in self.conn.execute(sql, params)]
+    
+    def latest(self, account_id=None, include_errors=False):
+        """Most recent reading per account (or for one account)"""
+        error_filter = '' if include_errors else 'AND is_error = 0'
+        sql = f"""
+            SELECT r.* FROM readings r
+            JOIN (SELECT account_id, MAX(ts) AS ts FROM readings
+                  WHERE 1 = 1 {error_filter} GROUP BY account_id) last
+              ON r.account_id = last.account_id AND r.ts = last.ts
+        """
+        params = []
+        if account_id:
+            sql += ' WHERE r.account_id = ?'
+            params.append(account_id)
+        return [self._to_reading(row) for row in self.conn.execute(sql + ' ORDER BY r.account_id', params)]
+    
+    def accounts(self):
+        return [row[0] for row in self.conn.execute('SELECT DISTINCT account_id FROM readings ORDER BY account_id')]
+    
+    def get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+    
+    def backfill_from_worksheet(self, worksheet, chunk_rows=BACKFILL_CHUNK_ROWS, force=False):
+        """
+        Stream the sheet history into the store chunk by chunk
+        Runs once per store unless force is set; returns the number of new readings
+        """
+        if self.get_meta('backfilled_at') and not force:
+            print("✓ Store already backfilled")
+            return 0
+        
+        last_col = chr(ord('A') + len(RECORD_FIELDS))
+        added = 0
+        start = 1
+        while True:
+            end = start + chunk_rows - 1
+            rows = worksheet.get(f'A{start}:{last_col}{end}')
+            if not rows:
+                break
+            readings = []
+            for row in rows:
+                row = list(row) + [''] * (len(RECORD_FIELDS) + 1 - len(row))
+                timestamp = row[0].strip()
+                # Skip a header row or blank lines
+                if not timestamp or not timestamp[:1].isdigit():
+                    continue
+                readings.append((timestamp, Reading.from_fields(dict(zip(RECORD_FIELDS, row[1:])))))
+            added += self.add_many(readings)
+            print(f"   → rows {start}-{end}: {len(readings)} readings")
+            if len(rows) < chunk_rows:
+                break
+            start = end + 1
+        
+        self.set_meta('backfilled_at', datetime.now().isoformat(timespec='seconds'))
+        print(f"✓ Backfilled {added} readings")
+        return added
+    
+    def checkpoint(self):
+        """Merge the WAL into the database file"""
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local store of DPDC readings")
+    parser.add_argument('--store', default=os.environ.get('DPDC_STORE_PATH', DEFAULT_STORE_PATH))
+    sub = parser.add_subparsers(dest='command', required=True)
+    
+    backfill = sub.add_parser('backfill', help="Stream existing sheet rows into the store (once)")
+    backfill.add_argument('--force', action='store_true', help="Backfill again even if already done")
+    
+    latest = sub.add_parser('latest', help="Latest reading per account")
+    latest.add_argument('--account')
+    
+    range_ = sub.add_parser('range', help="Readings for an account in a time range")
+    range_.add_argument('--account', required=True)
+    range_.add_argument('--start')
+    range_.add_argument('--end')
+    range_.add_argument('--include-errors', action='store_true')
+    
+    args = parser.parse_args(argv)
+    store = ReadingStore(args.store)
+    
+    if args.command == 'backfill':
+        from dpdc_automation import authorize_gspread
+        
+        spreadsheet_id = os.environ.get('SPREADSHEET_ID')
+        if not spreadsheet_id:
+            print("✗ SPREADSHEET_ID not set")
+            return 1
+        worksheet = authorize_gspread().open_by_key(spreadsheet_id).sheet1
+        store.backfill_from_worksheet(worksheet, force=args.force)
+    elif args.command == 'latest':
+        for reading in store.latest(args.account):
+            print(json.dumps(reading, ensure_ascii=False))
+    elif args.command == 'range':
+        for reading in store.range(args.account, args.start, args.end, args.include_errors):
+            print(json.dumps(reading, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+from dpdc_fakesheets import FakeSheetsClient, patched_environ
+from dpdc_record import Reading
+
+
+def resumed_run(tmp_path, monkeypatch, sinks):
+    from dpdc_automation import DPDCAutomation
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'not-a-file.csv').mkdir()
+    with patched_environ({'CUSTOMER_NUMBER': '123', 'SPREADSHEET_ID': 'sheet-id-123', 'DPDC_SINKS': sinks,
+                          'DPDC_CSV_PATH': 'not-a-file.csv'}):
+        automation = DPDCAutomation(launch_browser=False, connect_sheets=False)
+        automation.gc = FakeSheetsClient()
+        automation.checkpoints.save('123', 'normalized', data=Reading('123', balance=Decimal('5')).to_dict(),
+                                    timestamp='2026-10-16 09:00:00', done_sinks=[])
+        assert automation.run()
+        automation.close()
+    return automation.checkpoints._read('123')
+
+
+def test_failing_secondary_sink_does_not_pin_the_checkpoint(tmp_path, monkeypatch):
+    checkpoint = resumed_run(tmp_path, monkeypatch, 'sheets,csv')
+    assert checkpoint['stage'] == 'committed'
+    assert checkpoint['done_sinks'] == ['sheets']
+
+
+def test_failing_sink_without_the_sheet_is_retried(tmp_path, monkeypatch):
+    checkpoint = resumed_run(tmp_path, monkeypatch, 'sqlite,csv')
+    assert checkpoint['stage'] == 'normalized'
+    assert checkpoint['done_sinks'] == ['sqlite']
@@ -0,0 +1,28 @@
+from dpdc_deadline import PHASE_BUDGETS, RunDeadline
+from dpdc_fakesheets import patched_environ
+
+
+def test_default_deadline_covers_every_budget():
+    with patched_environ({'DPDC_RUN_DEADLINE_SECONDS': '', 'DPDC_PHASE_BUDGETS': ''}):
+        deadline = RunDeadline.from_env()
+    assert deadline.total == sum(budget for budget, _ in PHASE_BUDGETS.values())
+
+    # A run that starts every phase on time gets each phase's full budget
+    for phase, (budget, _) in PHASE_BUDGETS.items():
+        deadline.begin(phase)
+        assert deadline.allotted[phase] == budget
+        deadline.started -= budget
+
+
+def test_default_deadline_follows_overridden_budgets():
+    with patched_environ({'DPDC_RUN_DEADLINE_SECONDS': '', 'DPDC_PHASE_BUDGETS': 'verification=120'}):
+        deadline = RunDeadline.from_env()
+    assert deadline.total == sum(budget for budget, _ in PHASE_BUDGETS.values()) + 40
+
+
+def test_zero_disables_the_deadline():
+    with patched_environ({'DPDC_RUN_DEADLINE_SECONDS': '0'}):
+        deadline = RunDeadline.from_env()
+    assert deadline.total is None
+    deadline.begin('verification')
+    assert deadline.timeout(60) == 60
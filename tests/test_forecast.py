@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from dpdc_forecast import ForecastState, to_days
+
+# Twice-daily readings with uneven usage and one recharge in the middle
+HISTORY = [
+    ('2026-10-01 09:00:00', 500.0),
+    ('2026-10-01 21:00:00', 493.5),
+    ('2026-10-02 09:00:00', 480.0),
+    ('2026-10-03 09:00:00', 462.25),
+    ('2026-10-03 21:00:00', 1462.25),
+    ('2026-10-04 09:00:00', 1450.0),
+    ('2026-10-05 21:00:00', 1421.0),
+    ('2026-10-06 09:00:00', 1421.0),
+]
+
+
+def assert_same_state(a, b):
+    for field in ForecastState.FIELDS:
+        left, right = getattr(a, field), getattr(b, field)
+        if isinstance(left, float):
+            assert left == pytest.approx(right, rel=1e-9), field
+        else:
+            assert left == right, field
+
+
+def test_advance_reaches_the_state_from_history():
+    days = [to_days(timestamp) for timestamp, _ in HISTORY]
+    balances = [balance for _, balance in HISTORY]
+
+    state = ForecastState.from_history(days[:1], balances[:1], halflife_days=7)
+    for day, balance in zip(days[1:], balances[1:]):
+        state.advance(day, balance, halflife_days=7)
+
+    assert_same_state(state, ForecastState.from_history(days, balances, halflife_days=7))
+    assert state.recharges == 1
+    assert state.last_recharge == {'at': '2026-10-03 21:00:00', 'amount': 1000.0}
+
+
+def test_advance_from_a_partial_history_matches_too():
+    days = [to_days(timestamp) for timestamp, _ in HISTORY]
+    balances = [balance for _, balance in HISTORY]
+
+    state = ForecastState.from_history(days[:4], balances[:4], halflife_days=7)
+    for day, balance in zip(days[4:], balances[4:]):
+        state.advance(day, balance, halflife_days=7)
+
+    full = ForecastState.from_history(days, balances, halflife_days=7)
+    assert_same_state(state, full)
+    assert state.project(1421.0, 200.0).daily_usage == pytest.approx(full.project(1421.0, 200.0).daily_usage)
@@ -0,0 +1,49 @@
+from dpdc_network import NetworkProfile
+
+
+class FakeDriver:
+    def __init__(self, ordered=True):
+        self.ordered = ordered
+        self.commands = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        if 'urlPatterns' in params and not self.ordered:
+            raise RuntimeError("Invalid parameters")
+        self.commands.append((cmd, params))
+
+
+def test_type_patterns_are_absolute_url_patterns():
+    profile = NetworkProfile('lean')
+    assert all(pattern.startswith('*://') for pattern in profile.blocked_patterns())
+
+
+def test_ordered_patterns_put_the_allow_list_first():
+    driver = FakeDriver()
+    profile = NetworkProfile('lean')
+    profile.apply(driver)
+
+    patterns = driver.commands[-1][1]['urlPatterns']
+    assert profile.blocking == 'ordered'
+    assert patterns[0] == {'urlPattern': '*://www.google.com/recaptcha/*', 'block': False}
+    assert {'urlPattern': '*://*/*.png', 'block': True} in patterns
+
+
+def test_allow_list_is_not_dropped_when_ordered_patterns_are_rejected():
+    driver = FakeDriver(ordered=False)
+    profile = NetworkProfile('lean')
+    profile.apply(driver)
+
+    assert not profile.enforced
+    assert profile.blocking.startswith('refused')
+    assert not any(cmd == 'Network.setBlockedURLs' for cmd, _ in driver.commands)
+
+
+def test_wildcard_list_without_an_allow_list():
+    driver = FakeDriver(ordered=False)
+    profile = NetworkProfile('lean')
+    profile.allow_urls = []
+    profile.apply(driver)
+
+    assert profile.enforced
+    assert profile.blocking == 'wildcard'
+    assert driver.commands[-1] == ('Network.setBlockedURLs', {'urls': profile.blocked_patterns()})
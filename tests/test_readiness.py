@@ -0,0 +1,33 @@
+import re
+
+from dpdc_readiness import RESULT_TEXT_PATTERNS
+
+# The quick-pay form before the lookup has answered: labels without values
+EMPTY_FORM_TEXT = """QUICK PAY
+Account Number:
+Customer Name:
+Balance Remaining:
+Enter your customer number
+Submit"""
+
+RESULT_TEXT = """QUICK PAY
+Account Number: 12345678
+Customer Name: Stand-in Customer 5678
+Balance Remaining: 1,234.50"""
+
+
+def matches(text):
+    # The probe runs these in the page as JavaScript RegExp(p, 'i'); Python's re agrees on them
+    return [p for p in RESULT_TEXT_PATTERNS if re.search(p, text, re.IGNORECASE)]
+
+
+def test_empty_form_is_not_a_result():
+    assert matches(EMPTY_FORM_TEXT) == []
+
+
+def test_rendered_result_matches():
+    assert len(matches(RESULT_TEXT)) == 3
+
+
+def test_lookup_error_matches():
+    assert matches('Customer not found')
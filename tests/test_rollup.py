@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from dpdc_fakesheets import FakeSheetsClient
+from dpdc_record import Reading
+from dpdc_rollup import Rollup
+
+
+def reading(balance):
+    return Reading('123', balance=Decimal(balance))
+
+
+def rows_by_period(rollup):
+    return {row['period']: row for row in rollup.conn.execute('SELECT * FROM rollup')}
+
+
+def test_consumption_and_recharges_accumulate_per_day_and_month(tmp_path):
+    rollup = Rollup(str(tmp_path / 'spool.sqlite3'))
+    assert rollup.apply('2026-10-15 09:00:00', reading('500'))
+    assert rollup.apply('2026-10-15 21:00:00', reading('480.5'))
+    assert rollup.apply('2026-10-16 09:00:00', reading('1470.5'))
+    assert rollup.apply('2026-10-16 21:00:00', reading('1460'))
+
+    rows = rows_by_period(rollup)
+    day = rows['2026-10-15']
+    assert (day['opening'], day['closing'], day['consumption'], day['recharged'], day['readings']) == (500, 480.5, 19.5, 0, 2)
+    day = rows['2026-10-16']
+    assert (day['opening'], day['closing'], day['consumption'], day['recharged'], day['readings']) == (480.5, 1460, 10.5, 990, 2)
+    month = rows['2026-10']
+    assert (month['opening'], month['closing'], month['consumption'], month['recharged'], month['readings']) == (500, 1460, 30, 990, 4)
+
+
+def test_readings_not_newer_than_the_last_are_ignored(tmp_path):
+    rollup = Rollup(str(tmp_path / 'spool.sqlite3'))
+    rollup.apply('2026-10-16 09:00:00', reading('500'))
+    assert not rollup.apply('2026-10-16 09:00:00', reading('400'))
+    assert not rollup.apply('2026-10-15 09:00:00', reading('600'))
+    assert not rollup.apply('2026-10-16 21:00:00', Reading('123'))
+
+    rows = rows_by_period(rollup)
+    assert rows['2026-10-16']['readings'] == 1
+    assert rows['2026-10-16']['consumption'] == 0
+
+
+def test_push_writes_changed_rows_in_one_batch_and_keeps_their_rows(tmp_path):
+    rollup = Rollup(str(tmp_path / 'spool.sqlite3'))
+    spreadsheet = FakeSheetsClient().open_by_key('sheet')
+    rollup.apply('2026-10-15 09:00:00', reading('500'))
+    rollup.apply('2026-10-16 09:00:00', reading('490'))
+
+    assert rollup.push(spreadsheet) == 3
+    assert spreadsheet.backend.calls['batch_update'] == 1
+    assert rollup.pending() == 0
+    sheet_rows = {row['period']: row['sheet_row'] for row in rollup.conn.execute('SELECT * FROM rollup')}
+    assert sorted(sheet_rows.values()) == [2, 3, 4]
+
+    # The next reading only rewrites its own day and month, in place
+    rollup.apply('2026-10-16 21:00:00', reading('485'))
+    assert rollup.push(spreadsheet) == 2
+    assert spreadsheet.backend.calls['batch_update'] == 2
+    assert {row['period']: row['sheet_row'] for row in rollup.conn.execute('SELECT * FROM rollup')} == sheet_rows
+
+    values = rollup.open_worksheet(spreadsheet).get_all_values()
+    assert values[0][:2] == ['Period', 'Account']
+    month = values[sheet_rows['2026-10'] - 1]
+    assert month[:2] == ['2026-10', '123']
+    assert float(month[4]) == 15
@@ -0,0 +1,53 @@
+from datetime import datetime
+from decimal import Decimal
+
+from dpdc_forecast import Forecast
+from dpdc_record import Reading
+from dpdc_schedule import PollScheduler
+
+NOW = datetime(2026, 10, 16, 9, 0, 0)
+
+
+def test_reading_without_balance_backs_off_like_a_failure(tmp_path):
+    scheduler = PollScheduler(str(tmp_path / 'next_run.json'), min_hours=1, max_hours=24, backoff=2)
+    reading = Reading('123', customer_name='Someone', balance=None)
+
+    first = scheduler.decide(NOW, reading)
+    assert first['failures'] == 1
+    assert first['intervalHours'] == 1
+    assert first['nextRun'] == '2026-10-16 10:00:00'
+
+    second = scheduler.decide(NOW, reading, first)
+    assert second['failures'] == 2
+    assert second['intervalHours'] == 2
+
+
+def test_decision_is_persisted_in_the_future(tmp_path):
+    scheduler = PollScheduler(str(tmp_path / 'next_run.json'))
+    scheduler.save(scheduler.decide(NOW, Reading('123', balance=None)))
+    assert scheduler.next_run() > NOW
+    assert not scheduler.is_due(NOW, grace_minutes=0)
+
+
+def test_reading_without_history_polls_at_the_learning_interval(tmp_path):
+    scheduler = PollScheduler(str(tmp_path / 'next_run.json'), learning_hours=6)
+    reading = Reading('123', balance=Decimal('500'))
+    reading.forecast = Forecast(NOW)
+
+    first = scheduler.decide(NOW, reading)
+    assert first['reason'] == 'no trajectory yet'
+    assert first['intervalHours'] == 6
+    # Stays at the learning interval instead of backing off while history builds up
+    assert scheduler.decide(NOW, reading, first)['intervalHours'] == 6
+
+
+def test_stable_balance_backs_off(tmp_path):
+    scheduler = PollScheduler(str(tmp_path / 'next_run.json'), min_hours=1, max_hours=24, backoff=2)
+    reading = Reading('123', balance=Decimal('500'))
+    reading.forecast = Forecast(NOW, daily_usage=0.0)
+
+    first = scheduler.decide(NOW, reading, {'intervalHours': 4, 'balance': 500.0})
+    assert first['reason'] == 'balance stable, backing off'
+    assert first['intervalHours'] == 8
+    assert scheduler.decide(NOW, reading, first)['intervalHours'] == 16
+    assert scheduler.decide(NOW, reading, {'intervalHours': 16})['intervalHours'] == 24
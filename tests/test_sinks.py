@@ -0,0 +1,111 @@
+import csv
+from decimal import Decimal
+import threading
+
+from dpdc_fakesheets import FakeBackend, FakeSheetsClient, patched_environ
+from dpdc_record import Reading
+from dpdc_sinks import CommitGate, CsvSink, Sink, fan_out
+
+
+class GatedSink(Sink):
+    """Commits after `release` is set (or immediately when commit_first)"""
+    timeout = 0.1
+
+    def __init__(self, name, commit_first=False):
+        self.name = name
+        self.commit_first = commit_first
+        self.release = threading.Event()
+        self.done = threading.Event()
+        self.landed = False
+
+    def write(self, timestamp, reading, gate):
+        try:
+            if self.commit_first:
+                with gate.commit():
+                    self.landed = True
+            self.release.wait(2)
+            if not self.commit_first:
+                with gate.commit():
+                    self.landed = True
+        finally:
+            self.done.set()
+
+
+def test_timed_out_sink_cannot_commit_late():
+    sink = GatedSink('sheets')
+    results = fan_out([sink], '2026-10-16 09:00:00', None)
+    assert results['sheets']['ok'] is False
+    assert results['sheets']['committed'] is False
+
+    sink.release.set()
+    assert sink.done.wait(2)
+    assert sink.landed is False
+
+
+def test_timed_out_sink_that_already_committed_counts():
+    sink = GatedSink('sheets', commit_first=True)
+    results = fan_out([sink], '2026-10-16 09:00:00', None)
+    assert results['sheets']['committed'] is True
+    sink.release.set()
+
+
+def test_csv_with_old_header_is_rotated(tmp_path):
+    path = tmp_path / 'readings.csv'
+    path.write_text('timestamp,accountId,balanceRemaining\n2026-01-01 09:00:00,1,10\n', encoding='utf-8')
+
+    CsvSink(str(path)).write('2026-10-16 09:00:00', Reading('1', balance=Decimal('5')), None)
+
+    rotated = [p for p in tmp_path.iterdir() if p.name != 'readings.csv']
+    assert len(rotated) == 1
+    assert rotated[0].read_text(encoding='utf-8').startswith('timestamp,accountId,balanceRemaining\n')
+    with open(path, newline='', encoding='utf-8') as f:
+        header, row = list(csv.reader(f))
+    assert len(header) == len(row)
+    assert 'dailyUsage' in header
+
+
+def test_csv_with_current_header_is_appended(tmp_path):
+    path = tmp_path / 'readings.csv'
+    sink = CsvSink(str(path))
+    sink.write('2026-10-16 09:00:00', Reading('1', balance=Decimal('5')), None)
+    sink.write('2026-10-16 21:00:00', Reading('1', balance=Decimal('4')), None)
+    assert len(list(tmp_path.iterdir())) == 1
+    assert len(path.read_text(encoding='utf-8').splitlines()) == 3
+
+
+def test_slow_flush_finishes_before_the_spool_is_closed(tmp_path, monkeypatch):
+    from dpdc_automation import DPDCAutomation
+
+    monkeypatch.chdir(tmp_path)
+    backend = FakeBackend(latency=0.3)
+    with patched_environ({'DPDC_SINKS': 'sheets', 'DPDC_SINK_TIMEOUTS': 'sheets=0.05'}):
+        automation = DPDCAutomation(launch_browser=False, connect_sheets=False)
+        automation.gc = FakeSheetsClient(backend)
+        results = automation.write_outputs('sheet', Reading('1', balance=Decimal('5')), '2026-10-16 09:00:00')
+        assert results['sheets']['ok'] is False
+        assert results['sheets']['committed'] is True
+
+        automation.checkpoint_databases()
+        assert automation.spool.pending() == []
+        automation.write_outputs('sheet', Reading('1', balance=Decimal('4')), '2026-10-16 21:00:00')
+        automation.close()
+
+    rows = backend.spreadsheets['sheet'].sheet1.rows
+    assert [row[0] for row in rows] == ['2026-10-16 09:00:00', '2026-10-16 21:00:00']
+
+
+def test_cancelled_sheet_write_leaves_the_rollup_alone(tmp_path, monkeypatch):
+    from dpdc_automation import DPDCAutomation
+
+    monkeypatch.chdir(tmp_path)
+    automation = DPDCAutomation(launch_browser=False, connect_sheets=False)
+    automation.gc = FakeSheetsClient()
+    gate = CommitGate()
+    gate.cancel()
+
+    assert not automation.update_google_sheet('sheet', Reading('1', balance=Decimal('5')), '2026-10-16 09:00:00', gate)
+    assert automation.rollup.pending() == 0
+    assert automation.update_google_sheet('sheet', Reading('1', balance=Decimal('5')), '2026-10-16 09:00:00')
+    counts = [row[0] for row in automation.rollup.conn.execute('SELECT readings FROM rollup')]
+    assert counts == [1, 1]
+    automation.close()
@@ -0,0 +1,75 @@
+import pytest
+
+from dpdc_extraction import RECORD_FIELDS
+from dpdc_fakesheets import FakeAPIError, FakeBackend, FakeSheetsClient
+from dpdc_record import Reading
+from dpdc_spool import RecordSpool, legacy_row_hash
+
+# A row as spooled before the typed record: raw page text in every cell
+LEGACY_ROW = ['2026-01-01 09:00:00', '123', 'Someone', 'LT-A', '01712345678', 'someone@example.com',
+              'Prepaid', '৳ 1,234.50', 'Active', 'Domestic', '500 Tk']
+
+
+def rehash(fields):
+    return Reading.from_fields(fields).content_hash()
+
+
+def test_legacy_hash_is_rederived_from_its_row(tmp_path):
+    spool = RecordSpool(str(tmp_path / 'spool.sqlite3'))
+    spool.append(LEGACY_ROW, '123', legacy_row_hash(LEGACY_ROW))
+
+    same = Reading.from_fields(dict(zip(RECORD_FIELDS, LEGACY_ROW[1:])))
+    assert spool.last_record('123', rehash)[0] == same.content_hash()
+    # Rewritten in place: later lookups need no rehash
+    assert spool.last_record('123')[0] == same.content_hash()
+
+
+def test_current_hash_is_left_alone(tmp_path):
+    spool = RecordSpool(str(tmp_path / 'spool.sqlite3'))
+    reading = Reading.from_fields(dict(zip(RECORD_FIELDS, LEGACY_ROW[1:])))
+    spool.append(reading.to_row('2026-10-16 09:00:00'), '123', reading.content_hash())
+    assert spool.last_record('123', lambda fields: 'rehashed')[0] == reading.content_hash()
+
+
+def worksheet(backend=None):
+    return FakeSheetsClient(backend).open_by_key('sheet').sheet1
+
+
+def test_flush_sends_pending_rows_in_one_request_and_records_their_sheet_rows(tmp_path):
+    spool = RecordSpool(str(tmp_path / 'spool.sqlite3'))
+    sheet = worksheet()
+    sheet.append_rows([['header']])
+    spool.append(['2026-10-16 09:00:00', '123'], '123', 'hash-1')
+    spool.append(['2026-10-16 09:00:00', '456'], '456', 'hash-2')
+
+    assert spool.flush(sheet) == 2
+    assert sheet.backend.calls['append_rows'] == 2
+    assert spool.pending() == []
+    assert spool.last_record('123') == ('hash-1', 2)
+    assert spool.last_record('456') == ('hash-2', 3)
+    assert spool.flush(sheet) == 0
+
+
+def test_rows_stay_pending_when_the_api_fails(tmp_path):
+    spool = RecordSpool(str(tmp_path / 'spool.sqlite3'))
+    spool.append(['2026-10-16 09:00:00', '123'], '123', 'hash-1')
+
+    with pytest.raises(FakeAPIError):
+        spool.flush(worksheet(FakeBackend(error_rate=1.0)))
+    assert [row for _, row in spool.pending()] == [['2026-10-16 09:00:00', '123']]
+    assert spool.last_record('123') == ('hash-1', None)
+
+    sheet = worksheet()
+    assert spool.flush(sheet) == 1
+    assert sheet.rows == [['2026-10-16 09:00:00', '123']]
+
+
+def test_close_folds_the_wal_into_the_database(tmp_path):
+    path = tmp_path / 'spool.sqlite3'
+    spool = RecordSpool(str(path))
+    spool.append(['2026-10-16 09:00:00', '123'], '123', 'hash-1')
+    spool.close()
+
+    wal = tmp_path / 'spool.sqlite3-wal'
+    assert not wal.exists() or wal.stat().st_size == 0
+    assert RecordSpool(str(path)).last_record('123') == ('hash-1', None)